@@ -0,0 +1,6 @@
+"""
+⏱️ Benchmarks - ELCAFESIN
+Scripts de medición de rendimiento. Ejecutar desde nucleo-api/:
+
+    python -m benchmarks.bench_motor_ventas
+"""
@@ -0,0 +1,77 @@
+"""
+⏱️ BENCHMARK - ARRANQUE DE LA BASE DE DATOS
+Tiempo de ``preparar_base_datos`` (lo que corre el lifespan antes de
+aceptar peticiones) con un motor nuevo en cada corrida, como un proceso que
+arranca:
+
+- BD vacía: tablas, migraciones y datos iniciales (incluye bcrypt)
+- BD ya preparada sin huella: lo que se hacía en cada arranque
+- BD ya preparada con huella: una sola consulta
+
+Uso (desde nucleo-api/):
+    python -m benchmarks.bench_arranque [--repeticiones 20]
+"""
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlmodel import create_engine
+
+from benchmarks.comun import imprimir_tabla, percentil
+from sistema.utilidades.arranque import preparar_base_datos
+
+
+def arrancar_ms(url: str) -> float:
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        preparar_base_datos(engine)
+    transcurrido = (time.perf_counter() - t0) * 1000
+    engine.dispose()
+    return transcurrido
+
+
+def borrar_huella(url: str) -> None:
+    engine = create_engine(url)
+    with engine.begin() as conexion:
+        conexion.execute(text("DELETE FROM huella_arranque"))
+    engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    directorio = Path(tempfile.mkdtemp(prefix="elcafesin-bench-"))
+
+    vacia = []
+    for n in range(max(1, args.repeticiones // 5)):
+        vacia.append(arrancar_ms(f"sqlite:///{directorio / f'vacia_{n}.db'}"))
+
+    url = f"sqlite:///{directorio / 'preparada.db'}"
+    arrancar_ms(url)
+    sin_huella = []
+    for _ in range(args.repeticiones):
+        borrar_huella(url)
+        sin_huella.append(arrancar_ms(url))
+    con_huella = [arrancar_ms(url) for _ in range(args.repeticiones)]
+
+    filas = [
+        [nombre, f"{percentil(tiempos, 50):.2f}", f"{percentil(tiempos, 99):.2f}"]
+        for nombre, tiempos in (
+            ("BD vacía", vacia),
+            ("BD preparada, sin huella", sin_huella),
+            ("BD preparada, con huella", con_huella),
+        )
+    ]
+    print(f"📊 Arranque de la BD, ms ({args.repeticiones} corridas)")
+    imprimir_tabla(["escenario", "p50", "p99"], filas)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+⏱️ BENCHMARK - ESCRITOR DE AUDITORÍA
+Latencia de registrar un log de sesión (lo que paga cada login) desde
+varios hilos: commit en el request vs. cola + escritura en lotes.
+
+Se usa el perfil dev (journal por defecto, synchronous=FULL): es el caso
+en el que cada commit espera el sync a disco.
+
+Uso (desde nucleo-api/):
+    python -m benchmarks.bench_auditoria [--hilos 8] [--logs 400]
+"""
+import argparse
+import contextlib
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlmodel import Session, SQLModel, func, select
+
+from benchmarks.comun import ContadorSQL, imprimir_tabla, percentil
+from sistema.configuracion import Ajustes, obtener_ajustes
+from sistema.configuracion.base_datos import crear_motor
+from sistema.entidades import LogSesion, Rol, Usuario
+from sistema.servicios.escritor_auditoria import EscritorAuditoria
+
+
+def rafaga(asincrona: bool, hilos: int, logs: int) -> list:
+    obtener_ajustes().AUDITORIA_ASINCRONA = asincrona
+    directorio = Path(tempfile.mkdtemp(prefix="elcafesin-bench-"))
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        engine = crear_motor(
+            f"sqlite:///{directorio / 'auditoria.db'}", perfil="dev",
+            ajustes_bd=Ajustes(DB_ECHO=False),
+        )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Usuario(username="caja1", password_hash="x", rol=Rol.VENDEDOR))
+        session.commit()
+
+    escritor = EscritorAuditoria()
+    contador = ContadorSQL(engine)
+    tiempos = []
+    lock = threading.Lock()
+
+    def trabajador():
+        for _ in range(logs // hilos):
+            with Session(engine) as session:
+                inicio = time.perf_counter()
+                escritor.registrar(session, usuario_id=1, accion="LOGIN", ip="10.0.0.1")
+                duracion = (time.perf_counter() - inicio) * 1000
+            with lock:
+                tiempos.append(duracion)
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=trabajador) for _ in range(hilos)]
+    for hilo in threads:
+        hilo.start()
+    for hilo in threads:
+        hilo.join()
+    escritor.detener()
+    total = time.perf_counter() - inicio
+
+    with Session(engine) as session:
+        escritos = session.exec(select(func.count()).select_from(LogSesion)).one()
+    engine.dispose()
+
+    return [
+        "cola + lotes" if asincrona else "commit en request",
+        f"{percentil(tiempos, 50):.2f}",
+        f"{percentil(tiempos, 99):.2f}",
+        f"{escritos / total:.0f}",
+        contador.commits,
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--logs", type=int, default=400)
+    args = parser.parse_args()
+
+    filas = [rafaga(asincrona, args.hilos, args.logs) for asincrona in (False, True)]
+
+    print(f"📝 Auditoría de logins: {args.hilos} hilos, {args.logs} logs (perfil dev)")
+    imprimir_tabla(["modo", "p50 ms", "p99 ms", "logs/s", "commits"], filas)
+
+
+if __name__ == "__main__":
+    main()
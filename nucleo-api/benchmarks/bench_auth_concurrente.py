@@ -0,0 +1,177 @@
+"""
+⏱️ BENCHMARK - AUTENTICACIÓN CONCURRENTE
+Latencia p50/p99 de una ruta protegida con requiere_permiso bajo N
+peticiones concurrentes, servidas por la app ASGI en un solo event loop
+(como un worker de uvicorn).
+
+Variantes:
+- anterior: dependencias async originales (la consulta bloquea el loop)
+- sync sin cache: dependencias actuales en el threadpool, cache de usuarios
+  desactivada (mide solo el efecto de sacar la BD del loop)
+- sync con cache: dependencias actuales tal cual
+
+Cada sentencia SQL añade --latencia-ms para simular una BD en red.
+
+Uso (desde nucleo-api/):
+    python -m benchmarks.bench_auth_concurrente [--concurrencia 200] [--peticiones 2000]
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import Depends, FastAPI, HTTPException, status
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from benchmarks.comun import crear_motor_temporal, imprimir_tabla, llamar_asgi, percentil
+from sistema.configuracion import (
+    crear_token, obtener_ajustes, obtener_sesion, requiere_permiso
+)
+from sistema.configuracion.seguridad import decodificar_token, esquema_oauth2
+from sistema.entidades import PermisoRol, Rol, Usuario, UsuarioPermiso
+
+
+# ==================== RÉPLICA DE LAS DEPENDENCIAS ANTERIORES ====================
+
+async def obtener_usuario_legado(
+    token: str = Depends(esquema_oauth2),
+    session: Session = Depends(obtener_sesion)
+):
+    username = decodificar_token(token).get("sub")
+    usuario = session.exec(select(Usuario).where(Usuario.username == username)).first()
+    if not usuario or not usuario.activo:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    return usuario
+
+
+def permiso_legado(recurso: str, accion: str):
+    async def verificar_permiso(
+        usuario_actual=Depends(obtener_usuario_legado),
+        session: Session = Depends(obtener_sesion)
+    ):
+        permiso_usuario = session.exec(
+            select(UsuarioPermiso).where(
+                UsuarioPermiso.usuario_id == usuario_actual.id,
+                UsuarioPermiso.recurso == recurso,
+                UsuarioPermiso.accion == accion
+            )
+        ).first()
+        if permiso_usuario:
+            if not permiso_usuario.permitido:
+                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+            return usuario_actual
+
+        permiso_rol = session.exec(
+            select(PermisoRol).where(
+                PermisoRol.rol == usuario_actual.rol,
+                PermisoRol.recurso == recurso,
+                PermisoRol.accion == accion
+            )
+        ).first()
+        if not permiso_rol:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+        return usuario_actual
+
+    return verificar_permiso
+
+
+# ==================== APP DE PRUEBA ====================
+
+def crear_app(engine) -> FastAPI:
+    app = FastAPI()
+
+    def sesion_bench():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[obtener_sesion] = sesion_bench
+
+    @app.get("/anterior")
+    def ruta_anterior(usuario=Depends(permiso_legado("ventas", "ver"))):
+        return {"usuario": usuario.username}
+
+    @app.get("/actual")
+    def ruta_actual(usuario=Depends(requiere_permiso("ventas", "ver"))):
+        return {"usuario": usuario.username}
+
+    return app
+
+
+async def tormenta(app: FastAPI, ruta: str, token: str, concurrencia: int, peticiones: int):
+    limite = asyncio.Semaphore(concurrencia)
+    latencias = []
+
+    async def una():
+        async with limite:
+            inicio = time.perf_counter()
+            codigo = await llamar_asgi(
+                app, "GET", ruta, [(b"authorization", f"Bearer {token}".encode())]
+            )
+            latencias.append(time.perf_counter() - inicio)
+            assert codigo == 200, codigo
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(una() for _ in range(peticiones)))
+    return latencias, time.perf_counter() - inicio
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrencia", type=int, default=200)
+    parser.add_argument("--peticiones", type=int, default=2000)
+    parser.add_argument("--latencia-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    # Pool del tamaño de la concurrencia: se mide el event loop, no la espera
+    # por conexiones (con el pool por defecto la variante anterior se bloquea
+    # esperando conexiones que solo el propio loop puede devolver)
+    engine = crear_motor_temporal(
+        "auth_concurrente.db", pool_size=args.concurrencia, max_overflow=0
+    )
+    with Session(engine) as session:
+        session.add(Usuario(username="caja1", password_hash="x", rol=Rol.VENDEDOR, activo=True))
+        session.add(PermisoRol(rol="VENDEDOR", recurso="ventas", accion="ver"))
+        session.commit()
+
+    latencia = args.latencia_ms / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _simular_red(*_):
+        time.sleep(latencia)
+
+    app = crear_app(engine)
+    token = crear_token("caja1", extra_data={"rol": "VENDEDOR"})
+    ajustes = obtener_ajustes()
+    maximo_cache = ajustes.USUARIOS_CACHE_MAXIMO
+
+    variantes = [
+        ("anterior", "/anterior", maximo_cache),
+        ("sync sin cache", "/actual", 0),
+        ("sync con cache", "/actual", maximo_cache),
+    ]
+
+    filas = []
+    for nombre, ruta, tam_cache in variantes:
+        ajustes.USUARIOS_CACHE_MAXIMO = tam_cache
+        asyncio.run(tormenta(app, ruta, token, args.concurrencia, args.concurrencia))  # calentar
+        latencias, segundos = asyncio.run(
+            tormenta(app, ruta, token, args.concurrencia, args.peticiones)
+        )
+        filas.append([
+            nombre,
+            f"{percentil(latencias, 50) * 1000:.1f}",
+            f"{percentil(latencias, 99) * 1000:.1f}",
+            f"{args.peticiones / segundos:.0f}",
+        ])
+
+    ajustes.USUARIOS_CACHE_MAXIMO = maximo_cache
+
+    print(
+        f"🔐 Auth concurrente: {args.peticiones} peticiones, "
+        f"{args.concurrencia} concurrentes, {args.latencia_ms} ms por sentencia"
+    )
+    imprimir_tabla(["variante", "p50 ms", "p99 ms", "peticiones/s"], filas)
+
+
+if __name__ == "__main__":
+    main()
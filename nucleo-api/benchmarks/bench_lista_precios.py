@@ -0,0 +1,130 @@
+"""
+⏱️ BENCHMARK - PRECIOS DEL TICKET (fase 2 de registrar_venta)
+Solo la parte de poner precio a las líneas, sin BOM ni escrituras: compara
+recalcular el costo de cada línea desde sus insumos (como hacía
+``registrar_venta``) con el lookup en la lista de precios versionada.
+
+Uso (desde nucleo-api/):
+    python -m benchmarks.bench_lista_precios [--recetas 500] [--lineas 6]
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+from benchmarks.comun import crear_motor_temporal, imprimir_tabla, percentil
+from sistema.configuracion import obtener_ajustes
+from sistema.entidades import Ingrediente, Receta, RecetaItem
+from sistema.servicios.costos_recetas import caches
+from sistema.servicios.explosion_recetas import consulta_explosion
+from sistema.servicios.lista_precios import lista_precios
+
+INGREDIENTES = 60
+
+
+def poblar(engine, recetas: int) -> None:
+    rnd = random.Random(23)
+    with Session(engine) as session:
+        session.execute(insert(Ingrediente), [
+            {"id": n, "nombre": f"Insumo {n}", "unidad": "kg", "costo_por_unidad": rnd.uniform(5, 300)}
+            for n in range(1, INGREDIENTES + 1)
+        ])
+        session.execute(insert(Receta), [
+            {"id": n, "nombre": f"Receta {n}", "margen": rnd.choice([None, rnd.uniform(0.3, 1.5)])}
+            for n in range(1, recetas + 1)
+        ])
+        session.execute(insert(RecetaItem), [
+            {
+                "receta_id": n, "ingrediente_id": ingrediente_id,
+                "cantidad": rnd.uniform(0.01, 0.5), "merma": rnd.uniform(0, 0.1),
+            }
+            for n in range(1, recetas + 1)
+            for ingrediente_id in rnd.sample(range(1, INGREDIENTES + 1), rnd.randint(3, 8))
+        ])
+        session.commit()
+
+
+def cargar_insumos(session) -> tuple:
+    """``receta_id -> [(cantidad, costo)]`` y márgenes, como los traía el BOM"""
+    explosion = consulta_explosion().subquery()
+    insumos = {}
+    for receta_id, cantidad, costo in session.execute(
+        select(explosion.c.raiz, explosion.c.cantidad, Ingrediente.costo_por_unidad)
+        .join(Ingrediente, Ingrediente.id == explosion.c.ingrediente_id)
+    ):
+        insumos.setdefault(receta_id, []).append((cantidad, costo))
+    margenes = dict(session.exec(select(Receta.id, Receta.margen)).all())
+    return insumos, margenes
+
+
+def precios_recalculando(insumos, margenes, ticket) -> float:
+    total = 0.0
+    for receta_id, cantidad in ticket:
+        costo = sum(q * c for q, c in insumos[receta_id])
+        margen = margenes[receta_id]
+        if margen is None:
+            margen = obtener_ajustes().MARGIN_DEFAULT
+        total += costo * (1 + margen) * cantidad
+    return total
+
+
+def precios_con_lista(session, ticket) -> float:
+    lista = lista_precios(session)
+    return sum(lista.precios[receta_id] * cantidad for receta_id, cantidad in ticket)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recetas", type=int, default=500)
+    parser.add_argument("--lineas", type=int, default=6)
+    parser.add_argument("--tickets", type=int, default=20000)
+    args = parser.parse_args()
+
+    engine = crear_motor_temporal("lista_precios.db")
+    poblar(engine, args.recetas)
+    rnd = random.Random(9)
+    tickets = [
+        [(rnd.randint(1, args.recetas), rnd.randint(1, 3)) for _ in range(args.lineas)]
+        for _ in range(args.tickets)
+    ]
+
+    def medir_us(funcion, repeticiones: int = 1) -> list:
+        tiempos = []
+        for ticket in tickets[: max(1, len(tickets) // repeticiones)]:
+            t0 = time.perf_counter()
+            funcion(ticket)
+            tiempos.append((time.perf_counter() - t0) * 1e6)
+        return [f"{percentil(tiempos, 50):.1f}", f"{percentil(tiempos, 99):.1f}"]
+
+    with Session(engine) as session:
+        insumos, margenes = cargar_insumos(session)
+        lista = lista_precios(session)
+        for ticket in tickets[:50]:
+            assert abs(
+                precios_recalculando(insumos, margenes, ticket) - precios_con_lista(session, ticket)
+            ) < 1e-6
+
+        def lista_fria(ticket):
+            caches.para(engine).vaciar()
+            precios_con_lista(session, ticket)
+
+        filas = [
+            ["recalcular costo por línea", *medir_us(
+                lambda t: precios_recalculando(insumos, margenes, t)
+            )],
+            ["lista de precios (en cache)", *medir_us(lambda t: precios_con_lista(session, t))],
+            ["lista de precios (reconstruida)", *medir_us(lista_fria, repeticiones=200)],
+        ]
+    engine.dispose()
+
+    print(
+        f"📊 {args.recetas} recetas, tickets de {args.lineas} líneas, "
+        f"µs por ticket (lista v{lista.version})"
+    )
+    imprimir_tabla(["variante", "p50", "p99"], filas)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+⏱️ BENCHMARK - TORMENTA DE LOGINS
+Simula un cambio de turno: todas las cajas hacen login a la vez mientras un
+cliente insiste con contraseñas incorrectas para la misma cuenta, y se mide
+cuánto tarda una petición ligera (/ping) servida por el mismo worker.
+
+Variantes:
+- en el hilo: bcrypt dentro del threadpool de FastAPI (BCRYPT_PROCESOS=0)
+- pool: bcrypt en el pool de procesos (BCRYPT_PROCESOS=núcleos)
+
+Uso (desde nucleo-api/):
+    python -m benchmarks.bench_login_tormenta [--cajas 40] [--ataque 100] [--costo 10]
+"""
+import argparse
+import asyncio
+import os
+import time
+from urllib.parse import urlencode
+
+import bcrypt
+from fastapi import FastAPI
+from sqlmodel import Session
+
+from benchmarks.comun import crear_motor_temporal, imprimir_tabla, llamar_asgi, percentil
+from sistema.configuracion import hashing, obtener_ajustes, obtener_sesion
+from sistema.configuracion.limitador import limitador_login
+from sistema.entidades import Rol, Usuario
+from sistema.rutas import auth_router
+
+FORMULARIO = [(b"content-type", b"application/x-www-form-urlencoded")]
+
+
+def crear_app(engine) -> FastAPI:
+    app = FastAPI()
+    app.include_router(auth_router)
+
+    def sesion_bench():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[obtener_sesion] = sesion_bench
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    return app
+
+
+async def tormenta(app: FastAPI, cajas: int, ataque: int):
+    latencias_login, latencias_ping, codigos = [], [], []
+
+    async def login(username: str, password: str, ip: str):
+        cuerpo = urlencode({"username": username, "password": password}).encode()
+        inicio = time.perf_counter()
+        codigo = await llamar_asgi(app, "POST", "/auth/login", FORMULARIO, cuerpo, cliente=ip)
+        codigos.append(codigo)
+        if codigo == 200:
+            latencias_login.append(time.perf_counter() - inicio)
+
+    async def sondear(fin: asyncio.Event):
+        while not fin.is_set():
+            inicio = time.perf_counter()
+            await llamar_asgi(app, "GET", "/ping")
+            latencias_ping.append(time.perf_counter() - inicio)
+            await asyncio.sleep(0.01)
+
+    fin = asyncio.Event()
+    sonda = asyncio.create_task(sondear(fin))
+
+    inicio = time.perf_counter()
+    await asyncio.gather(
+        *(login(f"caja{n}", f"clave{n}", f"10.0.1.{n}") for n in range(cajas)),
+        *(login("caja0", "adivinando", "10.6.6.6") for _ in range(ataque)),
+    )
+    segundos = time.perf_counter() - inicio
+
+    fin.set()
+    await sonda
+    return latencias_login, latencias_ping, codigos, segundos
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cajas", type=int, default=40)
+    parser.add_argument("--ataque", type=int, default=100)
+    parser.add_argument("--costo", type=int, default=10)
+    args = parser.parse_args()
+
+    engine = crear_motor_temporal("login_tormenta.db", pool_size=20, max_overflow=40)
+    with Session(engine) as session:
+        for n in range(args.cajas):
+            password_hash = bcrypt.hashpw(f"clave{n}".encode(), bcrypt.gensalt(args.costo))
+            session.add(Usuario(
+                username=f"caja{n}", password_hash=password_hash.decode(), rol=Rol.VENDEDOR
+            ))
+        session.commit()
+
+    app = crear_app(engine)
+    ajustes = obtener_ajustes()
+    nucleos = os.cpu_count() or 1
+
+    filas = []
+    for nombre, procesos in [("en el hilo", 0), (f"pool ({nucleos} proc)", nucleos)]:
+        ajustes.BCRYPT_PROCESOS = procesos
+        hashing.cerrar_pool_hash()
+        if procesos:
+            hashing.verificar_password_pool("x", bcrypt.hashpw(b"x", bcrypt.gensalt(4)).decode())
+
+        rechazos_previos = limitador_login.rechazos
+        latencias_login, latencias_ping, codigos, segundos = asyncio.run(
+            tormenta(app, args.cajas, args.ataque)
+        )
+        filas.append([
+            nombre,
+            f"{codigos.count(200)}/{args.cajas}",
+            codigos.count(401),
+            limitador_login.rechazos - rechazos_previos,
+            f"{percentil(latencias_login, 99) * 1000:.0f}",
+            f"{percentil(latencias_ping, 99) * 1000:.1f}",
+            f"{segundos:.2f}",
+        ])
+
+    hashing.cerrar_pool_hash()
+
+    print(
+        f"🔑 Tormenta de logins: {args.cajas} cajas + {args.ataque} intentos fallidos "
+        f"(bcrypt costo {args.costo}, {nucleos} núcleos)"
+    )
+    imprimir_tabla(
+        ["variante", "logins ok", "401", "429", "login p99 ms", "ping p99 ms", "total s"],
+        filas,
+    )
+
+
+if __name__ == "__main__":
+    main()
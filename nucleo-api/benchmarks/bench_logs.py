@@ -0,0 +1,92 @@
+"""
+⏱️ BENCHMARK - LISTADO DE LOGS
+Latencia de la primera página y de una página profunda (por cursor) de
+/logs a medida que crece el historial de auditoría.
+
+Uso (desde nucleo-api/):
+    python -m benchmarks.bench_logs [--tamanos 10000,100000,1000000] [--limite 100]
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from benchmarks.comun import crear_motor_temporal, imprimir_tabla, percentil
+from sistema.entidades import Ingrediente, LogSesion, Movimiento, Rol, TipoMovimiento, Usuario
+from sistema.servicios.auditoria import TIPOS, consultar_logs, contar_logs
+
+LOTE = 50_000
+
+
+def poblar(engine, cantidad: int) -> None:
+    """``cantidad`` filas repartidas entre log_sesion y movimiento"""
+    inicio = datetime(2024, 1, 1)
+    with Session(engine) as session:
+        usuario = Usuario(username="admin", password_hash="x", rol=Rol.ADMIN)
+        cafe = Ingrediente(nombre="Café", unidad="kg", costo_por_unidad=10, stock=1e9)
+        session.add_all([usuario, cafe])
+        session.commit()
+
+        for desde in range(0, cantidad // 2, LOTE):
+            hasta = min(desde + LOTE, cantidad // 2)
+            session.execute(insert(LogSesion), [
+                {"usuario_id": usuario.id, "accion": "LOGIN", "exito": True,
+                 "creado_en": inicio + timedelta(seconds=2 * i)}
+                for i in range(desde, hasta)
+            ])
+            session.execute(insert(Movimiento), [
+                {"ingrediente_id": cafe.id, "tipo": TipoMovimiento.VENTA, "cantidad": -1.0,
+                 "referencia": f"Venta #{i}", "creado_en": inicio + timedelta(seconds=2 * i + 1)}
+                for i in range(desde, hasta)
+            ])
+            session.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tamanos", default="10000,100000")
+    parser.add_argument("--limite", type=int, default=100)
+    parser.add_argument("--repeticiones", type=int, default=30)
+    args = parser.parse_args()
+
+    filas = []
+    for tamano in (int(t) for t in args.tamanos.split(",")):
+        engine = crear_motor_temporal(f"logs_{tamano}.db")
+        poblar(engine, tamano)
+
+        with Session(engine) as session:
+            # Cursor 50 páginas adentro
+            cursor = None
+            for _ in range(50):
+                _, cursor = consultar_logs(session, list(TIPOS), args.limite, cursor=cursor)
+
+            def medir_ms(funcion):
+                tiempos = []
+                for _ in range(args.repeticiones):
+                    inicio = time.perf_counter()
+                    funcion()
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+                return percentil(tiempos, 50)
+
+            primera = medir_ms(lambda: consultar_logs(session, list(TIPOS), args.limite))
+            profunda = medir_ms(
+                lambda: consultar_logs(session, list(TIPOS), args.limite, cursor=cursor)
+            )
+            aproximado = medir_ms(lambda: contar_logs(session, list(TIPOS)))
+            exacto = medir_ms(lambda: contar_logs(session, list(TIPOS), exacto=True))
+
+        filas.append([
+            f"{tamano:,}", f"{primera:.2f}", f"{profunda:.2f}", f"{aproximado:.2f}", f"{exacto:.2f}"
+        ])
+        engine.dispose()
+
+    print(f"📋 /logs: p50 en ms, páginas de {args.limite}")
+    imprimir_tabla(
+        ["filas", "primera página", "página 50 (cursor)", "total aprox", "total exacto"], filas
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+⏱️ BENCHMARK - COSTO DE LA INSTRUMENTACIÓN POR PETICIÓN
+Una ruta síncrona con 3 consultas, servida por la app ASGI en un solo event
+loop (como un worker de uvicorn):
+
+- sin instrumentación: sin middlewares (los eventos de SQLAlchemy siguen
+  registrados, pero sin medición abierta solo leen el ContextVar)
+- MedidorSQL: sentencias y tiempo de BD por petición (sin headers)
+- MedidorSQL + MedidorMetricas: lo que corre en producción
+
+También mide cuánto tarda armar ``/metrics`` con todas las rutas de la app
+ya observadas.
+
+Uso (desde nucleo-api/):
+    python -m benchmarks.bench_metricas [--peticiones 3000]
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlmodel import Session
+
+from benchmarks.comun import crear_motor_temporal, imprimir_tabla, llamar_asgi, percentil
+from sistema.configuracion.sentencias_sql import MedidorSQL
+from sistema.servicios.metricas import MedidorMetricas, latencia, peticiones, registro
+
+
+def crear_app(engine, middlewares) -> FastAPI:
+    app = FastAPI()
+    for middleware, opciones in middlewares:
+        app.add_middleware(middleware, **opciones)
+
+    def sesion():
+        with Session(engine) as session:
+            yield session
+
+    @app.get("/recetas/{receta_id}")
+    def detalle(receta_id: int, session: Session = Depends(sesion)):
+        return [session.execute(text("SELECT :n"), {"n": n}).scalar() for n in range(3)]
+
+    return app
+
+
+def medir_us(apps: dict, cantidad: int) -> dict:
+    """Peticiones intercaladas entre variantes: el ruido del threadpool y
+    de la máquina cae igual sobre todas"""
+    async def correr():
+        tiempos = {nombre: [] for nombre in apps}
+        for n in range(cantidad):
+            for nombre, app in apps.items():
+                t0 = time.perf_counter()
+                await llamar_asgi(app, "GET", f"/recetas/{n}")
+                tiempos[nombre].append((time.perf_counter() - t0) * 1e6)
+        return tiempos
+
+    return asyncio.run(correr())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--peticiones", type=int, default=3000)
+    args = parser.parse_args()
+
+    engine = crear_motor_temporal("metricas.db")
+    variantes = {
+        "sin instrumentación": [],
+        "MedidorSQL": [(MedidorSQL, {"debug": False})],
+        "MedidorSQL + MedidorMetricas": [(MedidorSQL, {"debug": False}), (MedidorMetricas, {})],
+    }
+    apps = {nombre: crear_app(engine, middlewares) for nombre, middlewares in variantes.items()}
+
+    # Los eventos de SQLAlchemy quedan activos en todas las variantes: sin
+    # medición abierta solo consultan el ContextVar (se incluye en la base)
+    medir_us(apps, 200)  # calentar
+    tiempos = medir_us(apps, args.peticiones)
+    engine.dispose()
+
+    base = percentil(tiempos["sin instrumentación"], 50)
+    print(f"📊 µs por petición (3 consultas), {args.peticiones} peticiones intercaladas")
+    imprimir_tabla(
+        ["variante", "p50", "p99", "Δ p50"],
+        [
+            [nombre, f"{percentil(t, 50):.1f}", f"{percentil(t, 99):.1f}", f"{percentil(t, 50) - base:+.1f}"]
+            for nombre, t in tiempos.items()
+        ],
+    )
+
+    # /metrics con una serie por ruta de la app real
+    from sistema.motor_principal import app as app_real
+
+    for ruta in app_real.routes:
+        for metodo in getattr(ruta, "methods", None) or ():
+            peticiones.sumar(metodo, ruta.path, "200")
+            latencia.observar(0.01, metodo, ruta.path)
+    t0 = time.perf_counter()
+    repeticiones = 200
+    for _ in range(repeticiones):
+        texto = registro.exponer()
+    ms = (time.perf_counter() - t0) * 1000 / repeticiones
+    print(f"\n📈 /metrics: {ms:.2f} ms por exposición ({len(texto.splitlines())} líneas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+⏱️ BENCHMARK - MOTOR DE VENTAS
+Compara el flujo anterior de crear_venta (consultas por línea, dos commits)
+contra el motor por conjuntos de sistema.servicios.motor_ventas.
+
+Uso (desde nucleo-api/):
+    python -m benchmarks.bench_motor_ventas [--tickets 300] [--lineas 6]
+"""
+import argparse
+import random
+
+from sqlmodel import Session, select
+
+from benchmarks.comun import ContadorSQL, crear_motor_temporal, imprimir_tabla, medir
+from sistema.configuracion import obtener_ajustes
+from sistema.entidades import (
+    Ingrediente, Movimiento, Receta, RecetaItem, TipoMovimiento, Venta, VentaItem
+)
+from sistema.rutas.ventas_rutas import ItemVentaCreate
+from sistema.servicios.motor_ventas import registrar_venta
+
+
+def crear_venta_legado(session: Session, lineas, sucursal=None) -> Venta:
+    """Réplica del crear_venta original (referencia para comparar)"""
+    ingredientes_a_descontar = {}
+    for item_data in lineas:
+        receta = session.get(Receta, item_data.receta_id)
+        receta_items = session.exec(
+            select(RecetaItem).where(RecetaItem.receta_id == receta.id)
+        ).all()
+        for receta_item in receta_items:
+            cantidad = receta_item.cantidad * (1 + receta_item.merma) * item_data.cantidad
+            ingredientes_a_descontar[receta_item.ingrediente_id] = (
+                ingredientes_a_descontar.get(receta_item.ingrediente_id, 0.0) + cantidad
+            )
+
+    for ingrediente_id, cantidad in ingredientes_a_descontar.items():
+        ingrediente = session.get(Ingrediente, ingrediente_id)
+        if ingrediente.stock < cantidad:
+            raise RuntimeError("Stock insuficiente")
+
+    venta = Venta(sucursal=sucursal, total=0.0)
+    session.add(venta)
+    session.commit()
+    session.refresh(venta)
+
+    total_venta = 0.0
+    for item_data in lineas:
+        receta = session.get(Receta, item_data.receta_id)
+        receta_items = session.exec(
+            select(RecetaItem).where(RecetaItem.receta_id == receta.id)
+        ).all()
+        costo_receta = 0.0
+        for receta_item in receta_items:
+            ingrediente = session.get(Ingrediente, receta_item.ingrediente_id)
+            costo_receta += receta_item.cantidad * (1 + receta_item.merma) * ingrediente.costo_por_unidad
+        margen = receta.margen if receta.margen is not None else obtener_ajustes().MARGIN_DEFAULT
+        precio_unitario = costo_receta * (1 + margen)
+        session.add(VentaItem(
+            venta_id=venta.id, receta_id=receta.id, cantidad=item_data.cantidad,
+            precio_unitario=precio_unitario, subtotal=precio_unitario * item_data.cantidad
+        ))
+        total_venta += precio_unitario * item_data.cantidad
+
+    venta.total = total_venta
+    session.add(venta)
+
+    for ingrediente_id, cantidad in ingredientes_a_descontar.items():
+        ingrediente = session.get(Ingrediente, ingrediente_id)
+        ingrediente.stock -= cantidad
+        session.add(ingrediente)
+        session.add(Movimiento(
+            ingrediente_id=ingrediente_id, tipo=TipoMovimiento.VENTA,
+            cantidad=-cantidad, referencia=f"Venta #{venta.id}"
+        ))
+
+    session.commit()
+    session.refresh(venta)
+    return venta
+
+
+def poblar_menu(engine, num_recetas: int = 20, num_ingredientes: int = 30) -> list:
+    """Crea un menú sintético con stock de sobra"""
+    rnd = random.Random(42)
+    with Session(engine) as session:
+        ingredientes = [
+            Ingrediente(nombre=f"Insumo {i}", costo_por_unidad=rnd.uniform(5, 300), stock=1e9)
+            for i in range(num_ingredientes)
+        ]
+        session.add_all(ingredientes)
+        session.commit()
+
+        recetas = [Receta(nombre=f"Receta {i}", margen=0.4) for i in range(num_recetas)]
+        session.add_all(recetas)
+        session.commit()
+
+        for receta in recetas:
+            for ingrediente in rnd.sample(ingredientes, 5):
+                session.add(RecetaItem(
+                    receta_id=receta.id, ingrediente_id=ingrediente.id,
+                    cantidad=rnd.uniform(0.01, 0.3), merma=0.05
+                ))
+        session.commit()
+        return [receta.id for receta in recetas]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickets", type=int, default=300)
+    parser.add_argument("--lineas", type=int, default=6)
+    args = parser.parse_args()
+
+    engine = crear_motor_temporal("motor_ventas.db")
+    receta_ids = poblar_menu(engine)
+    contador = ContadorSQL(engine)
+    rnd = random.Random(7)
+
+    def ticket():
+        return [
+            ItemVentaCreate(receta_id=rid, cantidad=rnd.randint(1, 3))
+            for rid in rnd.sample(receta_ids, args.lineas)
+        ]
+
+    variantes = {
+        "anterior": lambda s, l: crear_venta_legado(s, l, sucursal="Centro"),
+        "motor": lambda s, l: registrar_venta(s, l, sucursal="Centro"),
+    }
+
+    filas = []
+    for nombre, funcion in variantes.items():
+        contador.reiniciar()
+
+        def una_venta():
+            with Session(engine) as session:
+                funcion(session, ticket())
+
+        segundos = medir(una_venta, args.tickets)
+        filas.append([
+            nombre,
+            f"{contador.sentencias / args.tickets:.1f}",
+            f"{contador.commits / args.tickets:.1f}",
+            f"{args.tickets / segundos:.0f}",
+        ])
+
+    print(f"🧮 Motor de ventas: {args.tickets} tickets de {args.lineas} líneas")
+    imprimir_tabla(["variante", "sql/ticket", "commits/ticket", "tickets/s"], filas)
+
+
+if __name__ == "__main__":
+    main()
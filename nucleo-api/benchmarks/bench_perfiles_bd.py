@@ -0,0 +1,119 @@
+"""
+⏱️ BENCHMARK - PERFILES DE BASE DE DATOS
+Tráfico mixto (lecturas de inventario/ventas + ventas nuevas) desde varios
+hilos contra una BD SQLite en archivo, con el perfil dev y con el prod.
+
+- dev: journal por defecto (los escritores bloquean a los lectores), echo
+  de SQL (enviado a /dev/null para no inundar la consola)
+- prod: WAL, synchronous=NORMAL, mmap, cache, busy_timeout, temp_store
+
+Uso (desde nucleo-api/):
+    python -m benchmarks.bench_perfiles_bd [--hilos 8] [--segundos 5] [--escrituras 0.2]
+"""
+import argparse
+import contextlib
+import os
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlmodel import Session, SQLModel, select
+
+from benchmarks.bench_motor_ventas import poblar_menu
+from benchmarks.comun import imprimir_tabla, percentil
+from sistema.configuracion import Ajustes
+from sistema.configuracion.base_datos import crear_motor
+from sistema.entidades import Ingrediente, Venta
+from sistema.rutas.ventas_rutas import ItemVentaCreate
+from sistema.servicios.motor_ventas import registrar_venta
+
+
+def trafico(engine, receta_ids, hilos: int, segundos: float, escrituras: float) -> dict:
+    lecturas_ms, escrituras_ms = [], []
+    errores = [0]
+    lock = threading.Lock()
+    fin = time.perf_counter() + segundos
+
+    def trabajador(semilla: int):
+        rnd = random.Random(semilla)
+        while time.perf_counter() < fin:
+            inicio = time.perf_counter()
+            es_escritura = rnd.random() < escrituras
+            try:
+                with Session(engine) as session:
+                    if es_escritura:
+                        registrar_venta(session, [
+                            ItemVentaCreate(receta_id=rid, cantidad=1)
+                            for rid in rnd.sample(receta_ids, 3)
+                        ], sucursal="Centro")
+                    else:
+                        session.exec(select(Ingrediente).limit(100)).all()
+                        session.exec(select(Venta).order_by(Venta.id.desc()).limit(50)).all()
+            except Exception:
+                with lock:
+                    errores[0] += 1
+                continue
+
+            duracion = (time.perf_counter() - inicio) * 1000
+            with lock:
+                (escrituras_ms if es_escritura else lecturas_ms).append(duracion)
+
+    threads = [threading.Thread(target=trabajador, args=(n,)) for n in range(hilos)]
+    for hilo in threads:
+        hilo.start()
+    for hilo in threads:
+        hilo.join()
+
+    return {
+        "lecturas/s": len(lecturas_ms) / segundos,
+        "escrituras/s": len(escrituras_ms) / segundos,
+        "lectura p99": percentil(lecturas_ms, 99),
+        "escritura p99": percentil(escrituras_ms, 99),
+        "errores": errores[0],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--segundos", type=float, default=5.0)
+    parser.add_argument("--escrituras", type=float, default=0.2)
+    args = parser.parse_args()
+
+    import sistema.entidades  # noqa: F401  (registra los modelos)
+
+    filas = []
+    for perfil in ("dev", "prod"):
+        directorio = Path(tempfile.mkdtemp(prefix="elcafesin-bench-"))
+        with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+            engine = crear_motor(
+                f"sqlite:///{directorio / f'{perfil}.db'}", perfil=perfil, ajustes_bd=Ajustes()
+            )
+            SQLModel.metadata.create_all(engine)
+            receta_ids = poblar_menu(engine)
+            resultado = trafico(engine, receta_ids, args.hilos, args.segundos, args.escrituras)
+        engine.dispose()
+
+        filas.append([
+            perfil,
+            f"{resultado['lecturas/s']:.0f}",
+            f"{resultado['escrituras/s']:.0f}",
+            f"{resultado['lectura p99']:.1f}",
+            f"{resultado['escritura p99']:.1f}",
+            resultado["errores"],
+        ])
+
+    print(
+        f"🗄️ Perfiles de BD: {args.hilos} hilos, {args.segundos:.0f} s, "
+        f"{args.escrituras:.0%} escrituras"
+    )
+    imprimir_tabla(
+        ["perfil", "lecturas/s", "escrituras/s", "lectura p99 ms", "escritura p99 ms", "errores"],
+        filas,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+⏱️ BENCHMARK - REPORTE DE VENTAS POR PERÍODO
+Un año de ventas sintéticas (1M por defecto) en 3 sucursales; compara el
+reporte anterior (cargar cada ``Venta`` y sumar en Python) con la
+agregación en SQL, con y sin los acumulados, y mide el mapa de calor de
+/reportes/serie.
+
+Uso (desde nucleo-api/):
+    python -m benchmarks.bench_reportes [--ventas 1000000] [--repeticiones 5]
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+from benchmarks.comun import crear_motor_temporal, imprimir_tabla, percentil
+from sistema.entidades import Venta
+from sistema.servicios import reportes
+from sistema.servicios.acumulados import reconstruir_acumulados
+from sistema.servicios.reportes import Periodo, patrones_ventas, resumen_ventas
+
+INICIO = datetime(2024, 1, 1)
+LOTE = 50_000
+
+
+def poblar(engine, cantidad: int) -> None:
+    rnd = random.Random(42)
+    segundos_anio = 366 * 24 * 3600
+    with Session(engine) as session:
+        for desde in range(0, cantidad, LOTE):
+            session.execute(insert(Venta), [
+                {
+                    "sucursal": rnd.choice(("Centro", "Plaza Juriquilla", "Antea")),
+                    "total": round(rnd.uniform(30, 250), 2),
+                    "creado_en": INICIO + timedelta(seconds=rnd.randrange(segundos_anio)),
+                }
+                for _ in range(min(LOTE, cantidad - desde))
+            ])
+            session.commit()
+        reconstruir_acumulados(session)
+
+
+def reporte_anterior(session, desde, hasta) -> tuple:
+    """Lo que hacía /reportes/ventas_periodo antes"""
+    ventas = session.exec(
+        select(Venta).where(Venta.creado_en >= desde, Venta.creado_en <= hasta)
+    ).all()
+    return sum(v.total for v in ventas), len(ventas)
+
+
+def sql_sin_acumulados(session, desde, hasta, periodo=None, por_sucursal=False):
+    return reportes._desde_ventas(session, desde, hasta, True, None, periodo, por_sucursal)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ventas", type=int, default=1_000_000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = crear_motor_temporal("reportes.db")
+    inicio = time.perf_counter()
+    poblar(engine, args.ventas)
+    print(f"🧪 {args.ventas:,} ventas generadas en {time.perf_counter() - inicio:.1f} s")
+
+    anio = (INICIO + timedelta(hours=7, minutes=30), datetime(2024, 12, 31, 20))
+    mes = (datetime(2024, 6, 1), datetime(2024, 6, 30, 23, 59, 59))
+    casos = [
+        ("año, total", anio, None, False),
+        ("año, mes x sucursal", anio, Periodo.MES, True),
+        ("año, semana", anio, Periodo.SEMANA, False),
+        ("junio, día x sucursal", mes, Periodo.DIA, True),
+        ("junio, hora", mes, Periodo.HORA, False),
+    ]
+
+    def medir_ms(funcion, repeticiones):
+        tiempos = []
+        for _ in range(repeticiones):
+            t0 = time.perf_counter()
+            funcion()
+            tiempos.append((time.perf_counter() - t0) * 1000)
+        return percentil(tiempos, 50)
+
+    filas = []
+    with Session(engine) as session:
+        for nombre, (desde, hasta), periodo, por_sucursal in casos:
+            anterior = "-"
+            if periodo is None:
+                anterior = f"{medir_ms(lambda: reporte_anterior(session, desde, hasta), 1):.0f}"
+                session.expunge_all()
+            directo = medir_ms(
+                lambda: sql_sin_acumulados(session, desde, hasta, periodo, por_sucursal),
+                args.repeticiones,
+            )
+            con_acumulados = medir_ms(
+                lambda: resumen_ventas(
+                    session, desde, hasta, periodo=periodo, por_sucursal=por_sucursal
+                ),
+                args.repeticiones,
+            )
+            filas.append([nombre, anterior, f"{directo:.1f}", f"{con_acumulados:.1f}"])
+
+        mapa = medir_ms(
+            lambda: patrones_ventas(session, anio[0].date(), anio[1].date()), args.repeticiones
+        )
+        filas.append(["año, día x hora (/serie)", "-", "-", f"{mapa:.1f}"])
+    engine.dispose()
+
+    print(f"📊 /reportes/ventas_periodo, p50 en ms ({args.ventas:,} ventas)")
+    imprimir_tabla(["consulta", "ORM + Python", "SQL", "SQL + acumulados"], filas)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+⏱️ BENCHMARK - SIMULACIÓN DE PRECIOS (/recetas/simulacion)
+Menú sintético (500 recetas × 60 ingredientes, 3-8 items por receta);
+compara recalcular cada receta por escenario (lo que haría
+``_calcular_detalle_receta`` con los precios cambiados) con la matriz por
+columnas.
+
+Uso (desde nucleo-api/):
+    python -m benchmarks.bench_simulacion [--recetas 500] [--escenarios 50]
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+from benchmarks.comun import crear_motor_temporal, imprimir_tabla, percentil
+from sistema.entidades import Ingrediente, Receta, RecetaItem
+from sistema.rutas.recetas_rutas import EscenarioPrecios, SimulacionPrecios, simular_precios
+from sistema.servicios.costos_recetas import caches
+
+INGREDIENTES = 60
+
+
+def poblar(engine, recetas: int) -> None:
+    rnd = random.Random(17)
+    with Session(engine) as session:
+        session.execute(insert(Ingrediente), [
+            {"id": n, "nombre": f"Insumo {n}", "unidad": "kg", "costo_por_unidad": rnd.uniform(5, 300)}
+            for n in range(1, INGREDIENTES + 1)
+        ])
+        session.execute(insert(Receta), [
+            {"id": n, "nombre": f"Receta {n}", "margen": rnd.uniform(0.3, 1.5)}
+            for n in range(1, recetas + 1)
+        ])
+        session.execute(insert(RecetaItem), [
+            {
+                "receta_id": n, "ingrediente_id": ingrediente_id,
+                "cantidad": rnd.uniform(0.01, 0.5), "merma": rnd.uniform(0, 0.1),
+            }
+            for n in range(1, recetas + 1)
+            for ingrediente_id in rnd.sample(range(1, INGREDIENTES + 1), rnd.randint(3, 8))
+        ])
+        session.commit()
+
+
+def escenarios(cantidad: int):
+    rnd = random.Random(5)
+    return [
+        EscenarioPrecios(variaciones={
+            ingrediente_id: rnd.uniform(-20, 20)
+            for ingrediente_id in rnd.sample(range(1, INGREDIENTES + 1), rnd.randint(1, 12))
+        })
+        for _ in range(cantidad)
+    ]
+
+
+def simulacion_ingenua(session, datos: SimulacionPrecios) -> list:
+    """Un recálculo completo de cada receta por escenario, con objetos ORM"""
+    recetas = session.exec(select(Receta)).all()
+    ingredientes = {i.id: i for i in session.exec(select(Ingrediente)).all()}
+    items = session.exec(select(RecetaItem)).all()
+    resultados = []
+    for escenario in datos.escenarios:
+        costos = {receta.id: 0.0 for receta in recetas}
+        for item in items:
+            precio = ingredientes[item.ingrediente_id].costo_por_unidad
+            precio *= 1 + escenario.variaciones.get(item.ingrediente_id, 0.0) / 100
+            costos[item.receta_id] += item.cantidad * (1 + item.merma) * precio
+        resultados.append(costos)
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recetas", type=int, default=500)
+    parser.add_argument("--escenarios", type=int, default=50)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = crear_motor_temporal("simulacion.db")
+    poblar(engine, args.recetas)
+    datos = SimulacionPrecios(escenarios=escenarios(args.escenarios))
+
+    def medir_ms(funcion):
+        tiempos = []
+        for _ in range(args.repeticiones):
+            with Session(engine) as session:
+                t0 = time.perf_counter()
+                funcion(session)
+                tiempos.append((time.perf_counter() - t0) * 1000)
+        return f"{percentil(tiempos, 50):.1f}", f"{percentil(tiempos, 99):.1f}"
+
+    def matriz_fria(session):
+        caches.para(engine).vaciar()
+        simular_precios(datos=datos, session=session, usuario_actual=None)
+
+    filas = [
+        ["ORM, recálculo completo", *medir_ms(lambda s: simulacion_ingenua(s, datos))],
+        ["matriz (construirla + simular)", *medir_ms(matriz_fria)],
+        ["matriz en cache", *medir_ms(
+            lambda s: simular_precios(datos=datos, session=s, usuario_actual=None)
+        )],
+    ]
+    engine.dispose()
+
+    print(f"📊 {args.recetas} recetas × {args.escenarios} escenarios, ms por petición")
+    imprimir_tabla(["variante", "p50", "p99"], filas)
+
+
+if __name__ == "__main__":
+    main()
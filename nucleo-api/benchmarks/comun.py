@@ -0,0 +1,117 @@
+"""
+🧰 Utilidades comunes para los benchmarks
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlmodel import SQLModel, create_engine
+
+# Permite ejecutar los scripts desde nucleo-api/ o desde la raíz del repo
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+
+def crear_motor_temporal(nombre: str = "bench.db", **opciones) -> Engine:
+    """
+    Crea una BD SQLite en un directorio temporal con todas las tablas
+    (``opciones`` se pasan a create_engine, ej. pool_size)
+    """
+    import sistema.entidades  # noqa: F401  (registra los modelos)
+
+    directorio = Path(tempfile.mkdtemp(prefix="elcafesin-bench-"))
+    engine = create_engine(
+        f"sqlite:///{directorio / nombre}",
+        connect_args={"check_same_thread": False},
+        **opciones,
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+class ContadorSQL:
+    """Cuenta sentencias y commits emitidos por un engine"""
+
+    def __init__(self, engine: Engine):
+        self.sentencias = 0
+        self.commits = 0
+        event.listen(engine, "before_cursor_execute", self._al_ejecutar)
+        event.listen(engine, "commit", self._al_confirmar)
+
+    def _al_ejecutar(self, *args) -> None:
+        self.sentencias += 1
+
+    def _al_confirmar(self, *args) -> None:
+        self.commits += 1
+
+    def reiniciar(self) -> None:
+        self.sentencias = 0
+        self.commits = 0
+
+
+def medir(funcion: Callable[[], None], repeticiones: int) -> float:
+    """Ejecuta ``funcion`` n veces y devuelve los segundos totales"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return time.perf_counter() - inicio
+
+
+def percentil(valores: Sequence[float], p: float) -> float:
+    """Percentil por rango más cercano (p en 0-100)"""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+def imprimir_tabla(encabezados: List[str], filas: List[List[object]]) -> None:
+    """Imprime una tabla de texto alineada"""
+    celdas = [[str(c) for c in fila] for fila in [encabezados] + filas]
+    anchos = [max(len(fila[i]) for fila in celdas) for i in range(len(encabezados))]
+    for n, fila in enumerate(celdas):
+        print("  ".join(c.rjust(anchos[i]) for i, c in enumerate(fila)))
+        if n == 0:
+            print("  ".join("-" * a for a in anchos))
+
+
+async def llamar_asgi(
+    app,
+    metodo: str,
+    ruta: str,
+    headers: Optional[List[Tuple[bytes, bytes]]] = None,
+    cuerpo: bytes = b"",
+    cliente: str = "127.0.0.1",
+) -> int:
+    """Una petición directa a una app ASGI (sin red); devuelve el status"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": metodo,
+        "scheme": "http",
+        "path": ruta,
+        "raw_path": ruta.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")] + list(headers or []),
+        "client": (cliente, 50000),
+        "server": ("bench", 80),
+    }
+    respuesta = {}
+
+    async def receive():
+        return {"type": "http.request", "body": cuerpo, "more_body": False}
+
+    async def send(mensaje):
+        if mensaje["type"] == "http.response.start":
+            respuesta["status"] = mensaje["status"]
+
+    await app(scope, receive, send)
+    return respuesta["status"]
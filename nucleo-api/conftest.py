@@ -2,13 +2,17 @@
 🧪 CONFTEST - FIXTURES DE PRUEBA
 Configuración global para pytest con base de datos in-memory
 """
+from contextlib import contextmanager
+
 import pytest
+from sqlalchemy import event
 from sqlmodel import SQLModel, Session, create_engine
 from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
 
 from sistema.motor_principal import app
 from sistema.configuracion import obtener_sesion, hash_password
+from sistema.configuracion.sentencias_sql import dejar_de_observar, observar_peticiones
 from sistema.entidades import (
     Usuario, Rol, PermisoRol, Accion,
     Ingrediente, Receta, RecetaItem, Cliente
@@ -30,6 +34,67 @@ def test_engine_fixture():
     return engine
 
 
+@pytest.fixture(name="contar_sentencias")
+def contar_sentencias_fixture():
+    """
+    Cuenta las sentencias SQL ejecutadas en un motor dentro del bloque:
+
+        with contar_sentencias(engine, maximo=2) as sentencias:
+            ...
+
+    Con ``maximo`` falla si se ejecutan más (detecta consultas N+1).
+    """
+    @contextmanager
+    def contar(engine, maximo=None):
+        sentencias = []
+        escuchar = lambda *args: sentencias.append(args[2])  # noqa: E731
+        event.listen(engine, "before_cursor_execute", escuchar)
+        try:
+            yield sentencias
+        finally:
+            event.remove(engine, "before_cursor_execute", escuchar)
+        if maximo is not None:
+            assert len(sentencias) <= maximo, (
+                f"{len(sentencias)} sentencias SQL (máximo {maximo}):\n" + "\n".join(sentencias)
+            )
+
+    return contar
+
+
+@pytest.fixture(name="sentencias_por_peticion")
+def sentencias_por_peticion_fixture():
+    """
+    Mediciones SQL de las peticiones HTTP hechas dentro del bloque (ver
+    sistema/configuracion/sentencias_sql.py):
+
+        with sentencias_por_peticion(maximo=3, repetidas=False):
+            client.get("/ventas/1", headers=...)
+
+    Con ``maximo`` falla si una petición ejecuta más sentencias; con
+    ``repetidas=False`` si alguna repite una forma (probable N+1).
+    """
+    @contextmanager
+    def medir(maximo=None, repetidas=True):
+        mediciones = []
+        observar_peticiones(mediciones.append)
+        try:
+            yield mediciones
+        finally:
+            dejar_de_observar(mediciones.append)
+        for medicion in mediciones:
+            detalle = "\n".join(
+                f"  {veces} × {sentencia}" for sentencia, veces in medicion.por_texto.most_common()
+            )
+            if maximo is not None:
+                assert medicion.sentencias <= maximo, (
+                    f"{medicion.ruta}: {medicion.sentencias} sentencias SQL (máximo {maximo}):\n{detalle}"
+                )
+            if not repetidas:
+                assert not medicion.repetidas(), f"{medicion.ruta}: probable N+1:\n{detalle}"
+
+    return medir
+
+
 @pytest.fixture(name="test_session")
 def test_session_fixture(test_engine):
     """
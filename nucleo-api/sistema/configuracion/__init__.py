@@ -12,6 +12,7 @@ from .seguridad import (
     requiere_roles,
     requiere_permiso
 )
+from .cache_usuarios import invalidar_usuario, estadisticas_cache_usuarios
 
 __all__ = [
     # Ajustes
@@ -30,4 +31,8 @@ __all__ = [
     "obtener_usuario_actual",
     "requiere_roles",
     "requiere_permiso",
+    
+    # Cache de usuarios
+    "invalidar_usuario",
+    "estadisticas_cache_usuarios",
 ]
@@ -3,6 +3,7 @@
 Carga variables de entorno y configuración del sistema
 """
 from functools import lru_cache
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -12,11 +13,68 @@ class Ajustes(BaseSettings):
     # 🗄️ Base de datos
     DATABASE_URL: str = "sqlite:///./almacen_cuantico.db"
     
+    # Perfil: "prod" (WAL + pragmas, sin echo) o "dev" (SQLite por defecto, echo)
+    DB_PERFIL: str = "prod"
+    DB_ECHO: Optional[bool] = None  # None = según el perfil
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 3600
+    
+    # Pragmas SQLite del perfil prod (se aplican en cada conexión nueva)
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE: int = -64000  # negativo = KiB (~64 MB)
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    
     # 🔐 Seguridad
     SECRET_KEY: str = "CAMBIAR_EN_PRODUCCION"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 120
     ALGORITHM: str = "HS256"
     
+    # 🧂 bcrypt (None = un proceso por núcleo, 0 = sin pool)
+    BCRYPT_PROCESOS: Optional[int] = None
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_REHASH: bool = False
+    LOGIN_CONCURRENCIA_POR_USUARIO: int = 2
+    LOGIN_CONCURRENCIA_POR_IP: int = 8
+    
+    # ⚡ Caches en memoria (segundos entre consultas al contador de generación)
+    PERMISOS_REVISION_SEGUNDOS: float = 2.0
+    USUARIOS_REVISION_SEGUNDOS: float = 2.0
+    COSTOS_REVISION_SEGUNDOS: float = 2.0
+    CAPACIDAD_REFRESCO_SEGUNDOS: float = 5.0  # relectura del stock para el tablero de capacidad
+    
+    # 👥 Cache de usuarios autenticados
+    USUARIOS_CACHE_MAXIMO: int = 1024
+    USUARIOS_CACHE_TTL_SEGUNDOS: float = 60.0
+    
+    # 📝 Escritor de auditoría (logs de sesión en lotes, fuera del request)
+    AUDITORIA_ASINCRONA: bool = True
+    AUDITORIA_COLA_MAXIMA: int = 10000
+    AUDITORIA_LOTE: int = 500
+    AUDITORIA_INTERVALO_SEGUNDOS: float = 0.2
+    # Con la cola llena: "sincrono" (escribe en el request), "bloquear"
+    # (espera AUDITORIA_ESPERA_SEGUNDOS y luego escribe) o "descartar"
+    AUDITORIA_POLITICA: str = "sincrono"
+    AUDITORIA_ESPERA_SEGUNDOS: float = 1.0
+    
+    # 📡 Stream de logs (SSE)
+    LOGS_STREAM_COLA: int = 1000  # eventos pendientes por suscriptor antes de forzar reconexión
+    LOGS_STREAM_PING_SEGUNDOS: float = 15.0
+    
+    # 🔎 Sentencias SQL por petición (ver sentencias_sql.py)
+    DEBUG_SQL: bool = False  # headers X-SQL-* y warning por cada probable N+1
+    SQL_N1_UMBRAL: int = 5  # repeticiones de una misma forma para reportarla
+    
+    # 📈 /metrics en formato Prometheus (ver servicios/metricas.py)
+    METRICAS_HABILITADAS: bool = True
+    
+    # 💤 Importar al arrancar las dependencias diferidas (ver diferidos.py)
+    PRECARGAR_DIFERIDOS: bool = False
+    
     # 💰 Negocio
     MARGIN_DEFAULT: float = 0.40
     
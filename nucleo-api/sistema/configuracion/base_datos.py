@@ -1,13 +1,19 @@
 """
 🗄️ MOTOR DE BASE DE DATOS - ELCAFESIN
-Configuración de SQLModel y SQLite
+Configuración de SQLModel y SQLite (perfiles dev/prod)
 """
+import time
 from pathlib import Path
-from typing import Generator
+from typing import Generator, Optional
 
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
 from sqlmodel import SQLModel, Session, create_engine
 
 from .ajustes import obtener_ajustes
+from .migraciones import migrar
+from .sentencias_sql import registrar_espera_pool
 
 # Obtener configuración
 ajustes = obtener_ajustes()
@@ -37,24 +43,96 @@ def _resolver_database_url(url: str) -> str:
     return f"{prefix}{(base_repo / ruta).resolve()}"
 
 
-# Crear engine (connect_args solo para SQLite)
-engine = create_engine(
-    _resolver_database_url(ajustes.DATABASE_URL),
-    echo=True,  # Logs SQL en consola (cambiar a False en producción)
-    connect_args={"check_same_thread": False}  # Solo para SQLite
-)
+class PoolMedido(QueuePool):
+    """QueuePool que suma la espera de cada checkout a la petición en curso"""
 
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            registrar_espera_pool(time.perf_counter() - inicio)
 
-def crear_tablas():
-    """Crea todas las tablas en la base de datos"""
+
+def _aplicar_pragmas(conexion_dbapi, ajustes_bd) -> None:
+    """Pragmas del perfil prod; se ejecutan una vez por conexión nueva del pool"""
+    cursor = conexion_dbapi.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {int(ajustes_bd.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA journal_mode = {ajustes_bd.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous = {ajustes_bd.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size = {int(ajustes_bd.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA cache_size = {int(ajustes_bd.SQLITE_CACHE_SIZE)}")
+        cursor.execute(f"PRAGMA temp_store = {ajustes_bd.SQLITE_TEMP_STORE}")
+    finally:
+        cursor.close()
+
+
+def crear_motor(url: Optional[str] = None, perfil: Optional[str] = None, ajustes_bd=None) -> Engine:
+    """
+    Crea un engine según el perfil de base de datos
+
+    Perfiles:
+        - prod: pragmas SQLite (WAL, synchronous=NORMAL, mmap, cache,
+          busy_timeout, temp_store), pool dimensionado y sin echo
+        - dev: SQLite por defecto y echo de SQL en consola
+    """
+    ajustes_bd = ajustes_bd or ajustes
+    perfil = (perfil or ajustes_bd.DB_PERFIL).lower()
+    if perfil not in ("dev", "prod"):
+        raise ValueError(f"DB_PERFIL desconocido: {perfil} (usa 'dev' o 'prod')")
+
+    url = make_url(_resolver_database_url(url or ajustes_bd.DATABASE_URL))
+    es_sqlite = url.get_backend_name() == "sqlite"
+    en_memoria = es_sqlite and url.database in (None, "", ":memory:")
+
+    echo = ajustes_bd.DB_ECHO if ajustes_bd.DB_ECHO is not None else perfil == "dev"
+    opciones = {"echo": echo}
+
+    if es_sqlite:
+        opciones["connect_args"] = {"check_same_thread": False}
+
+    # Las BD en memoria usan un pool de una conexión: no aceptan tamaño
+    if perfil == "prod" and not en_memoria:
+        opciones.update(
+            poolclass=PoolMedido,
+            pool_size=ajustes_bd.DB_POOL_SIZE,
+            max_overflow=ajustes_bd.DB_MAX_OVERFLOW,
+            pool_timeout=ajustes_bd.DB_POOL_TIMEOUT,
+            pool_recycle=ajustes_bd.DB_POOL_RECYCLE,
+        )
+
+    motor = create_engine(url, **opciones)
+
+    if perfil == "prod" and es_sqlite:
+        event.listen(
+            motor, "connect",
+            lambda conexion_dbapi, _registro: _aplicar_pragmas(conexion_dbapi, ajustes_bd)
+        )
+
+    return motor
+
+
+# Engine de la aplicación (perfil según DB_PERFIL)
+engine = crear_motor()
+
+
+def crear_tablas(motor: Optional[Engine] = None):
+    """Crea todas las tablas en la base de datos y aplica las migraciones"""
+    motor = motor or engine
     # Importar todos los modelos para que SQLModel los registre
     from sistema.entidades import (
         usuario, permiso, cliente, proveedor, 
-        ingrediente, receta, venta, movimiento, log_sesion
+        ingrediente, receta, venta, venta_diaria, movimiento, log_sesion, generacion, esquema
     )
     
     print("🗄️ Creando tablas en almacen_cuantico.db...")
-    SQLModel.metadata.create_all(engine)
+    SQLModel.metadata.create_all(motor)
+
+    # create_all no toca tablas que ya existían: columnas e índices nuevos
+    # llegan por migraciones versionadas
+    for migracion in migrar(motor):
+        print(f"   ↳ migración {migracion.version}: {migracion.descripcion}")
     print("✅ Tablas creadas exitosamente")
 
 
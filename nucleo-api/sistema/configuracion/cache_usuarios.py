@@ -0,0 +1,153 @@
+"""
+👥 CACHE DE USUARIOS AUTENTICADOS - ELCAFESIN
+LRU con TTL de usuarios activos, indexada por (username, token), para que
+``obtener_usuario_actual`` no consulte la BD en cada petición.
+
+Invalidación:
+- Las rutas que modifican un usuario llaman a ``invalidar_usuario``: la
+  entrada se expulsa al instante y otra vez tras el commit, y se incrementa
+  la generación "usuarios" para que los demás workers vacíen su cache en la
+  siguiente revisión (``USUARIOS_REVISION_SEGUNDOS``).
+- El TTL acota cuánto vive cualquier entrada aunque nadie la invalide.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel import Session
+
+from .ajustes import obtener_ajustes
+from .generaciones import (
+    CachePorMotor, al_confirmar, incrementar_generacion, leer_generacion, motor_de
+)
+
+GENERACION = "usuarios"
+
+Clave = Tuple[str, str]
+
+
+class CacheUsuarios:
+    """Usuarios activos de una base de datos (copias desligadas de la sesión)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[Clave, Tuple[object, float]]" = OrderedDict()
+        self._por_usuario: Dict[int, Set[Clave]] = {}
+        self._generacion: Optional[int] = None
+        self._revisada_en = 0.0
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, session: Session, username: str, token: str):
+        """Devuelve el usuario ligado a ``session`` o None si no está cacheado"""
+        self._revisar_generacion(session)
+        clave = (username, token)
+
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None or entrada[1] <= time.monotonic():
+                if entrada is not None:
+                    self._quitar(clave)
+                self.fallos += 1
+                return None
+
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            copia = entrada[0]
+
+        # merge sin load: reutiliza la copia sin emitir SQL
+        return session.merge(copia, load=False)
+
+    def guardar(self, username: str, token: str, usuario) -> None:
+        ajustes = obtener_ajustes()
+        copia = type(usuario)(**usuario.model_dump())
+        make_transient_to_detached(copia)
+
+        clave = (username, token)
+        expira_en = time.monotonic() + ajustes.USUARIOS_CACHE_TTL_SEGUNDOS
+
+        with self._lock:
+            self._quitar(clave)
+            self._entradas[clave] = (copia, expira_en)
+            self._por_usuario.setdefault(usuario.id, set()).add(clave)
+
+            while len(self._entradas) > ajustes.USUARIOS_CACHE_MAXIMO:
+                self._quitar(next(iter(self._entradas)))
+
+    def expulsar(self, usuario_id: int) -> None:
+        """Quita todas las entradas (todos los tokens) de un usuario"""
+        with self._lock:
+            for clave in list(self._por_usuario.get(usuario_id, ())):
+                self._quitar(clave)
+
+    def vaciar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self._por_usuario.clear()
+
+    def estadisticas(self) -> dict:
+        consultas = self.aciertos + self.fallos
+        return {
+            "entradas": len(self._entradas),
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else 0.0,
+        }
+
+    def _quitar(self, clave: Clave) -> None:
+        entrada = self._entradas.pop(clave, None)
+        if entrada is None:
+            return
+        claves = self._por_usuario.get(entrada[0].id)
+        if claves is not None:
+            claves.discard(clave)
+            if not claves:
+                del self._por_usuario[entrada[0].id]
+
+    def _revisar_generacion(self, session: Session) -> None:
+        intervalo = obtener_ajustes().USUARIOS_REVISION_SEGUNDOS
+        if time.monotonic() - self._revisada_en < intervalo:
+            return
+
+        generacion = leer_generacion(session, GENERACION)
+        with self._lock:
+            if self._generacion is not None and generacion != self._generacion:
+                self._entradas.clear()
+                self._por_usuario.clear()
+            self._generacion = generacion
+            self._revisada_en = time.monotonic()
+
+
+caches = CachePorMotor(CacheUsuarios)
+
+
+def cache_para(session: Session) -> CacheUsuarios:
+    return caches.para_sesion(session)
+
+
+def invalidar_usuario(session: Session, usuario_id: int) -> None:
+    """
+    Expulsa a un usuario de la cache (llamar antes del commit que lo modifica).
+
+    Se expulsa ya y otra vez tras el commit, por si una petición concurrente
+    volvió a cachear los datos anteriores mientras tanto.
+    """
+    cache = caches.para(motor_de(session))
+    cache.expulsar(usuario_id)
+    incrementar_generacion(session, GENERACION)
+    al_confirmar(session, lambda: cache.expulsar(usuario_id))
+
+
+def estadisticas_cache_usuarios() -> dict:
+    """Aciertos/fallos sumados de todas las BD (para dimensionar la cache)"""
+    total = {"entradas": 0, "aciertos": 0, "fallos": 0}
+    for cache in caches.todas():
+        for campo, valor in cache.estadisticas().items():
+            if campo in total:
+                total[campo] += valor
+    consultas = total["aciertos"] + total["fallos"]
+    total["tasa_aciertos"] = round(total["aciertos"] / consultas, 4) if consultas else 0.0
+    total["capacidad"] = obtener_ajustes().USUARIOS_CACHE_MAXIMO
+    return total
@@ -0,0 +1,23 @@
+"""
+💤 IMPORTACIONES DIFERIDAS - ELCAFESIN
+Dependencias pesadas que se importan en su primer uso y no al cargar la
+app, para que ``import main`` (cada worker, cada recarga, cada script) no
+las pague:
+
+- ``jose.jwt``: trae el backend de cryptography (~50 ms); se usa al crear o
+  validar el primer token (configuracion/seguridad.py)
+
+Con ``PRECARGAR_DIFERIDOS`` el lifespan las importa antes de aceptar
+peticiones y el primer login no paga ese costo.
+
+Para diferir otra: importarla dentro de la función que la usa y agregarla
+aquí; ``tests/test_importacion.py`` falla si alguna se carga con la app.
+"""
+import importlib
+
+DIFERIDOS = ("jose.jwt",)
+
+
+def precargar_diferidos() -> None:
+    for modulo in DIFERIDOS:
+        importlib.import_module(modulo)
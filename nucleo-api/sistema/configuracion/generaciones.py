@@ -0,0 +1,93 @@
+"""
+🔁 GENERACIONES Y CACHES POR MOTOR - ELCAFESIN
+Piezas comunes para las caches en memoria:
+
+- Contador de generación en la tabla ``generacion_cache``: quien modifica
+  datos cacheados lo incrementa en la misma transacción; los demás workers
+  lo consultan cada pocos segundos y recargan si cambió.
+- ``al_confirmar``: ejecuta una función solo si la transacción hace commit.
+- ``CachePorMotor``: una instancia de cache por engine (cada BD, incluidas
+  las BD en memoria de los tests, tiene su propia cache).
+"""
+import threading
+import weakref
+from typing import Callable, Generic, TypeVar, Union
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+T = TypeVar("T")
+
+_SQL_LEER = text("SELECT valor FROM generacion_cache WHERE nombre = :nombre")
+_SQL_INCREMENTAR = text(
+    "INSERT INTO generacion_cache (nombre, valor) VALUES (:nombre, 1) "
+    "ON CONFLICT (nombre) DO UPDATE SET valor = generacion_cache.valor + 1"
+)
+
+_CLAVE_PENDIENTES = "_al_confirmar"
+
+
+def _conexion(origen: Union[Session, Connection]) -> Connection:
+    return origen.connection() if isinstance(origen, Session) else origen
+
+
+def leer_generacion(origen: Union[Session, Connection], nombre: str) -> int:
+    """Lee el contador ``nombre`` (0 si nunca se ha incrementado)"""
+    valor = _conexion(origen).execute(_SQL_LEER, {"nombre": nombre}).scalar()
+    return valor or 0
+
+
+def incrementar_generacion(origen: Union[Session, Connection], nombre: str) -> None:
+    """Incrementa el contador dentro de la transacción en curso"""
+    _conexion(origen).execute(_SQL_INCREMENTAR, {"nombre": nombre})
+
+
+def motor_de(session: Session) -> Engine:
+    """Engine al que está ligada una sesión"""
+    bind = session.get_bind()
+    return bind.engine if isinstance(bind, Connection) else bind
+
+
+# ==================== CALLBACKS POST-COMMIT ====================
+
+def al_confirmar(session: Session, funcion: Callable[[], None]) -> None:
+    """Programa ``funcion`` para después del próximo commit de la sesión"""
+    session.info.setdefault(_CLAVE_PENDIENTES, []).append(funcion)
+
+
+@event.listens_for(Session, "after_commit")
+def _ejecutar_pendientes(session: Session) -> None:
+    for funcion in session.info.pop(_CLAVE_PENDIENTES, []):
+        funcion()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_pendientes(session: Session) -> None:
+    session.info.pop(_CLAVE_PENDIENTES, None)
+
+
+# ==================== CACHE POR MOTOR ====================
+
+class CachePorMotor(Generic[T]):
+    """Registro perezoso ``engine -> cache`` que no retiene engines descartados"""
+
+    def __init__(self, fabrica: Callable[[], T]):
+        self._fabrica = fabrica
+        self._instancias: "weakref.WeakKeyDictionary[Engine, T]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def para(self, engine: Engine) -> T:
+        instancia = self._instancias.get(engine)
+        if instancia is None:
+            with self._lock:
+                instancia = self._instancias.get(engine)
+                if instancia is None:
+                    instancia = self._instancias[engine] = self._fabrica()
+        return instancia
+
+    def para_sesion(self, session: Session) -> T:
+        return self.para(motor_de(session))
+
+    def todas(self):
+        return list(self._instancias.values())
@@ -0,0 +1,86 @@
+"""
+🧂 BCRYPT FUERA DEL WORKER - ELCAFESIN
+Pool de procesos dedicado a verificar/generar hashes de contraseñas.
+
+bcrypt es CPU puro: en un cambio de turno (todas las cajas haciendo login a
+la vez) satura el worker. Con el pool cada hash corre en otro proceso, sin
+competir por el GIL con las peticiones normales.
+
+- ``BCRYPT_PROCESOS``: tamaño del pool (None = núcleos disponibles,
+  0 = sin pool, se verifica en el propio hilo)
+- ``BCRYPT_ROUNDS`` / ``BCRYPT_REHASH``: costo de los hashes nuevos y si
+  se re-hashea al hacer login cuando el costo guardado es distinto
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import bcrypt
+
+from .ajustes import obtener_ajustes
+
+_pool: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def _tamano_pool() -> int:
+    procesos = obtener_ajustes().BCRYPT_PROCESOS
+    if procesos is None:
+        return os.cpu_count() or 1
+    return procesos
+
+
+def _obtener_pool() -> Optional[ProcessPoolExecutor]:
+    """Crea el pool la primera vez que se necesita (None si está desactivado)"""
+    global _pool
+    if _pool is None and _tamano_pool() > 0:
+        with _lock:
+            if _pool is None:
+                # spawn: no hereda conexiones de BD ni hilos del servidor
+                _pool = ProcessPoolExecutor(
+                    max_workers=_tamano_pool(),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+def cerrar_pool_hash() -> None:
+    """Apaga el pool (al cerrar la aplicación)"""
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def _ejecutar(funcion, *args):
+    pool = _obtener_pool()
+    if pool is None:
+        return funcion(*args)
+    return pool.submit(funcion, *args).result()
+
+
+def verificar_password_pool(password_plano: str, password_hash: str) -> bool:
+    """Como verificar_password, pero el cálculo corre en el pool de procesos"""
+    return _ejecutar(bcrypt.checkpw, password_plano.encode("utf-8"), password_hash.encode("utf-8"))
+
+
+def hash_password_pool(password: str) -> str:
+    """Como hash_password, pero el cálculo corre en el pool de procesos"""
+    salt = bcrypt.gensalt(rounds=obtener_ajustes().BCRYPT_ROUNDS)
+    return _ejecutar(bcrypt.hashpw, password.encode("utf-8"), salt).decode("utf-8")
+
+
+def costo_hash(password_hash: str) -> Optional[int]:
+    """Factor de costo de un hash bcrypt ("$2b$12$..." -> 12)"""
+    try:
+        return int(password_hash.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def necesita_rehash(password_hash: str) -> bool:
+    ajustes = obtener_ajustes()
+    return ajustes.BCRYPT_REHASH and costo_hash(password_hash) != ajustes.BCRYPT_ROUNDS
@@ -0,0 +1,63 @@
+"""
+🚦 LÍMITES DE CONCURRENCIA - ELCAFESIN
+Cuántas operaciones simultáneas se permiten por clave (username, IP...).
+
+No encola: si la clave ya está en su límite se responde 429 al instante,
+así una ráfaga de logins fallidos no acapara el pool de bcrypt.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+from fastapi import HTTPException, status
+
+
+class LimitadorConcurrencia:
+    """Contador de operaciones en curso por clave"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._en_curso: Dict[Tuple[str, str], int] = {}
+        self.rechazos = 0
+
+    @contextmanager
+    def reservar(self, limites: List[Tuple[str, str, int]]) -> Iterator[None]:
+        """
+        Reserva un cupo en cada ``(tipo, clave, límite)`` o ninguno.
+
+        Raises:
+            HTTPException 429: Alguna clave ya está en su límite
+        """
+        claves = [(tipo, clave) for tipo, clave, _ in limites]
+
+        with self._lock:
+            for tipo, clave, limite in limites:
+                if limite > 0 and self._en_curso.get((tipo, clave), 0) >= limite:
+                    self.rechazos += 1
+                    raise HTTPException(
+                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                        detail=f"Demasiados intentos simultáneos por {tipo}, reintenta en un momento",
+                        headers={"Retry-After": "1"},
+                    )
+            for clave in claves:
+                self._en_curso[clave] = self._en_curso.get(clave, 0) + 1
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                for clave in claves:
+                    restantes = self._en_curso[clave] - 1
+                    if restantes:
+                        self._en_curso[clave] = restantes
+                    else:
+                        del self._en_curso[clave]
+
+    def en_curso(self, tipo: str) -> int:
+        """Operaciones en curso sumando todas las claves de un tipo"""
+        with self._lock:
+            return sum(n for (t, _), n in self._en_curso.items() if t == tipo)
+
+
+# Logins en curso por username / por IP
+limitador_login = LimitadorConcurrencia()
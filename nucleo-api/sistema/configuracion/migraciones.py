@@ -0,0 +1,225 @@
+"""
+🧱 MIGRACIONES DE ESQUEMA - ELCAFESIN
+``create_all`` solo crea tablas que no existen; los cambios a tablas ya
+creadas (columnas, índices) van aquí como migraciones numeradas que se
+aplican al arrancar (``crear_tablas``).
+
+- Cada migración corre en su propia transacción junto con su fila en
+  ``esquema_version``. La fila se inserta primero (``ON CONFLICT DO
+  NOTHING``): si dos workers arrancan a la vez, el segundo espera el lock de
+  escritura y ve que ya está aplicada.
+- Los pasos son idempotentes (``IF NOT EXISTS``, revisión de columnas), así
+  que una BD recién creada con ``create_all`` pasa por todas sin cambios.
+- Una migración aplicada no se edita: los cambios nuevos van en una nueva.
+
+Huella de arranque: al terminar un arranque completo (tablas, migraciones y
+datos iniciales) se guarda ``esquema N · modelo <hash> · semilla M``. Si al
+arrancar la huella guardada coincide con la del código, no hay nada que
+hacer y se omite todo lo anterior (una sola consulta). Cambiar un modelo,
+agregar una migración o subir la versión de la semilla cambia la huella.
+"""
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, List, Optional, Sequence, Set
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import CreateColumn, CreateTable
+from sqlmodel import SQLModel
+
+from sistema.entidades.esquema import VersionEsquema
+
+_SQL_REGISTRAR = text(
+    "INSERT INTO esquema_version (version, descripcion, aplicada_en) "
+    "VALUES (:version, :descripcion, :aplicada_en) ON CONFLICT (version) DO NOTHING"
+)
+_SQL_LEER_HUELLA = text("SELECT valor FROM huella_arranque WHERE clave = 'arranque'")
+_SQL_GUARDAR_HUELLA = text(
+    "INSERT INTO huella_arranque (clave, valor, actualizado_en) "
+    "VALUES ('arranque', :valor, :ahora) "
+    "ON CONFLICT (clave) DO UPDATE SET valor = excluded.valor, actualizado_en = excluded.actualizado_en"
+)
+
+
+@dataclass(frozen=True)
+class Migracion:
+    version: int
+    descripcion: str
+    aplicar: Callable[[Connection], None]
+
+
+def _sql(*sentencias: str) -> Callable[[Connection], None]:
+    def aplicar(conexion: Connection) -> None:
+        for sentencia in sentencias:
+            conexion.exec_driver_sql(sentencia)
+    return aplicar
+
+
+# ==================== SINCRONIZACIÓN CON LOS MODELOS ====================
+
+def _reconstruir_tabla(conexion: Connection, tabla, columnas_actuales) -> None:
+    """
+    Recrea ``tabla`` con la definición del modelo conservando los datos
+    (SQLite no permite quitar un NOT NULL con ALTER TABLE)
+    """
+    temporal = f"{tabla.name}__nueva"
+    ddl = str(CreateTable(tabla).compile(dialect=conexion.dialect))
+    conexion.exec_driver_sql(
+        ddl.replace(f"CREATE TABLE {tabla.name} ", f"CREATE TABLE {temporal} ", 1)
+    )
+    comunes = ", ".join(c.name for c in tabla.columns if c.name in columnas_actuales)
+    conexion.exec_driver_sql(
+        f"INSERT INTO {temporal} ({comunes}) SELECT {comunes} FROM {tabla.name}"
+    )
+    conexion.exec_driver_sql(f"DROP TABLE {tabla.name}")
+    conexion.exec_driver_sql(f"ALTER TABLE {temporal} RENAME TO {tabla.name}")
+
+
+def sincronizar_columnas(conexion: Connection) -> list:
+    """
+    Ajusta tablas existentes a los modelos: agrega columnas nuevas (nullable)
+    y recrea la tabla si una columna dejó de ser obligatoria. Devuelve las
+    tablas modificadas.
+    """
+    inspector = inspect(conexion)
+    modificadas = []
+    for tabla in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(tabla.name):
+            continue
+        actuales = {c["name"]: c for c in inspector.get_columns(tabla.name)}
+        relajadas = [
+            c for c in tabla.columns
+            if c.name in actuales and c.nullable and not actuales[c.name]["nullable"]
+            and not c.primary_key
+        ]
+        faltantes = [c for c in tabla.columns if c.name not in actuales]
+
+        if relajadas:
+            _reconstruir_tabla(conexion, tabla, actuales)
+        else:
+            for columna in faltantes:
+                conexion.exec_driver_sql(
+                    f"ALTER TABLE {tabla.name} ADD COLUMN "
+                    f"{CreateColumn(columna).compile(dialect=conexion.dialect)}"
+                )
+        if relajadas or faltantes:
+            modificadas.append(tabla.name)
+    return modificadas
+
+
+def _esquema_base(conexion: Connection) -> None:
+    """
+    Lo que hacía ``crear_tablas`` antes de versionar: columnas e índices del
+    modelo. Los índices únicos quedan para migraciones que primero limpien
+    los datos que los violarían.
+    """
+    sincronizar_columnas(conexion)
+    for tabla in SQLModel.metadata.sorted_tables:
+        for indice in tabla.indexes:
+            if not indice.unique:
+                indice.create(bind=conexion, checkfirst=True)
+
+
+# ==================== MIGRACIONES ====================
+
+MIGRACIONES: Sequence[Migracion] = (
+    Migracion(1, "Columnas e índices del modelo previos al control de versiones", _esquema_base),
+    Migracion(
+        2, "Índices compuestos y de cobertura para ventas y permisos",
+        _sql(
+            # Listado de ventas por sucursal ordenado por fecha
+            "CREATE INDEX IF NOT EXISTS ix_venta_sucursal_creado_en ON venta (sucursal, creado_en)",
+            # Reportes por rango: cubre creado_en, sucursal y total; reemplaza
+            # al índice simple de creado_en (es su prefijo)
+            "CREATE INDEX IF NOT EXISTS ix_venta_creado_en_sucursal_total "
+            "ON venta (creado_en, sucursal, total)",
+            "DROP INDEX IF EXISTS ix_venta_creado_en",
+            # Búsqueda exacta de un permiso (alta, baja, verificación)
+            "CREATE INDEX IF NOT EXISTS ix_permiso_rol_rol_recurso_accion "
+            "ON permiso_rol (rol, recurso, accion)",
+            "DROP INDEX IF EXISTS ix_permiso_rol_rol",
+            "CREATE INDEX IF NOT EXISTS ix_usuario_permiso_usuario_recurso_accion "
+            "ON usuario_permiso (usuario_id, recurso, accion)",
+            "DROP INDEX IF EXISTS ix_usuario_permiso_usuario_id",
+        ),
+    ),
+    Migracion(
+        3, "Permisos de rol únicos por (rol, recurso, accion)",
+        _sql(
+            # Los datos iniciales se insertan con ON CONFLICT DO NOTHING
+            "DELETE FROM permiso_rol WHERE id NOT IN "
+            "(SELECT min(id) FROM permiso_rol GROUP BY rol, recurso, accion)",
+            "DROP INDEX IF EXISTS ix_permiso_rol_rol_recurso_accion",
+            "CREATE UNIQUE INDEX ix_permiso_rol_rol_recurso_accion "
+            "ON permiso_rol (rol, recurso, accion)",
+        ),
+    ),
+)
+
+
+def versiones_aplicadas(conexion: Connection) -> Set[int]:
+    if not inspect(conexion).has_table(VersionEsquema.__tablename__):
+        return set()
+    return set(conexion.exec_driver_sql("SELECT version FROM esquema_version").scalars())
+
+
+def migrar(engine: Engine, migraciones: Sequence[Migracion] = MIGRACIONES) -> List[Migracion]:
+    """Aplica las migraciones pendientes en orden; devuelve las aplicadas"""
+    with engine.begin() as conexion:
+        VersionEsquema.__table__.create(conexion, checkfirst=True)
+        pendientes = [
+            m for m in sorted(migraciones, key=lambda m: m.version)
+            if m.version not in versiones_aplicadas(conexion)
+        ]
+
+    aplicadas = []
+    for migracion in pendientes:
+        with engine.begin() as conexion:
+            reclamada = conexion.execute(_SQL_REGISTRAR, {
+                "version": migracion.version,
+                "descripcion": migracion.descripcion,
+                "aplicada_en": datetime.utcnow(),
+            }).rowcount
+            if not reclamada:
+                continue  # Otro worker la aplicó mientras tanto
+            migracion.aplicar(conexion)
+        aplicadas.append(migracion)
+    return aplicadas
+
+
+# ==================== HUELLA DE ARRANQUE ====================
+
+@lru_cache(maxsize=1)
+def huella_modelo() -> str:
+    """Hash corto de tablas, columnas e índices declarados en los modelos"""
+    partes = []
+    for tabla in sorted(SQLModel.metadata.sorted_tables, key=lambda t: t.name):
+        partes.append(tabla.name)
+        partes.extend(
+            f"{c.name}:{c.type}:{c.nullable}:{c.primary_key}" for c in tabla.columns
+        )
+        partes.extend(sorted(
+            f"{i.name}:{','.join(c.name for c in i.columns)}:{i.unique}" for i in tabla.indexes
+        ))
+    return hashlib.sha1("\n".join(partes).encode()).hexdigest()[:12]
+
+
+def huella_arranque(version_semilla: int) -> str:
+    return f"esquema {MIGRACIONES[-1].version} · modelo {huella_modelo()} · semilla {version_semilla}"
+
+
+def leer_huella(engine: Engine) -> Optional[str]:
+    """Huella guardada (None si la BD nunca terminó un arranque completo)"""
+    try:
+        with engine.connect() as conexion:
+            return conexion.execute(_SQL_LEER_HUELLA).scalar()
+    except OperationalError:
+        return None  # BD nueva o anterior a la tabla de huella
+
+
+def guardar_huella(engine: Engine, valor: str) -> None:
+    with engine.begin() as conexion:
+        conexion.execute(_SQL_GUARDAR_HUELLA, {"valor": valor, "ahora": datetime.utcnow()})
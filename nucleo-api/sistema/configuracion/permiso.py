@@ -0,0 +1,152 @@
+"""
+🧮 MATRIZ DE PERMISOS COMPILADA - ELCAFESIN
+Carga ``permiso_rol`` y ``usuario_permiso`` una vez y resuelve cada
+verificación en memoria (cero consultas por petición).
+
+Invalidación:
+- Cualquier flush que cree, edite o borre un PermisoRol/UsuarioPermiso
+  incrementa la generación "permisos" en la misma transacción y, tras el
+  commit, marca la matriz local como sucia.
+- Los otros workers leen esa generación como máximo cada
+  ``PERMISOS_REVISION_SEGUNDOS`` y recargan si cambió.
+"""
+import threading
+import time
+from enum import Enum
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlmodel import select
+
+from .ajustes import obtener_ajustes
+from .generaciones import (
+    CachePorMotor, al_confirmar, incrementar_generacion, leer_generacion, motor_de
+)
+
+GENERACION = "permisos"
+
+ClaveRol = Tuple[str, str, str]
+ClaveUsuario = Tuple[int, str, str]
+
+
+def _valor(dato) -> str:
+    return dato.value if isinstance(dato, Enum) else str(dato)
+
+
+def normalizar_accion(accion) -> str:
+    """Acepta Accion, su valor ("ver") o su nombre ("VER")"""
+    from sistema.entidades.permiso import Accion
+
+    valor = _valor(accion)
+    if valor.upper() in Accion.__members__:
+        return Accion[valor.upper()].value
+    return valor.lower()
+
+
+class MatrizPermisos:
+    """Permisos por rol + excepciones por usuario de una base de datos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._roles: FrozenSet[ClaveRol] = frozenset()
+        self._usuarios: Dict[ClaveUsuario, bool] = {}
+        self._generacion: Optional[int] = None
+        self._sucia = True
+        self._revisada_en = 0.0
+        self.recargas = 0
+
+    def invalidar(self) -> None:
+        self._sucia = True
+
+    def permitido(self, session: Session, usuario_id: int, rol, recurso: str, accion) -> bool:
+        """
+        Prioridad: UsuarioPermiso > PermisoRol (igual que la consulta original)
+        """
+        self._asegurar_vigente(session)
+        accion = normalizar_accion(accion)
+
+        excepcion = self._usuarios.get((usuario_id, recurso, accion))
+        if excepcion is not None:
+            return excepcion
+
+        return (_valor(rol), recurso, accion) in self._roles
+
+    def _asegurar_vigente(self, session: Session) -> None:
+        if not self._sucia:
+            intervalo = obtener_ajustes().PERMISOS_REVISION_SEGUNDOS
+            if time.monotonic() - self._revisada_en < intervalo:
+                return
+
+        with self._lock:
+            if self._sucia:
+                self._recargar(session)
+                return
+
+            if time.monotonic() - self._revisada_en < obtener_ajustes().PERMISOS_REVISION_SEGUNDOS:
+                return
+
+            if leer_generacion(session, GENERACION) != self._generacion:
+                self._recargar(session)
+            else:
+                self._revisada_en = time.monotonic()
+
+    def _recargar(self, session: Session) -> None:
+        from sistema.entidades.permiso import PermisoRol, UsuarioPermiso
+
+        # Marcar limpia antes de leer: una invalidación concurrente no se pierde
+        self._sucia = False
+        generacion = leer_generacion(session, GENERACION)
+
+        roles = frozenset(
+            (_valor(rol), recurso, normalizar_accion(accion))
+            for rol, recurso, accion in session.execute(
+                select(PermisoRol.rol, PermisoRol.recurso, PermisoRol.accion)
+            )
+        )
+        usuarios = {
+            (usuario_id, recurso, normalizar_accion(accion)): bool(permitido)
+            for usuario_id, recurso, accion, permitido in session.execute(
+                select(
+                    UsuarioPermiso.usuario_id, UsuarioPermiso.recurso,
+                    UsuarioPermiso.accion, UsuarioPermiso.permitido,
+                )
+            )
+        }
+
+        self._roles, self._usuarios = roles, usuarios
+        self._generacion = generacion
+        self._revisada_en = time.monotonic()
+        self.recargas += 1
+
+
+matrices = CachePorMotor(MatrizPermisos)
+
+
+def matriz_para(session: Session) -> MatrizPermisos:
+    return matrices.para_sesion(session)
+
+
+def notificar_cambio_permisos(session: Session) -> None:
+    """
+    Registra un cambio de permisos en la transacción en curso.
+
+    Lo llama automáticamente el hook de flush; úsese a mano solo para
+    escrituras que no pasan por el ORM (INSERT/DELETE masivos).
+    """
+    incrementar_generacion(session, GENERACION)
+    matriz = matrices.para(motor_de(session))
+    al_confirmar(session, matriz.invalidar)
+
+
+@event.listens_for(Session, "after_flush")
+def _detectar_cambios_permisos(session: Session, contexto) -> None:
+    from sistema.entidades.permiso import PermisoRol, UsuarioPermiso
+
+    tipos = (PermisoRol, UsuarioPermiso)
+    if any(
+        isinstance(obj, tipos)
+        for coleccion in (session.new, session.dirty, session.deleted)
+        for obj in coleccion
+    ):
+        notificar_cambio_permisos(session)
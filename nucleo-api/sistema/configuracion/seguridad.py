@@ -5,13 +5,14 @@ JWT, hashing de passwords, y sistema de permisos
 from datetime import datetime, timedelta
 from typing import Optional, List
 import bcrypt
-from jose import jwt, JWTError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlmodel import Session, select
 
 from .ajustes import obtener_ajustes
 from .base_datos import obtener_sesion
+from .cache_usuarios import cache_para
+from .permiso import matriz_para
 
 # Esquema OAuth2 (para el token Bearer)
 esquema_oauth2 = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -25,7 +26,7 @@ def hash_password(password: str) -> str:
     """Hashea una contraseña usando bcrypt"""
     # Convertir a bytes y hashear
     password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=ajustes.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
@@ -48,6 +49,8 @@ def crear_token(username: str, expires_delta: Optional[timedelta] = None, extra_
         expires_delta: Tiempo de expiración (por defecto usa configuración)
         extra_data: Datos adicionales a incluir en el token (ej: rol)
     """
+    from jose import jwt  # Diferido: arrastra cryptography (ver diferidos.py)
+    
     to_encode = {"sub": username}
     
     if extra_data:
@@ -71,6 +74,8 @@ def decodificar_token(token: str) -> dict:
     Raises:
         HTTPException: Si el token es inválido o expiró
     """
+    from jose import JWTError, jwt
+    
     try:
         payload = jwt.decode(token, ajustes.SECRET_KEY, algorithms=[ajustes.ALGORITHM])
         username: str = payload.get("sub")
@@ -91,7 +96,7 @@ def decodificar_token(token: str) -> dict:
 
 # ==================== OBTENER USUARIO ACTUAL ====================
 
-async def obtener_usuario_actual(
+def obtener_usuario_actual(
     token: str = Depends(esquema_oauth2),
     session: Session = Depends(obtener_sesion)
 ):
@@ -100,6 +105,9 @@ async def obtener_usuario_actual(
     
     Uso en endpoints:
         usuario_actual: Usuario = Depends(obtener_usuario_actual)
+    
+    Es síncrona a propósito: usa una Session síncrona, así que FastAPI la
+    ejecuta en su threadpool y la consulta no bloquea el event loop.
     """
     # Importación diferida para evitar imports circulares
     from sistema.entidades.usuario import Usuario
@@ -107,6 +115,12 @@ async def obtener_usuario_actual(
     payload = decodificar_token(token)
     username = payload.get("sub")
     
+    # Cache de usuarios activos (se invalida al editar/desactivar)
+    cache = cache_para(session)
+    usuario = cache.obtener(session, username, token)
+    if usuario is not None:
+        return usuario
+    
     # Buscar usuario en BD
     usuario = session.exec(
         select(Usuario).where(Usuario.username == username)
@@ -124,6 +138,7 @@ async def obtener_usuario_actual(
             detail="Usuario inactivo"
         )
     
+    cache.guardar(username, token, usuario)
     return usuario
 
 
@@ -136,6 +151,7 @@ def requiere_roles(roles_permitidos: List[str]):
     Uso:
         @router.get("/admin", dependencies=[Depends(requiere_roles(["ADMIN", "DUENO"]))])
     """
+    # async a propósito: solo compara en memoria, no necesita el threadpool
     async def verificar_rol(usuario_actual = Depends(obtener_usuario_actual)):
         if usuario_actual.rol not in roles_permitidos:
             raise HTTPException(
@@ -153,44 +169,20 @@ def requiere_permiso(recurso: str, accion: str):
     """
     Dependency factory: Verifica que el usuario tenga un permiso específico
     
+    Prioridad: UsuarioPermiso > PermisoRol (ver configuracion/permiso.py)
+    Síncrona por el mismo motivo que obtener_usuario_actual.
+    
     Uso:
         @router.post("/ventas", dependencies=[Depends(requiere_permiso("ventas", "crear"))])
     """
-    async def verificar_permiso(
+    def verificar_permiso(
         usuario_actual = Depends(obtener_usuario_actual),
         session: Session = Depends(obtener_sesion)
     ):
-        # Importaciones diferidas
-        from sistema.entidades.permiso import PermisoRol, UsuarioPermiso
-        
-        # 1. Verificar si hay excepción específica para este usuario
-        permiso_usuario = session.exec(
-            select(UsuarioPermiso).where(
-                UsuarioPermiso.usuario_id == usuario_actual.id,
-                UsuarioPermiso.recurso == recurso,
-                UsuarioPermiso.accion == accion
-            )
-        ).first()
-        
-        if permiso_usuario:
-            # Si existe excepción, usarla
-            if not permiso_usuario.permitido:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail=f"Permiso denegado: {recurso}.{accion}"
-                )
-            return usuario_actual
-        
-        # 2. Si no hay excepción, verificar permisos del rol
-        permiso_rol = session.exec(
-            select(PermisoRol).where(
-                PermisoRol.rol == usuario_actual.rol,
-                PermisoRol.recurso == recurso,
-                PermisoRol.accion == accion
-            )
-        ).first()
+        # Matriz compilada en memoria: sin consultas salvo al recargar
+        matriz = matriz_para(session)
         
-        if not permiso_rol:
+        if not matriz.permitido(session, usuario_actual.id, usuario_actual.rol, recurso, accion):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Permiso denegado: {recurso}.{accion}"
@@ -0,0 +1,160 @@
+"""
+🔎 SENTENCIAS SQL POR PETICIÓN - ELCAFESIN
+Cuenta las sentencias y el tiempo de BD de cada petición HTTP y detecta
+formas repetidas (probable N+1: la misma consulta una vez por fila).
+
+- ``MedidorSQL`` (middleware ASGI) abre una ``MedicionSQL`` por petición en
+  un ContextVar. Los eventos de SQLAlchemy, registrados en la clase Engine
+  para cubrir cualquier motor, la van sumando. Los endpoints y dependencias
+  síncronos corren en el threadpool con una copia del contexto, así que ven
+  la misma medición. Hilos de fondo y scripts no tienen medición.
+- Forma = texto SQL con las listas ``IN (?, ?, ...)`` colapsadas. Una forma
+  que se repite ``SQL_N1_UMBRAL`` veces o más en la misma petición se
+  reporta.
+- Con ``DEBUG_SQL`` la respuesta lleva ``X-SQL-Sentencias``,
+  ``X-SQL-Tiempo-Ms`` y ``X-SQL-Repetidas``, y cada forma repetida queda
+  como warning en el log.
+- La espera por una conexión del pool (``PoolMedido`` en base_datos) se
+  suma a la medición de la petición que la pidió.
+- ``observar_peticiones`` recibe cada medición al terminar la petición. Lo
+  usan las métricas (servicios/metricas.py) y las pruebas (fixture
+  ``sentencias_por_peticion``).
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from .ajustes import obtener_ajustes
+
+logger = logging.getLogger(__name__)
+
+_LISTA_PARAMETROS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ESPACIOS = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def forma_sentencia(sentencia: str) -> str:
+    """Texto SQL normalizado: espacios y listas de parámetros colapsados"""
+    return _LISTA_PARAMETROS.sub("(?)", _ESPACIOS.sub(" ", sentencia).strip())
+
+
+@dataclass
+class MedicionSQL:
+    ruta: str = ""
+    sentencias: int = 0
+    segundos: float = 0.0
+    espera_pool: float = 0.0
+    por_texto: Counter = field(default_factory=Counter)
+
+    def repetidas(self, umbral: Optional[int] = None) -> Dict[str, int]:
+        """Formas ejecutadas ``umbral`` veces o más (probable N+1)"""
+        umbral = umbral or obtener_ajustes().SQL_N1_UMBRAL
+        formas: Counter = Counter()
+        for sentencia, veces in self.por_texto.items():
+            formas[forma_sentencia(sentencia)] += veces
+        return {forma: veces for forma, veces in formas.most_common() if veces >= umbral}
+
+
+_medicion_actual: ContextVar[Optional[MedicionSQL]] = ContextVar("medicion_sql", default=None)
+_observadores: List[Callable[[MedicionSQL], None]] = []
+
+
+# ==================== EVENTOS DE SQLALCHEMY ====================
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes(conexion, cursor, sentencia, parametros, contexto, varios):
+    medicion = _medicion_actual.get()
+    if medicion is not None:
+        medicion.sentencias += 1
+        medicion.por_texto[sentencia] += 1
+        if contexto is not None:
+            contexto._sql_inicio = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _despues(conexion, cursor, sentencia, parametros, contexto, varios):
+    medicion = _medicion_actual.get()
+    inicio = getattr(contexto, "_sql_inicio", None)
+    if medicion is not None and inicio is not None:
+        medicion.segundos += time.perf_counter() - inicio
+
+
+def registrar_espera_pool(segundos: float) -> None:
+    medicion = _medicion_actual.get()
+    if medicion is not None:
+        medicion.espera_pool += segundos
+
+
+@contextmanager
+def medir_sql(ruta: str = "") -> Iterator[MedicionSQL]:
+    """Mide las sentencias del bloque (fuera de una petición: pruebas, scripts)"""
+    medicion = MedicionSQL(ruta=ruta)
+    token = _medicion_actual.set(medicion)
+    try:
+        yield medicion
+    finally:
+        _medicion_actual.reset(token)
+
+
+def observar_peticiones(funcion: Callable[[MedicionSQL], None]) -> None:
+    _observadores.append(funcion)
+
+
+def dejar_de_observar(funcion: Callable[[MedicionSQL], None]) -> None:
+    _observadores.remove(funcion)
+
+
+# ==================== MIDDLEWARE ====================
+
+def ruta_peticion(scope) -> str:
+    """
+    Método y plantilla de la ruta (``GET /ventas/{venta_id}``). Sin match se
+    usa "(sin ruta)": un path arbitrario no debe volverse una etiqueta.
+    """
+    ruta = scope.get("route")
+    return f"{scope['method']} {getattr(ruta, 'path', '(sin ruta)')}"
+
+
+class MedidorSQL:
+    """Middleware ASGI: una MedicionSQL por petición HTTP"""
+
+    def __init__(self, app, debug: Optional[bool] = None, umbral: Optional[int] = None):
+        ajustes = obtener_ajustes()
+        self.app = app
+        self.debug = ajustes.DEBUG_SQL if debug is None else debug
+        self.umbral = umbral or ajustes.SQL_N1_UMBRAL
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with medir_sql() as medicion:
+            async def enviar(mensaje):
+                if self.debug and mensaje["type"] == "http.response.start":
+                    self._reportar(scope, medicion, MutableHeaders(scope=mensaje))
+                await send(mensaje)
+
+            await self.app(scope, receive, enviar)
+
+        medicion.ruta = ruta_peticion(scope)
+        for funcion in _observadores:
+            funcion(medicion)
+
+    def _reportar(self, scope, medicion: MedicionSQL, headers: MutableHeaders) -> None:
+        repetidas = medicion.repetidas(self.umbral)
+        headers["X-SQL-Sentencias"] = str(medicion.sentencias)
+        headers["X-SQL-Tiempo-Ms"] = f"{medicion.segundos * 1000:.2f}"
+        headers["X-SQL-Repetidas"] = str(len(repetidas))
+        for forma, veces in repetidas.items():
+            logger.warning("Probable N+1 en %s: %d × %s", ruta_peticion(scope), veces, forma)
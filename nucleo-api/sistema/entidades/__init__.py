@@ -5,8 +5,11 @@ from .proveedor import Proveedor
 from .ingrediente import Ingrediente
 from .receta import Receta, RecetaItem
 from .venta import Venta, VentaItem
+from .venta_diaria import VentaDiaria, VentaDiariaReceta, VentaHora, VentaHoraReceta
 from .movimiento import Movimiento, TipoMovimiento
 from .log_sesion import LogSesion
+from .generacion import GeneracionCache
+from .esquema import VersionEsquema, HuellaArranque
 
 __all__ = [
     "Usuario", "Rol",
@@ -14,6 +17,9 @@ __all__ = [
     "Cliente", "Proveedor", "Ingrediente",
     "Receta", "RecetaItem",
     "Venta", "VentaItem",
+    "VentaDiaria", "VentaDiariaReceta", "VentaHora", "VentaHoraReceta",
     "Movimiento", "TipoMovimiento",
     "LogSesion",
+    "GeneracionCache",
+    "VersionEsquema", "HuellaArranque",
 ]
@@ -0,0 +1,25 @@
+"""
+🧱 VERSIÓN DEL ESQUEMA - ELCAFESIN
+Una fila por migración aplicada y la huella del último arranque completo
+(ver ``sistema.configuracion.migraciones``).
+"""
+from datetime import datetime
+
+from sqlmodel import SQLModel, Field
+
+
+class VersionEsquema(SQLModel, table=True):
+    __tablename__ = "esquema_version"
+
+    version: int = Field(primary_key=True)
+    descripcion: str = Field(max_length=200)
+    aplicada_en: datetime = Field(default_factory=datetime.utcnow)
+
+
+class HuellaArranque(SQLModel, table=True):
+    """Esquema + modelo + datos iniciales con los que ya se preparó la BD"""
+    __tablename__ = "huella_arranque"
+
+    clave: str = Field(primary_key=True, max_length=50)
+    valor: str = Field(max_length=200)
+    actualizado_en: datetime = Field(default_factory=datetime.utcnow)
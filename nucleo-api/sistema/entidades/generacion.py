@@ -0,0 +1,14 @@
+"""
+🔁 CONTADORES DE GENERACIÓN - ELCAFESIN
+Un contador por cache en memoria (permisos, usuarios...). Cada escritura que
+invalida una cache incrementa su contador; los workers lo consultan de vez en
+cuando para saber si deben recargar.
+"""
+from sqlmodel import SQLModel, Field
+
+
+class GeneracionCache(SQLModel, table=True):
+    __tablename__ = "generacion_cache"
+
+    nombre: str = Field(primary_key=True, max_length=50)
+    valor: int = Field(default=0)
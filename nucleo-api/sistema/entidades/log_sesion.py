@@ -10,4 +10,4 @@ class LogSesion(SQLModel, table=True):
     ip: Optional[str] = Field(default=None, max_length=45)
     user_agent: Optional[str] = Field(default=None, max_length=200)
     exito: bool = Field(default=True)
-    creado_en: datetime = Field(default_factory=datetime.utcnow)
+    creado_en: datetime = Field(default_factory=datetime.utcnow, index=True)
@@ -1,6 +1,7 @@
 from datetime import datetime
 from enum import Enum
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 
 class TipoMovimiento(str, Enum):
@@ -12,12 +13,14 @@ class TipoMovimiento(str, Enum):
 
 class Movimiento(SQLModel, table=True):
     __tablename__ = "movimiento"
+    # Kardex de un ingrediente: WHERE ingrediente_id = ? ORDER BY creado_en DESC
+    __table_args__ = (Index("ix_movimiento_ingrediente_creado_en", "ingrediente_id", "creado_en"),)
     id: Optional[int] = Field(default=None, primary_key=True)
     ingrediente_id: int = Field(foreign_key="ingrediente.id", index=True)
     tipo: TipoMovimiento = Field(default=TipoMovimiento.AJUSTE)
     cantidad: float
     referencia: str = Field(default="", max_length=200)
-    creado_en: datetime = Field(default_factory=datetime.utcnow)
+    creado_en: datetime = Field(default_factory=datetime.utcnow, index=True)
     
     class Config:
         use_enum_values = True
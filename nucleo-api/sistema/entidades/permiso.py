@@ -5,6 +5,7 @@ Sistema híbrido: permisos por rol + excepciones por usuario
 from datetime import datetime
 from enum import Enum
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 
 
@@ -25,9 +26,12 @@ class PermisoRol(SQLModel, table=True):
         - Rol ADMIN puede "editar" en recurso "usuarios"
     """
     __tablename__ = "permiso_rol"
+    __table_args__ = (
+        Index("ix_permiso_rol_rol_recurso_accion", "rol", "recurso", "accion", unique=True),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    rol: str = Field(index=True, max_length=20)  # "ADMIN", "VENDEDOR", etc.
+    rol: str = Field(max_length=20)  # "ADMIN", "VENDEDOR", etc.
     recurso: str = Field(index=True, max_length=50)  # "ventas", "inventario", etc.
     accion: Accion = Field(default=Accion.VER)
     creado_en: datetime = Field(default_factory=datetime.utcnow)
@@ -47,9 +51,12 @@ class UsuarioPermiso(SQLModel, table=True):
     Prioridad: UsuarioPermiso > PermisoRol
     """
     __tablename__ = "usuario_permiso"
+    __table_args__ = (
+        Index("ix_usuario_permiso_usuario_recurso_accion", "usuario_id", "recurso", "accion"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    usuario_id: int = Field(foreign_key="usuario.id", index=True)
+    usuario_id: int = Field(foreign_key="usuario.id")
     recurso: str = Field(index=True, max_length=50)
     accion: Accion = Field(default=Accion.VER)
     permitido: bool = Field(default=True)  # True = permitir, False = denegar
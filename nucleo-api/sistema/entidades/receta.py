@@ -15,6 +15,9 @@ class RecetaItem(SQLModel, table=True):
     __tablename__ = "receta_item"
     id: Optional[int] = Field(default=None, primary_key=True)
     receta_id: int = Field(foreign_key="receta.id", index=True)
-    ingrediente_id: int = Field(foreign_key="ingrediente.id", index=True)
+    # Exactamente uno de los dos: un ingrediente o una subreceta (preparación
+    # como jarabes o cold brew; cantidad en unidades de la subreceta)
+    ingrediente_id: Optional[int] = Field(default=None, foreign_key="ingrediente.id", index=True)
+    subreceta_id: Optional[int] = Field(default=None, foreign_key="receta.id", index=True)
     cantidad: float = Field(ge=0)
     merma: Optional[float] = Field(default=0.0, ge=0, le=1)
@@ -1,9 +1,17 @@
 from datetime import datetime
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 
 class Venta(SQLModel, table=True):
     __tablename__ = "venta"
+    __table_args__ = (
+        # Listado por sucursal: WHERE sucursal = ? ORDER BY creado_en DESC
+        Index("ix_venta_sucursal_creado_en", "sucursal", "creado_en"),
+        # Reportes por rango (y el listado sin filtro): cubre SUM(total) por
+        # fecha y sucursal sin leer la tabla
+        Index("ix_venta_creado_en_sucursal_total", "creado_en", "sucursal", "total"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     cliente_id: Optional[int] = Field(default=None, foreign_key="cliente.id")
     sucursal: Optional[str] = Field(default=None, max_length=50)
@@ -18,3 +26,5 @@ class VentaItem(SQLModel, table=True):
     cantidad: float = Field(default=1.0, ge=0)
     precio_unitario: float = Field(default=0.0, ge=0)
     subtotal: float = Field(default=0.0, ge=0)
+    # Versión de la lista de precios con la que se cobró (None: ventas previas)
+    lista_precios_version: Optional[int] = Field(default=None)
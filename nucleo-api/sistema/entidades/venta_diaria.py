@@ -0,0 +1,56 @@
+"""
+📅 ACUMULADOS DE VENTAS - ELCAFESIN
+Se actualizan en la misma transacción que cada venta (ver
+sistema.servicios.acumulados); los reportes leen un renglón por día (u
+hora) en vez de recorrer la tabla ``venta``.
+
+- Diarios: dashboard y totales por período
+- Por hora: patrones por hora del día / día de la semana (``hora`` 0-23, UTC)
+
+Las ventas sin sucursal se acumulan con ``sucursal = ""`` (la columna es
+parte de la llave primaria y no admite NULL).
+"""
+from datetime import date
+
+from sqlmodel import SQLModel, Field
+
+
+class VentaDiaria(SQLModel, table=True):
+    __tablename__ = "venta_diaria"
+
+    fecha: date = Field(primary_key=True)
+    sucursal: str = Field(default="", primary_key=True, max_length=50)
+    num_ventas: int = Field(default=0)
+    total: float = Field(default=0.0)
+
+
+class VentaDiariaReceta(SQLModel, table=True):
+    __tablename__ = "venta_diaria_receta"
+
+    fecha: date = Field(primary_key=True)
+    sucursal: str = Field(default="", primary_key=True, max_length=50)
+    receta_id: int = Field(primary_key=True, foreign_key="receta.id")
+    unidades: float = Field(default=0.0)
+    monto: float = Field(default=0.0)
+
+
+class VentaHora(SQLModel, table=True):
+    __tablename__ = "venta_hora"
+
+    fecha: date = Field(primary_key=True)
+    hora: int = Field(primary_key=True)
+    sucursal: str = Field(default="", primary_key=True, max_length=50)
+    num_ventas: int = Field(default=0)
+    total: float = Field(default=0.0)
+
+
+class VentaHoraReceta(SQLModel, table=True):
+    __tablename__ = "venta_hora_receta"
+
+    fecha: date = Field(primary_key=True)
+    hora: int = Field(primary_key=True)
+    sucursal: str = Field(default="", primary_key=True, max_length=50)
+    receta_id: int = Field(primary_key=True, foreign_key="receta.id", index=True)
+    num_ventas: int = Field(default=0)  # Tickets que incluyen la receta
+    unidades: float = Field(default=0.0)
+    monto: float = Field(default=0.0)
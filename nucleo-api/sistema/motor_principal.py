@@ -2,12 +2,20 @@
 🚀 MOTOR PRINCIPAL - ELCAFESIN
 FastAPI application con todas las rutas
 """
+from datetime import datetime
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from sistema.configuracion import crear_tablas, obtener_ajustes
-from sistema.utilidades.seed_inicial import inicializar_datos
+from sistema.configuracion import obtener_ajustes
+from sistema.configuracion.diferidos import precargar_diferidos
+from sistema.configuracion.hashing import cerrar_pool_hash
+from sistema.configuracion.sentencias_sql import MedidorSQL
+from sistema.servicios.escritor_auditoria import escritor_auditoria
+from sistema.servicios.metricas import MedidorMetricas, registro
+from sistema.utilidades.arranque import preparar_base_datos
 
 # Importar todos los routers
 from sistema.rutas import (
@@ -19,9 +27,9 @@ from sistema.rutas import (
     proveedores_router,
     recetas_router,
     ventas_router,
-    reportes_router
+    reportes_router,
+    logs_router,
 )
-from sistema.rutas.logs_rutas import router as logs_router
 
 # Obtener configuración
 ajustes = obtener_ajustes()
@@ -35,12 +43,10 @@ async def lifespan(app: FastAPI):
     print(f"🚀 {ajustes.PROJECT_NAME} v{ajustes.PROJECT_VERSION}")
     print("=" * 60)
     
-    crear_tablas()
-    
-    from sistema.configuracion.base_datos import obtener_sesion
-    for session in obtener_sesion():
-        inicializar_datos(session)
-        break
+    # Tablas, migraciones y datos iniciales; nada si la huella ya coincide
+    preparar_base_datos()
+    if ajustes.PRECARGAR_DIFERIDOS:
+        precargar_diferidos()
     
     print("✅ Sistema listo")
     print("=" * 60)
@@ -49,6 +55,8 @@ async def lifespan(app: FastAPI):
     
     # 🛑 SHUTDOWN
     print("🛑 Cerrando sistema...")
+    escritor_auditoria.detener()
+    cerrar_pool_hash()
 
 
 # Crear aplicación FastAPI
@@ -68,6 +76,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Sentencias SQL por petición (headers X-SQL-* con DEBUG_SQL)
+app.add_middleware(MedidorSQL)
+
+# Latencia, conteos y peticiones en curso para /metrics (el más externo)
+if ajustes.METRICAS_HABILITADAS:
+    app.add_middleware(MedidorMetricas)
+
 # ==================== RUTAS PRINCIPALES ====================
 
 @app.get("/")
@@ -87,10 +102,17 @@ def verificar_salud():
     return {
         "estado": "saludable",
         "base_datos": "sqlite",
-        "timestamp": "ok"
+        "timestamp": datetime.utcnow().isoformat()
     }
 
 
+if ajustes.METRICAS_HABILITADAS:
+    @app.get("/metrics", include_in_schema=False)
+    async def metricas():
+        """Métricas en formato Prometheus (async: se lee desde el event loop)"""
+        return PlainTextResponse(registro.exponer(), media_type="text/plain; version=0.0.4")
+
+
 # ==================== INCLUIR TODOS LOS ROUTERS ====================
 
 app.include_router(auth_router)
@@ -1,24 +1,31 @@
 """
 📦 Módulo de rutas (routers) - ELCAFESIN
+
+Los routers se importan al pedirlos (``from sistema.rutas import ventas_router``
+o ``sistema.rutas.ventas_rutas``): un script o una prueba que usa un solo
+módulo de rutas no paga la importación de todos los demás.
 """
-from .auth_rutas import router as auth_router
-from .usuarios_rutas import router as usuarios_router
-from .permisos_rutas import router as permisos_router
-from .clientes_rutas import router as clientes_router
-from .ingredientes_rutas import router as ingredientes_router
-from .proveedores_rutas import router as proveedores_router
-from .recetas_rutas import router as recetas_router
-from .ventas_rutas import router as ventas_router
-from .reportes_rutas import router as reportes_router
+import importlib
+
+_MODULOS = {
+    "auth_router": "auth_rutas",
+    "usuarios_router": "usuarios_rutas",
+    "permisos_router": "permisos_rutas",
+    "clientes_router": "clientes_rutas",
+    "ingredientes_router": "ingredientes_rutas",
+    "proveedores_router": "proveedores_rutas",
+    "recetas_router": "recetas_rutas",
+    "ventas_router": "ventas_rutas",
+    "reportes_router": "reportes_rutas",
+    "logs_router": "logs_rutas",
+}
+
+__all__ = list(_MODULOS)
+
 
-__all__ = [
-    "auth_router",
-    "usuarios_router",
-    "permisos_router",
-    "clientes_router",
-    "ingredientes_router",
-    "proveedores_router",
-    "recetas_router",
-    "ventas_router",
-    "reportes_router",
-]
+def __getattr__(nombre: str):
+    if nombre not in _MODULOS:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    router = importlib.import_module(f"{__name__}.{_MODULOS[nombre]}").router
+    globals()[nombre] = router  # Las siguientes búsquedas no pasan por aquí
+    return router
@@ -8,10 +8,16 @@ from sqlmodel import Session, select
 from typing import List
 
 from sistema.configuracion import (
-    obtener_sesion, hash_password, verificar_password,
-    crear_token, obtener_usuario_actual, requiere_roles
+    obtener_sesion, hash_password,
+    crear_token, obtener_usuario_actual, requiere_roles, invalidar_usuario,
+    obtener_ajustes
 )
-from sistema.entidades import Usuario, Rol, LogSesion
+from sistema.configuracion.hashing import (
+    verificar_password_pool, hash_password_pool, necesita_rehash
+)
+from sistema.configuracion.limitador import limitador_login
+from sistema.entidades import Usuario, Rol
+from sistema.servicios.escritor_auditoria import escritor_auditoria
 from sistema.contratos.auth_contratos import (
     UsuarioCreate, UsuarioOut, TokenOut, UsuarioUpdate
 )
@@ -38,18 +44,33 @@ def login(
     client_ip = request.client.host if request.client else "unknown"
     user_agent = request.headers.get("user-agent", "unknown")
 
-    if not usuario or not verificar_password(form_data.password, usuario.password_hash):
+    # bcrypt en el pool de procesos, con cupo por username y por IP (429 si no hay)
+    ajustes = obtener_ajustes()
+    with limitador_login.reservar([
+        ("usuario", form_data.username, ajustes.LOGIN_CONCURRENCIA_POR_USUARIO),
+        ("ip", client_ip, ajustes.LOGIN_CONCURRENCIA_POR_IP),
+    ]):
+        password_valido = bool(usuario) and verificar_password_pool(
+            form_data.password, usuario.password_hash
+        )
+
+        # Re-hash transparente si cambió BCRYPT_ROUNDS
+        if password_valido and usuario.activo and necesita_rehash(usuario.password_hash):
+            usuario.password_hash = hash_password_pool(form_data.password)
+            session.add(usuario)
+            session.commit()
+
+    if not password_valido:
         # Log intento fallido
         if usuario:
-            log = LogSesion(
+            escritor_auditoria.registrar(
+                session,
                 usuario_id=usuario.id,
                 accion="LOGIN_FAILED",
                 ip=client_ip,
                 user_agent=user_agent,
                 exito=False
             )
-            session.add(log)
-            session.commit()
 
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -58,31 +79,29 @@ def login(
 
     if not usuario.activo:
         # Log intento en usuario inactivo
-        log = LogSesion(
+        escritor_auditoria.registrar(
+            session,
             usuario_id=usuario.id,
             accion="LOGIN_INACTIVE",
             ip=client_ip,
             user_agent=user_agent,
             exito=False
         )
-        session.add(log)
-        session.commit()
 
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Usuario inactivo"
         )
 
-    # Log login exitoso
-    log = LogSesion(
+    # Log login exitoso (se escribe en lote, fuera del request)
+    escritor_auditoria.registrar(
+        session,
         usuario_id=usuario.id,
         accion="LOGIN",
         ip=client_ip,
         user_agent=user_agent,
         exito=True
     )
-    session.add(log)
-    session.commit()
 
     # Crear token
     token = crear_token(
@@ -105,15 +124,14 @@ def logout(
     user_agent = request.headers.get("user-agent", "unknown")
 
     # Log logout
-    log = LogSesion(
+    escritor_auditoria.registrar(
+        session,
         usuario_id=usuario_actual.id,
         accion="LOGOUT",
         ip=client_ip,
         user_agent=user_agent,
         exito=True
     )
-    session.add(log)
-    session.commit()
 
     return {"message": "Logout exitoso"}
 
@@ -194,6 +212,7 @@ def cambiar_estado_usuario(
         )
     
     usuario.activo = activo
+    invalidar_usuario(session, usuario.id)
     session.add(usuario)
     session.commit()
     session.refresh(usuario)
@@ -230,6 +249,8 @@ def actualizar_usuario(
     if datos.password is not None:
         usuario.password_hash = hash_password(datos.password)
     
+    invalidar_usuario(session, usuario.id)
+    
     session.add(usuario)
     session.commit()
     session.refresh(usuario)
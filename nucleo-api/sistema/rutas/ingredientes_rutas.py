@@ -2,11 +2,14 @@
 🥫 RUTAS DE INGREDIENTES - ELCAFESIN
 """
 from fastapi import APIRouter, Depends, HTTPException, Query, Body
+from pydantic import BaseModel, Field
+from sqlalchemy import update
 from sqlmodel import Session, select, or_
-from typing import List, Optional
+from typing import Annotated, List, Optional
 
 from sistema.configuracion import obtener_sesion, requiere_permiso
 from sistema.entidades import Ingrediente, Usuario
+from sistema.servicios.costos_recetas import impacto_precios, invalidar_costos
 
 router = APIRouter(prefix="/ingredientes", tags=["🥫 Ingredientes"])
 
@@ -16,6 +19,12 @@ permiso_editar_ingrediente = requiere_permiso("inventario", "editar")
 permiso_eliminar_ingrediente = requiere_permiso("inventario", "eliminar")
 
 
+class PrecioIngrediente(BaseModel):
+    """Nuevo costo de un ingrediente (actualización masiva)"""
+    ingrediente_id: int
+    costo_por_unidad: float = Field(ge=0)
+
+
 @router.post("/", response_model=Ingrediente)
 def crear_ingrediente(
     ingrediente: Ingrediente,
@@ -62,6 +71,72 @@ def listar_ingredientes(
     return ingredientes
 
 
+@router.post("/precios")
+def actualizar_precios(
+    precios: List[PrecioIngrediente],
+    session: Session = Depends(obtener_sesion),
+    usuario_actual: Usuario = Depends(permiso_editar_ingrediente)
+):
+    """
+    💲 Actualizar el costo de varios ingredientes a la vez
+
+    Un solo UPDATE para todos los ingredientes; solo se recalculan las
+    recetas que los usan. Devuelve cómo cambia cada una.
+    """
+    nuevos = {precio.ingrediente_id: precio.costo_por_unidad for precio in precios}
+    if not nuevos:
+        raise HTTPException(status_code=422, detail="Sin precios que actualizar")
+
+    existentes = set(session.exec(
+        select(Ingrediente.id).where(Ingrediente.id.in_(nuevos.keys()))
+    ).all())
+    faltantes = sorted(nuevos.keys() - existentes)
+    if faltantes:
+        raise HTTPException(status_code=404, detail=f"Ingredientes no encontrados: {faltantes}")
+
+    impacto = impacto_precios(session, nuevos)
+
+    session.execute(update(Ingrediente), [
+        {"id": ingrediente_id, "costo_por_unidad": costo}
+        for ingrediente_id, costo in nuevos.items()
+    ])
+    # El UPDATE masivo no pasa por el flush: invalidar a mano
+    invalidar_costos(session, [receta["receta_id"] for receta in impacto])
+    session.commit()
+
+    return {"actualizados": len(nuevos), "recetas": impacto}
+
+
+@router.get("/{ingrediente_id}/impacto")
+def impacto_cambio_precio(
+    ingrediente_id: int,
+    costo_nuevo: Annotated[Optional[float], Query(ge=0, description="Costo por unidad a simular")] = None,
+    session: Session = Depends(obtener_sesion),
+    usuario_actual: Usuario = Depends(permiso_ver_ingredientes)
+):
+    """
+    📈 Recetas afectadas por el precio de un ingrediente
+
+    Con ``costo_nuevo`` muestra el costo y precio sugerido que tendría cada
+    receta; sin él, solo las recetas que lo usan.
+    """
+    ingrediente = session.get(Ingrediente, ingrediente_id)
+
+    if not ingrediente:
+        raise HTTPException(status_code=404, detail="Ingrediente no encontrado")
+
+    if costo_nuevo is None:
+        costo_nuevo = ingrediente.costo_por_unidad
+
+    return {
+        "ingrediente_id": ingrediente.id,
+        "ingrediente_nombre": ingrediente.nombre,
+        "costo_actual": ingrediente.costo_por_unidad,
+        "costo_nuevo": costo_nuevo,
+        "recetas": impacto_precios(session, {ingrediente.id: costo_nuevo}),
+    }
+
+
 @router.get("/{ingrediente_id}", response_model=Ingrediente)
 def obtener_ingrediente(
     ingrediente_id: int,
@@ -2,22 +2,33 @@
 📋 RUTAS DE LOGS - ELCAFESIN
 Sistema de auditoría
 """
-from fastapi import APIRouter, Depends, Query
-from sqlmodel import Session, select
-from typing import List, Optional
-from datetime import datetime
+import asyncio
+import json
 
-from sistema.configuracion import obtener_sesion, requiere_roles
-from sistema.entidades import LogSesion, Usuario, Rol, Movimiento, Ingrediente, TipoMovimiento
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
+from typing import Annotated, AsyncIterator, List, Optional
+
+from sistema.configuracion import obtener_ajustes, obtener_sesion, requiere_roles
+from sistema.configuracion.generaciones import motor_de
+from sistema.entidades import Usuario, Rol
+from sistema.servicios.auditoria import (
+    TIPOS, consultar_logs, contar_logs, decodificar_cursor, logs_posteriores
+)
+from sistema.servicios.bus_eventos import BusEventos, Evento, Suscripcion, buses
 
 router = APIRouter(prefix="/logs", tags=["📋 Logs"])
 
 
 @router.get("/")
 def listar_logs(
-    tipo: Optional[str] = Query(None, description="Tipo de log: sesion, movimiento, todos"),
-    limit: int = Query(100, le=500),
-    offset: int = 0,
+    tipo: Annotated[Optional[str], Query(description="Tipo de log: sesion, movimiento, todos")] = None,
+    limit: Annotated[int, Query(ge=1, le=500)] = 100,
+    offset: Annotated[int, Query(ge=0, description="Compatibilidad; preferir cursor")] = 0,
+    cursor: Annotated[Optional[str], Query(description="siguiente_cursor de la página anterior")] = None,
+    exacto: Annotated[bool, Query(description="Total exacto (COUNT) en vez de aproximado")] = False,
     session: Session = Depends(obtener_sesion),
     usuario_actual: Usuario = Depends(requiere_roles([Rol.ADMIN, Rol.DUENO]))
 ):
@@ -28,65 +39,102 @@ def listar_logs(
     - sesion: Solo logs de login/logout
     - movimiento: Solo movimientos de inventario (reabastecimientos, etc)
     - todos: Ambos tipos combinados (default)
+
+    Paginación: pasar ``siguiente_cursor`` como ``cursor`` para la página
+    siguiente. ``total`` es aproximado salvo que se pida ``exacto=true``.
     """
-    if not isinstance(tipo, str):
-        tipo = None
-    logs_combinados = []
-
-    # Obtener logs de sesión
-    if tipo in [None, "todos", "sesion"]:
-        query_sesion = select(LogSesion).order_by(LogSesion.creado_en.desc())
-        logs_sesion = session.exec(query_sesion).all()
-
-        for log in logs_sesion:
-            usuario = session.get(Usuario, log.usuario_id) if log.usuario_id else None
-            logs_combinados.append({
-                "id": f"sesion_{log.id}",
-                "tipo": "sesion",
-                "usuario": usuario.username if usuario else "Sistema",
-                "accion": log.accion,
-                "detalles": {
-                    "ip": log.ip,
-                    "user_agent": log.user_agent,
-                    "exito": log.exito
-                },
-                "fecha": log.creado_en.isoformat(),
-                "creado_en": log.creado_en
-            })
-
-    # Obtener logs de movimientos (reabastecimientos)
-    if tipo in [None, "todos", "movimiento"]:
-        query_movimiento = select(Movimiento).order_by(Movimiento.creado_en.desc())
-        movimientos = session.exec(query_movimiento).all()
-
-        for mov in movimientos:
-            ingrediente = session.get(Ingrediente, mov.ingrediente_id)
-            logs_combinados.append({
-                "id": f"movimiento_{mov.id}",
-                "tipo": "movimiento",
-                "usuario": mov.referencia if mov.referencia else "Sistema",
-                "accion": f"{mov.tipo.value.upper()}",
-                "detalles": {
-                    "ingrediente": ingrediente.nombre if ingrediente else "Desconocido",
-                    "cantidad": mov.cantidad,
-                    "tipo_movimiento": mov.tipo.value,
-                    "referencia": mov.referencia
-                },
-                "fecha": mov.creado_en.isoformat(),
-                "creado_en": mov.creado_en
-            })
-
-    # Ordenar por fecha descendente
-    logs_combinados.sort(key=lambda x: x["creado_en"], reverse=True)
-
-    # Aplicar paginación
-    logs_paginados = logs_combinados[offset:offset + limit]
-
-    # Remover campo creado_en temporal usado para ordenar
-    for log in logs_paginados:
-        del log["creado_en"]
+    tipos = [tipo] if tipo in TIPOS else list(TIPOS)
+
+    logs, siguiente_cursor = consultar_logs(session, tipos, limit, cursor=cursor, offset=offset)
 
     return {
-        "total": len(logs_combinados),
-        "logs": logs_paginados
+        "total": contar_logs(session, tipos, exacto=exacto),
+        "total_aproximado": not exacto,
+        "logs": logs,
+        "siguiente_cursor": siguiente_cursor,
     }
+
+
+def _mensaje_sse(evento: str, datos: dict, id_: Optional[str] = None) -> str:
+    cabecera = f"id: {id_}\n" if id_ else ""
+    return f"{cabecera}event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
+
+
+async def _emitir_stream(
+    request: Request,
+    bus: BusEventos,
+    suscripcion: Suscripcion,
+    pendientes: List[Evento],
+    ping_segundos: float,
+) -> AsyncIterator[str]:
+    """Primero lo pendiente desde el cursor, luego lo que llegue por el bus"""
+    try:
+        vistos = set()
+        for cursor, log in pendientes:
+            vistos.add(log["id"])
+            yield _mensaje_sse("log", log, cursor)
+
+        while True:
+            if suscripcion.desbordada:
+                # El cliente no consumió a tiempo: que reconecte con su último id
+                yield _mensaje_sse("reconectar", {"motivo": "cola llena"})
+                return
+            try:
+                cursor, log = await asyncio.wait_for(suscripcion.cola.get(), ping_segundos)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": ping\n\n"
+                continue
+            if log["id"] in vistos:
+                # Ya enviado en el relleno inicial
+                vistos.discard(log["id"])
+                continue
+            yield _mensaje_sse("log", log, cursor)
+    finally:
+        bus.cancelar(suscripcion)
+
+
+@router.get("/stream")
+async def stream_logs(
+    request: Request,
+    tipo: Optional[str] = Query(None, description="Tipo de log: sesion, movimiento, todos"),
+    cursor: Optional[str] = Query(None, description="Reanudar después de este log"),
+    last_event_id: Optional[str] = Header(None),
+    session: Session = Depends(obtener_sesion),
+    usuario_actual: Usuario = Depends(requiere_roles([Rol.ADMIN, Rol.DUENO]))
+):
+    """
+    📡 Stream de logs en vivo (Server-Sent Events)
+
+    Cada evento ``log`` trae como ``id`` su cursor. Al reconectar, el
+    navegador manda ``Last-Event-ID`` (o se pasa ``cursor``) y primero se
+    envían los logs posteriores a ese punto. Si el cliente se atrasa
+    demasiado llega un evento ``reconectar`` y el stream se cierra.
+    """
+    ajustes = obtener_ajustes()
+    tipos = [tipo] if tipo in TIPOS else list(TIPOS)
+    desde = cursor or last_event_id
+    if desde:
+        decodificar_cursor(desde)  # 400 antes de abrir el stream
+
+    # Suscribirse antes de leer lo pendiente: nada cae en el hueco entre ambos
+    bus = buses.para(motor_de(session))
+    suscripcion = bus.suscribir(tipos, ajustes.LOGS_STREAM_COLA)
+    try:
+        pendientes = (
+            await run_in_threadpool(logs_posteriores, session, tipos, desde, ajustes.LOGS_STREAM_COLA)
+            if desde else []
+        )
+    except BaseException:
+        bus.cancelar(suscripcion)
+        raise
+    if len(pendientes) == ajustes.LOGS_STREAM_COLA:
+        # Puede haber más: tras enviar este tramo el cliente reconecta y sigue
+        suscripcion.desbordada = True
+
+    return StreamingResponse(
+        _emitir_stream(request, bus, suscripcion, pendientes, ajustes.LOGS_STREAM_PING_SEGUNDOS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
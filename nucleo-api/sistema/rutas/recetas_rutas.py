@@ -1,14 +1,19 @@
 """
 🍰 RUTAS DE RECETAS - ELCAFESIN
-Gestión de recetas y cálculo de costos
+Gestión de recetas y cálculo de costos (cacheados en
+``sistema.servicios.costos_recetas``)
 """
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session, select
-from typing import List, Optional
-from pydantic import BaseModel, Field
+from typing import Annotated, Dict, List, Optional
+from pydantic import BaseModel, Field, model_validator
 
 from sistema.configuracion import obtener_sesion, requiere_permiso, obtener_ajustes
 from sistema.entidades import Receta, RecetaItem, Ingrediente, Usuario
+from sistema.servicios.capacidad import capacidad_mezcla, capacidades
+from sistema.servicios.costos_recetas import costos_recetas
+from sistema.servicios.explosion_recetas import recetas_que_usan, validar_subrecetas
+from sistema.servicios.simulacion_precios import simular_escenarios
 
 router = APIRouter(prefix="/recetas", tags=["🍰 Recetas"])
 
@@ -22,12 +27,19 @@ permiso_eliminar_receta = requiere_permiso("recetas", "borrar")
 
 
 class RecetaItemPayload(BaseModel):
-    """Item de receta enviado desde el frontend."""
+    """Item de receta enviado desde el frontend (ingrediente o subreceta)."""
 
-    ingrediente_id: int
-    cantidad: float = Field(gt=0)
+    ingrediente_id: Optional[int] = None
+    subreceta_id: Optional[int] = None
+    cantidad: float = Field(gt=0)  # En unidades de la subreceta si es una
     merma: float = Field(default=0.0, ge=0, le=1)
 
+    @model_validator(mode="after")
+    def _un_solo_destino(self):
+        if (self.ingrediente_id is None) == (self.subreceta_id is None):
+            raise ValueError("Cada item lleva ingrediente_id o subreceta_id (uno solo)")
+        return self
+
 
 class RecetaCreate(BaseModel):
     """Datos para crear receta"""
@@ -62,14 +74,15 @@ class RecetaConCosto(BaseModel):
 class RecetaItemDetalle(BaseModel):
     """Detalle de item con información de stock y costos."""
 
-    ingrediente_id: int
-    ingrediente_nombre: str
+    ingrediente_id: Optional[int]
+    ingrediente_nombre: str  # Nombre de la subreceta si el item es una
     cantidad: float
     merma: float
     costo_unitario: float
-    stock: float
-    min_stock: float
+    stock: Optional[float]  # Las subrecetas no tienen stock propio
+    min_stock: Optional[float]
     unidad: Optional[str] = None
+    subreceta_id: Optional[int] = None
 
     model_config = {"from_attributes": True}
 
@@ -77,50 +90,89 @@ class RecetaItemDetalle(BaseModel):
 RecetaConCosto.model_rebuild()
 
 
-def _calcular_detalle_receta(receta: Receta, session: Session) -> RecetaConCosto:
-    """Construye el detalle completo de una receta con costos e items."""
+class EscenarioPrecios(BaseModel):
+    """Cambios de costo de ingredientes a simular"""
 
-    items = session.exec(
-        select(RecetaItem).where(RecetaItem.receta_id == receta.id)
-    ).all()
+    nombre: Optional[str] = None
+    # ingrediente_id -> variación porcentual (12 = +12 %, -5 = -5 %)
+    variaciones: Dict[int, Annotated[float, Field(ge=-100)]] = Field(default_factory=dict)
+    # ingrediente_id -> nuevo costo por unidad (manda sobre la variación)
+    precios: Dict[int, Annotated[float, Field(ge=0)]] = Field(default_factory=dict)
 
-    costo_total = 0.0
-    items_detalle: List[RecetaItemDetalle] = []
 
-    for item in items:
-        ingrediente = session.get(Ingrediente, item.ingrediente_id)
-        if not ingrediente:
-            # Saltamos ingredientes inexistentes para no romper la respuesta
-            continue
-
-        costo_item = item.cantidad * (1 + item.merma) * ingrediente.costo_por_unidad
-        costo_total += costo_item
-
-        items_detalle.append(
-            RecetaItemDetalle(
-                ingrediente_id=ingrediente.id,
-                ingrediente_nombre=ingrediente.nombre,
-                cantidad=item.cantidad,
-                merma=item.merma,
-                costo_unitario=ingrediente.costo_por_unidad,
-                stock=ingrediente.stock,
-                min_stock=ingrediente.min_stock,
-                unidad=ingrediente.unidad,
+class SimulacionPrecios(BaseModel):
+    escenarios: List[EscenarioPrecios] = Field(min_length=1, max_length=100)
+
+
+class MezclaProduccion(BaseModel):
+    """Proporción objetivo de recetas (ej. 3 lattes por cada mocha)"""
+
+    mezcla: Dict[int, Annotated[float, Field(gt=0)]] = Field(min_length=1)
+
+
+def _detalles_recetas(recetas: List[Receta], session: Session) -> List[RecetaConCosto]:
+    """
+    Detalle de varias recetas: costos desde la cache y stock actual de sus
+    ingredientes en una sola consulta.
+    """
+    costos = costos_recetas(session, recetas)
+
+    ingrediente_ids = {
+        item.ingrediente_id
+        for costo in costos.values() for item in costo.items
+        if item.subreceta_id is None
+    }
+    existencias = {
+        ing_id: (stock, min_stock)
+        for ing_id, stock, min_stock in session.exec(
+            select(Ingrediente.id, Ingrediente.stock, Ingrediente.min_stock)
+            .where(Ingrediente.id.in_(ingrediente_ids))
+        )
+    } if ingrediente_ids else {}
+
+    detalles = []
+    for receta in recetas:
+        costo = costos[receta.id]
+        items_detalle = []
+        for item in costo.items:
+            if item.subreceta_id is not None:
+                stock = min_stock = None
+            elif item.ingrediente_id not in existencias:
+                # Saltamos ingredientes inexistentes para no romper la respuesta
+                continue
+            else:
+                stock, min_stock = existencias[item.ingrediente_id]
+            items_detalle.append(
+                RecetaItemDetalle(
+                    ingrediente_id=item.ingrediente_id,
+                    ingrediente_nombre=item.ingrediente_nombre,
+                    cantidad=item.cantidad,
+                    merma=item.merma,
+                    costo_unitario=item.costo_unitario,
+                    stock=stock,
+                    min_stock=min_stock,
+                    unidad=item.unidad,
+                    subreceta_id=item.subreceta_id,
+                )
+            )
+
+        detalles.append(
+            RecetaConCosto(
+                id=receta.id,
+                nombre=receta.nombre,
+                descripcion=receta.descripcion,
+                margen=costo.margen,
+                costo_total=round(costo.costo_total, 2),
+                precio_sugerido=round(costo.precio_sugerido, 2),
+                items=items_detalle,
             )
         )
+    return detalles
 
-    margen = receta.margen or ajustes.MARGIN_DEFAULT
-    precio_sugerido = costo_total * (1 + margen)
-
-    return RecetaConCosto(
-        id=receta.id,
-        nombre=receta.nombre,
-        descripcion=receta.descripcion,
-        margen=margen,
-        costo_total=round(costo_total, 2),
-        precio_sugerido=round(precio_sugerido, 2),
-        items=items_detalle,
-    )
+
+def _calcular_detalle_receta(receta: Receta, session: Session) -> RecetaConCosto:
+    """Construye el detalle completo de una receta con costos e items."""
+    return _detalles_recetas([receta], session)[0]
 
 
 def _items_desde_payload(datos: RecetaCreate) -> List[RecetaItemPayload]:
@@ -142,14 +194,25 @@ def _guardar_items(receta: Receta, items: List[RecetaItemPayload], session: Sess
     ):
         session.delete(existente)
 
-    for item_data in items:
-        ingrediente = session.get(Ingrediente, item_data.ingrediente_id)
-        if not ingrediente:
-            raise HTTPException(status_code=404, detail="Ingrediente no encontrado")
+    # Con los items previos ya borrados (autoflush) solo cuentan las
+    # subrecetas nuevas para detectar ciclos
+    validar_subrecetas(
+        session, receta,
+        [item.subreceta_id for item in items if item.subreceta_id is not None],
+    )
+
+    ingrediente_ids = {item.ingrediente_id for item in items if item.ingrediente_id is not None}
+    existentes = set(session.exec(
+        select(Ingrediente.id).where(Ingrediente.id.in_(ingrediente_ids))
+    ).all()) if ingrediente_ids else set()
+    if ingrediente_ids - existentes:
+        raise HTTPException(status_code=404, detail="Ingrediente no encontrado")
 
+    for item_data in items:
         item = RecetaItem(
             receta_id=receta.id,
-            ingrediente_id=ingrediente.id,
+            ingrediente_id=item_data.ingrediente_id,
+            subreceta_id=item_data.subreceta_id,
             cantidad=item_data.cantidad,
             merma=item_data.merma,
         )
@@ -190,7 +253,124 @@ def listar_recetas(
 ):
     """📋 Listar todas las recetas"""
     recetas = session.exec(select(Receta)).all()
-    return [_calcular_detalle_receta(receta, session) for receta in recetas]
+    return _detalles_recetas(recetas, session)
+
+
+@router.post("/simulacion")
+def simular_precios(
+    datos: SimulacionPrecios,
+    session: Session = Depends(obtener_sesion),
+    usuario_actual: Usuario = Depends(permiso_ver_recetas)
+):
+    """
+    🧪 Simular cambios de costo de ingredientes en todo el menú
+
+    Respuesta en columnas: ``recetas`` fija el orden y cada escenario trae
+    listas paralelas de ``costo``, ``precio_sugerido`` y ``margen_delta``
+    (cambio del margen real si se mantiene el precio sugerido actual).
+    """
+    matriz, resultados = simular_escenarios(
+        session, [(escenario.variaciones, escenario.precios) for escenario in datos.escenarios]
+    )
+
+    return {
+        "recetas": [
+            {
+                "receta_id": receta_id,
+                "receta_nombre": nombre,
+                "margen": margen,
+                "costo_actual": round(costo, 2),
+                "precio_actual": round(costo * (1 + margen), 2),
+            }
+            for receta_id, nombre, margen, costo in zip(
+                matriz.receta_ids, matriz.nombres, matriz.margenes, matriz.costos
+            )
+        ],
+        "escenarios": [
+            {"nombre": escenario.nombre or f"Escenario {n}", **resultado}
+            for n, (escenario, resultado) in enumerate(zip(datos.escenarios, resultados), start=1)
+        ],
+    }
+
+
+@router.get("/capacidad")
+def tablero_capacidad(
+    session: Session = Depends(obtener_sesion),
+    usuario_actual: Usuario = Depends(permiso_ver_recetas)
+):
+    """
+    🧮 Cuántas unidades de cada receta alcanzan con el stock actual
+
+    Cada receta por separado (sin repartir ingredientes compartidos) y el
+    ingrediente que la limita.
+    """
+    estructura, stock, capacidad = capacidades(session)
+
+    recetas = []
+    for receta_id, nombre in estructura.nombres.items():
+        actual = capacidad[receta_id]
+        cuello = None
+        if actual.cuello_botella is not None:
+            por_unidad = dict(estructura.requisitos[receta_id])[actual.cuello_botella]
+            cuello = {
+                "ingrediente_id": actual.cuello_botella,
+                "ingrediente_nombre": estructura.ingredientes[actual.cuello_botella],
+                "stock": stock.get(actual.cuello_botella, 0.0),
+                "por_unidad": round(por_unidad, 6),
+            }
+        recetas.append({
+            "receta_id": receta_id,
+            "receta_nombre": nombre,
+            "unidades": actual.unidades,
+            "cuello_botella": cuello,
+        })
+
+    return {"recetas": recetas}
+
+
+@router.post("/capacidad/mezcla")
+def capacidad_conjunta(
+    datos: MezclaProduccion,
+    session: Session = Depends(obtener_sesion),
+    usuario_actual: Usuario = Depends(permiso_ver_recetas)
+):
+    """
+    🧮 Producción conjunta de una mezcla de recetas
+
+    Reparte los ingredientes compartidos: ``veces`` es cuántas veces cabe la
+    mezcla completa y ``unidades`` lo que toca a cada receta.
+    """
+    estructura, stock, _ = capacidades(session)
+    faltantes = sorted(set(datos.mezcla) - estructura.nombres.keys())
+    if faltantes:
+        raise HTTPException(status_code=404, detail=f"Recetas no encontradas: {faltantes}")
+
+    resultado = capacidad_mezcla(estructura, stock, datos.mezcla)
+    cuello = resultado["cuello_botella"]
+
+    return {
+        "veces": None if resultado["veces"] is None else round(resultado["veces"], 4),
+        "cuello_botella": None if cuello is None else {
+            "ingrediente_id": cuello,
+            "ingrediente_nombre": estructura.ingredientes[cuello],
+        },
+        "recetas": [
+            {
+                "receta_id": receta_id,
+                "receta_nombre": estructura.nombres[receta_id],
+                "unidades": unidades,
+            }
+            for receta_id, unidades in resultado["unidades"].items()
+        ],
+        "uso_ingredientes": [
+            {
+                "ingrediente_id": ingrediente_id,
+                "ingrediente_nombre": estructura.ingredientes[ingrediente_id],
+                "cantidad": round(cantidad, 6),
+            }
+            for ingrediente_id, cantidad in resultado["uso_ingredientes"].items()
+        ],
+    }
 
 
 @router.get("/{receta_id}", response_model=RecetaConCosto)
@@ -248,6 +428,13 @@ def eliminar_receta(
     
     if not receta:
         raise HTTPException(status_code=404, detail="Receta no encontrada")
+
+    usada_en = recetas_que_usan(session, receta_id)
+    if usada_en:
+        raise HTTPException(
+            status_code=409,
+            detail=f"La receta se usa como subreceta en: {', '.join(sorted(usada_en.values()))}",
+        )
     
     # Eliminar items primero
     items = session.exec(
@@ -2,13 +2,18 @@
 📊 RUTAS DE REPORTES - ELCAFESIN
 Estadísticas y análisis de ventas
 """
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import case
 from sqlmodel import Session, select, func
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import date, datetime, timedelta
+from typing import Annotated, Optional
 
 from sistema.configuracion import obtener_sesion, requiere_permiso
-from sistema.entidades import Venta, VentaItem, Receta, Ingrediente, Usuario
+from sistema.entidades import Venta, VentaItem, VentaDiaria, Receta, Ingrediente, Usuario
+from sistema.servicios.auditoria import consultar_kardex
+from sistema.servicios.reportes import (
+    DIAS_SEMANA, Acumulado, Periodo, patrones_ventas, resumen_ventas
+)
 
 router = APIRouter(prefix="/reportes", tags=["📊 Reportes"])
 
@@ -21,28 +26,21 @@ def obtener_dashboard(
     """
     📈 Dashboard con estadísticas generales
     """
-    # Total de ventas hoy
+    # Ventas de hoy y del mes desde los acumulados diarios (un renglón por
+    # día y sucursal, sin recorrer la tabla venta)
     hoy = datetime.utcnow().date()
-    ventas_hoy = session.exec(
-        select(func.sum(Venta.total)).where(
-            func.date(Venta.creado_en) == hoy
-        )
-    ).first() or 0.0
-    
-    # Total de ventas este mes
-    inicio_mes = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0)
-    ventas_mes = session.exec(
-        select(func.sum(Venta.total)).where(
-            Venta.creado_en >= inicio_mes
-        )
-    ).first() or 0.0
-    
-    # Número de ventas hoy
-    num_ventas_hoy = session.exec(
-        select(func.count(Venta.id)).where(
-            func.date(Venta.creado_en) == hoy
-        )
-    ).first() or 0
+    inicio_mes = hoy.replace(day=1)
+    es_hoy = VentaDiaria.fecha == hoy
+    ventas_mes, ventas_hoy, num_ventas_hoy = session.exec(
+        select(
+            func.sum(VentaDiaria.total),
+            func.sum(case((es_hoy, VentaDiaria.total), else_=0.0)),
+            func.sum(case((es_hoy, VentaDiaria.num_ventas), else_=0)),
+        ).where(VentaDiaria.fecha >= inicio_mes)
+    ).one()
+    ventas_hoy = ventas_hoy or 0.0
+    ventas_mes = ventas_mes or 0.0
+    num_ventas_hoy = num_ventas_hoy or 0
     
     # Ingredientes con stock bajo
     ingredientes_bajo_stock = session.exec(
@@ -74,34 +72,95 @@ def reporte_ventas_periodo(
     fecha_desde: datetime,
     fecha_hasta: datetime,
     sucursal: Optional[str] = None,
+    periodo: Annotated[Optional[Periodo], Query(description="Serie por hora, dia, semana o mes")] = None,
+    agrupar_sucursal: Annotated[bool, Query(description="Serie separada por sucursal")] = False,
     session: Session = Depends(obtener_sesion),
     usuario_actual: Usuario = Depends(requiere_permiso("reportes", "ver"))
 ):
     """
     📊 Reporte de ventas por período
+
+    Totales calculados en la BD (días completos desde los acumulados
+    diarios). Con ``periodo`` y/o ``agrupar_sucursal`` incluye ``serie``.
     """
-    query = select(Venta).where(
-        Venta.creado_en >= fecha_desde,
-        Venta.creado_en <= fecha_hasta
+    total, serie = resumen_ventas(
+        session, fecha_desde, fecha_hasta,
+        sucursal=sucursal, periodo=periodo, por_sucursal=agrupar_sucursal,
     )
     
-    if sucursal:
-        query = query.where(Venta.sucursal == sucursal)
-    
-    ventas = session.exec(query).all()
-    
-    # Calcular estadísticas
-    total_ventas = sum(v.total for v in ventas)
-    num_ventas = len(ventas)
-    ticket_promedio = total_ventas / num_ventas if num_ventas > 0 else 0.0
-    
+    respuesta = {
+        "fecha_desde": fecha_desde,
+        "fecha_hasta": fecha_hasta,
+        "sucursal": sucursal,
+        **total.como_dict(),
+    }
+    if periodo or agrupar_sucursal:
+        respuesta["periodo"] = periodo
+        respuesta["serie"] = serie
+    return respuesta
+
+
+@router.get("/serie")
+def serie_ventas(
+    fecha_desde: date,
+    fecha_hasta: date,
+    sucursal: Optional[str] = None,
+    receta_id: Optional[int] = None,
+    desfase_horas: Annotated[int, Query(ge=-12, le=14, description="Horas respecto a UTC")] = 0,
+    metrica: Annotated[str, Query(
+        pattern="^(num_ventas|total_ventas|unidades)$",
+        description="Valor de cada celda del mapa de calor",
+    )] = "num_ventas",
+    session: Session = Depends(obtener_sesion),
+    usuario_actual: Usuario = Depends(requiere_permiso("reportes", "ver"))
+):
+    """
+    🕒 Patrones de venta para armar turnos
+
+    - ``por_hora``: 24 cubetas por hora del día
+    - ``por_dia_semana``: 7 cubetas (lunes a domingo)
+    - ``mapa_calor``: día de la semana x hora (``metrica`` por celda)
+
+    Fechas inclusivas (días UTC); sale de los acumulados por hora, así que
+    el costo depende de los días del rango, no de las ventas.
+    """
+    if metrica == "unidades" and receta_id is None:
+        raise HTTPException(status_code=400, detail="La métrica unidades requiere receta_id")
+
+    celdas = patrones_ventas(
+        session, fecha_desde, fecha_hasta,
+        sucursal=sucursal, receta_id=receta_id, desfase_horas=desfase_horas,
+    )
+
+    unidades = 0.0 if receta_id is not None else None
+    por_hora = [Acumulado(unidades=unidades) for _ in range(24)]
+    por_dia = [Acumulado(unidades=unidades) for _ in range(7)]
+    for (dia, hora), celda in celdas.items():
+        for destino in (por_hora[hora], por_dia[dia]):
+            destino.total += celda.total
+            destino.num_ventas += celda.num_ventas
+            if celda.unidades is not None:
+                destino.unidades += celda.unidades
+
     return {
         "fecha_desde": fecha_desde,
         "fecha_hasta": fecha_hasta,
         "sucursal": sucursal,
-        "total_ventas": round(total_ventas, 2),
-        "num_ventas": num_ventas,
-        "ticket_promedio": round(ticket_promedio, 2)
+        "receta_id": receta_id,
+        "desfase_horas": desfase_horas,
+        "por_hora": [{"hora": hora, **a.como_dict()} for hora, a in enumerate(por_hora)],
+        "por_dia_semana": [
+            {"dia": dia, "nombre": DIAS_SEMANA[dia], **a.como_dict()}
+            for dia, a in enumerate(por_dia)
+        ],
+        "mapa_calor": {
+            "metrica": metrica,
+            "dias": list(DIAS_SEMANA),
+            "valores": [
+                [celdas[(dia, hora)].como_dict()[metrica] for hora in range(24)]
+                for dia in range(7)
+            ],
+        },
     }
 
 
@@ -116,11 +175,16 @@ def top_recetas_vendidas(
     """
     🏆 Top recetas más vendidas
     """
-    query = select(
-        VentaItem.receta_id,
-        func.sum(VentaItem.cantidad).label("total_vendido"),
-        func.sum(VentaItem.subtotal).label("total_monto")
-    ).join(Venta)
+    query = (
+        select(
+            VentaItem.receta_id,
+            Receta.nombre,
+            func.sum(VentaItem.cantidad).label("total_vendido"),
+            func.sum(VentaItem.subtotal).label("total_monto")
+        )
+        .join(Venta, Venta.id == VentaItem.venta_id)
+        .join(Receta, Receta.id == VentaItem.receta_id)
+    )
     
     if fecha_desde:
         query = query.where(Venta.creado_en >= fecha_desde)
@@ -128,24 +192,23 @@ def top_recetas_vendidas(
     if fecha_hasta:
         query = query.where(Venta.creado_en <= fecha_hasta)
     
-    query = query.group_by(VentaItem.receta_id).order_by(
+    query = query.group_by(VentaItem.receta_id, Receta.nombre).order_by(
         func.sum(VentaItem.subtotal).desc()
     ).limit(limit)
     
     resultados = session.exec(query).all()
     
-    top_recetas = []
-    for receta_id, total_vendido, total_monto in resultados:
-        receta = session.get(Receta, receta_id)
-        if receta:
-            top_recetas.append({
+    return {
+        "top_recetas": [
+            {
                 "receta_id": receta_id,
-                "receta_nombre": receta.nombre,
+                "receta_nombre": nombre,
                 "cantidad_vendida": float(total_vendido),
                 "monto_total": round(float(total_monto), 2)
-            })
-    
-    return {"top_recetas": top_recetas}
+            }
+            for receta_id, nombre, total_vendido, total_monto in resultados
+        ]
+    }
 
 
 @router.get("/movimientos_inventario")
@@ -153,40 +216,20 @@ def movimientos_inventario(
     ingrediente_id: Optional[int] = None,
     fecha_desde: Optional[datetime] = None,
     fecha_hasta: Optional[datetime] = None,
-    limit: int = Query(100, le=500),
+    limit: Annotated[int, Query(le=500)] = 100,
+    cursor: Annotated[Optional[str], Query(description="siguiente_cursor de la página anterior")] = None,
     session: Session = Depends(obtener_sesion),
     usuario_actual: Usuario = Depends(requiere_permiso("inventario", "ver"))
 ):
     """
     📦 Historial de movimientos de inventario (Kardex)
+
+    Paginación: pasar ``siguiente_cursor`` como ``cursor`` para la página
+    siguiente.
     """
-    from sistema.entidades import Movimiento
-    
-    query = select(Movimiento)
-    
-    if ingrediente_id:
-        query = query.where(Movimiento.ingrediente_id == ingrediente_id)
-    
-    if fecha_desde:
-        query = query.where(Movimiento.creado_en >= fecha_desde)
-    
-    if fecha_hasta:
-        query = query.where(Movimiento.creado_en <= fecha_hasta)
-    
-    query = query.order_by(Movimiento.creado_en.desc()).limit(limit)
-    movimientos = session.exec(query).all()
-    
-    movimientos_detalle = []
-    for mov in movimientos:
-        ingrediente = session.get(Ingrediente, mov.ingrediente_id)
-        movimientos_detalle.append({
-            "id": mov.id,
-            "ingrediente_id": mov.ingrediente_id,
-            "ingrediente_nombre": ingrediente.nombre if ingrediente else "N/A",
-            "tipo": mov.tipo,
-            "cantidad": mov.cantidad,
-            "referencia": mov.referencia,
-            "fecha": mov.creado_en
-        })
+    movimientos, siguiente_cursor = consultar_kardex(
+        session, limit, ingrediente_id=ingrediente_id,
+        desde=fecha_desde, hasta=fecha_hasta, cursor=cursor,
+    )
     
-    return {"movimientos": movimientos_detalle}
+    return {"movimientos": movimientos, "siguiente_cursor": siguiente_cursor}
@@ -7,7 +7,8 @@ from sqlmodel import Session, select
 from typing import List
 
 from sistema.configuracion import (
-    obtener_sesion, hash_password, obtener_usuario_actual, requiere_roles
+    obtener_sesion, hash_password, obtener_usuario_actual, requiere_roles,
+    invalidar_usuario, estadisticas_cache_usuarios
 )
 from sistema.entidades import Usuario, Rol
 from sistema.contratos.auth_contratos import (
@@ -67,6 +68,17 @@ def crear_usuario(
     return nuevo_usuario
 
 
+@router.get("/cache/estadisticas")
+def estadisticas_cache(
+    usuario_actual: Usuario = Depends(requiere_roles(["ADMIN", "DUENO"]))
+):
+    """
+    📈 Aciertos/fallos de la cache de usuarios autenticados
+    Requiere rol ADMIN o DUENO
+    """
+    return estadisticas_cache_usuarios()
+
+
 @router.get("/{usuario_id}", response_model=UsuarioOut)
 def obtener_usuario(
     usuario_id: int,
@@ -129,6 +141,8 @@ def actualizar_usuario(
     if datos.password is not None:
         usuario.password_hash = hash_password(datos.password)
 
+    invalidar_usuario(session, usuario.id)
+
     session.add(usuario)
     session.commit()
     session.refresh(usuario)
@@ -155,6 +169,7 @@ def activar_usuario(
         )
 
     usuario.activo = True
+    invalidar_usuario(session, usuario.id)
     session.add(usuario)
     session.commit()
     session.refresh(usuario)
@@ -181,6 +196,7 @@ def desactivar_usuario(
         )
 
     usuario.activo = False
+    invalidar_usuario(session, usuario.id)
     session.add(usuario)
     session.commit()
     session.refresh(usuario)
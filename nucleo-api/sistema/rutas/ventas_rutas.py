@@ -9,10 +9,8 @@ from datetime import datetime
 from pydantic import BaseModel
 
 from sistema.configuracion import obtener_sesion, requiere_permiso
-from sistema.entidades import (
-    Venta, VentaItem, Receta, RecetaItem, Ingrediente,
-    Movimiento, TipoMovimiento, Usuario
-)
+from sistema.entidades import Venta, VentaItem, Receta, Usuario
+from sistema.servicios.motor_ventas import registrar_venta
 
 router = APIRouter(prefix="/ventas", tags=["🛒 Ventas"])
 
@@ -39,123 +37,20 @@ def crear_venta(
     """
     ➕ Crear nueva venta
     
-    Proceso:
-    1. Validar stock de todos los ingredientes
-    2. Crear venta y items
-    3. Descontar stock de ingredientes
-    4. Registrar movimientos en kardex
+    Proceso (ver sistema.servicios.motor_ventas):
+    1. Expandir recetas de todo el ticket en una consulta
+    2. Validar stock y cobrar con la lista de precios en memoria
+    3. Crear venta, items, descuento de stock y kardex en una sola transacción
     """
     if not datos.items:
         raise HTTPException(status_code=400, detail="La venta debe tener al menos un item")
     
-    # FASE 1: Validar stock suficiente
-    ingredientes_a_descontar = {}  # {ingrediente_id: cantidad_total}
-    
-    for item_data in datos.items:
-        receta = session.get(Receta, item_data.receta_id)
-        if not receta:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Receta {item_data.receta_id} no encontrada"
-            )
-        
-        # Obtener ingredientes de la receta
-        receta_items = session.exec(
-            select(RecetaItem).where(RecetaItem.receta_id == receta.id)
-        ).all()
-        
-        for receta_item in receta_items:
-            cantidad_necesaria = receta_item.cantidad * (1 + receta_item.merma) * item_data.cantidad
-            
-            if receta_item.ingrediente_id in ingredientes_a_descontar:
-                ingredientes_a_descontar[receta_item.ingrediente_id] += cantidad_necesaria
-            else:
-                ingredientes_a_descontar[receta_item.ingrediente_id] = cantidad_necesaria
-    
-    # Verificar stock
-    for ingrediente_id, cantidad_necesaria in ingredientes_a_descontar.items():
-        ingrediente = session.get(Ingrediente, ingrediente_id)
-        if not ingrediente:
-            continue
-        
-        if ingrediente.stock < cantidad_necesaria:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Stock insuficiente de {ingrediente.nombre}. "
-                       f"Disponible: {ingrediente.stock}, Necesario: {cantidad_necesaria:.2f}"
-            )
-    
-    # FASE 2: Crear venta
-    venta = Venta(
+    return registrar_venta(
+        session,
+        datos.items,
         cliente_id=datos.cliente_id,
-        sucursal=datos.sucursal,
-        total=0.0
+        sucursal=datos.sucursal
     )
-    session.add(venta)
-    session.commit()
-    session.refresh(venta)
-    
-    # FASE 3: Agregar items y calcular total
-    total_venta = 0.0
-    
-    for item_data in datos.items:
-        receta = session.get(Receta, item_data.receta_id)
-        
-        # Calcular precio de la receta
-        receta_items = session.exec(
-            select(RecetaItem).where(RecetaItem.receta_id == receta.id)
-        ).all()
-        
-        costo_receta = 0.0
-        for receta_item in receta_items:
-            ingrediente = session.get(Ingrediente, receta_item.ingrediente_id)
-            if ingrediente:
-                costo_receta += receta_item.cantidad * (1 + receta_item.merma) * ingrediente.costo_por_unidad
-        
-        # Aplicar margen
-        from sistema.configuracion import obtener_ajustes
-        ajustes = obtener_ajustes()
-        margen = receta.margen if receta.margen is not None else ajustes.MARGIN_DEFAULT
-        precio_unitario = costo_receta * (1 + margen)
-        subtotal = precio_unitario * item_data.cantidad
-        
-        # Crear item de venta
-        venta_item = VentaItem(
-            venta_id=venta.id,
-            receta_id=receta.id,
-            cantidad=item_data.cantidad,
-            precio_unitario=precio_unitario,
-            subtotal=subtotal
-        )
-        session.add(venta_item)
-        
-        total_venta += subtotal
-    
-    # Actualizar total de venta
-    venta.total = total_venta
-    session.add(venta)
-    
-    # FASE 4: Descontar stock y registrar movimientos
-    for ingrediente_id, cantidad_descontar in ingredientes_a_descontar.items():
-        ingrediente = session.get(Ingrediente, ingrediente_id)
-        if ingrediente:
-            # Descontar stock
-            ingrediente.stock -= cantidad_descontar
-            session.add(ingrediente)
-            
-            # Registrar movimiento en kardex
-            movimiento = Movimiento(
-                ingrediente_id=ingrediente_id,
-                tipo=TipoMovimiento.VENTA,
-                cantidad=-cantidad_descontar,
-                referencia=f"Venta #{venta.id}"
-            )
-            session.add(movimiento)
-    
-    session.commit()
-    session.refresh(venta)
-    
-    return venta
 
 
 @router.get("/", response_model=List[Venta])
@@ -198,20 +93,23 @@ def obtener_venta_detallada(
     if not venta:
         raise HTTPException(status_code=404, detail="Venta no encontrada")
     
-    # Obtener items
+    # Items con el nombre de su receta en una sola consulta
     items = session.exec(
-        select(VentaItem).where(VentaItem.venta_id == venta_id)
+        select(VentaItem, Receta.nombre)
+        .outerjoin(Receta, Receta.id == VentaItem.receta_id)
+        .where(VentaItem.venta_id == venta_id)
+        .order_by(VentaItem.id)
     ).all()
     
     items_detalle = []
-    for item in items:
-        receta = session.get(Receta, item.receta_id)
+    for item, receta_nombre in items:
         items_detalle.append({
             "receta_id": item.receta_id,
-            "receta_nombre": receta.nombre if receta else "N/A",
+            "receta_nombre": receta_nombre or "N/A",
             "cantidad": item.cantidad,
             "precio_unitario": item.precio_unitario,
-            "subtotal": item.subtotal
+            "subtotal": item.subtotal,
+            "lista_precios_version": item.lista_precios_version,
         })
     
     return {
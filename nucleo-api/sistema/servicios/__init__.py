@@ -0,0 +1,4 @@
+"""
+⚙️ Servicios de dominio - ELCAFESIN
+Lógica de negocio compartida por las rutas (ventas, costos, reportes)
+"""
@@ -0,0 +1,154 @@
+"""
+📅 ACUMULADOS DE VENTAS - ELCAFESIN
+Mantiene los acumulados por día (``venta_diaria``, ``venta_diaria_receta``)
+y por hora (``venta_hora``, ``venta_hora_receta``):
+
+- ``acumular_venta``: un UPSERT por tabla dentro de la transacción de la
+  venta, así los acumulados nunca quedan desfasados de la tabla ``venta``
+- ``reconstruir_acumulados``: recalcula desde el historial con
+  INSERT ... SELECT ... GROUP BY (datos previos a estas tablas, cargas
+  masivas o correcciones manuales)
+
+El día y la hora son los de ``creado_en`` (UTC, igual que el resto de
+reportes).
+"""
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import Date, Integer, bindparam, cast, delete, insert, text
+from sqlmodel import Session, func, select
+
+from sistema.entidades import (
+    Venta, VentaDiaria, VentaDiariaReceta, VentaHora, VentaHoraReceta, VentaItem
+)
+
+
+def _upsert(tabla: str, llave: Tuple[str, ...], sumas: Tuple[str, ...]):
+    columnas = llave + sumas
+    return text(
+        f"INSERT INTO {tabla} ({', '.join(columnas)}) "
+        f"VALUES ({', '.join(':' + c for c in columnas)}) "
+        f"ON CONFLICT ({', '.join(llave)}) DO UPDATE SET "
+        + ", ".join(f"{c} = {tabla}.{c} + excluded.{c}" for c in sumas)
+    ).bindparams(bindparam("fecha", type_=Date))
+
+
+_SQL_DIA = _upsert("venta_diaria", ("fecha", "sucursal"), ("num_ventas", "total"))
+_SQL_DIA_RECETA = _upsert(
+    "venta_diaria_receta", ("fecha", "sucursal", "receta_id"), ("unidades", "monto")
+)
+_SQL_HORA = _upsert("venta_hora", ("fecha", "hora", "sucursal"), ("num_ventas", "total"))
+_SQL_HORA_RECETA = _upsert(
+    "venta_hora_receta", ("fecha", "hora", "sucursal", "receta_id"),
+    ("num_ventas", "unidades", "monto"),
+)
+
+
+def clave_sucursal(sucursal: Optional[str]) -> str:
+    """Valor de ``sucursal`` en los acumulados (sin sucursal = "")"""
+    return sucursal or ""
+
+
+def acumular_venta(
+    session: Session,
+    creado_en: datetime,
+    sucursal: Optional[str],
+    total: float,
+    items: Iterable[Tuple[int, float, float]],
+) -> None:
+    """
+    Suma una venta a los acumulados en la transacción en curso.
+
+    ``items``: ``(receta_id, cantidad, subtotal)``; una receta repetida en el
+    ticket se combina antes de escribir.
+    """
+    base = {
+        "fecha": creado_en.date(), "hora": creado_en.hour,
+        "sucursal": clave_sucursal(sucursal),
+    }
+
+    por_receta: Dict[int, list] = {}
+    for receta_id, cantidad, subtotal in items:
+        acumulado = por_receta.setdefault(receta_id, [0.0, 0.0])
+        acumulado[0] += cantidad
+        acumulado[1] += subtotal
+    recetas = [
+        {**base, "receta_id": receta_id, "num_ventas": 1, "unidades": unidades, "monto": monto}
+        for receta_id, (unidades, monto) in por_receta.items()
+    ]
+
+    conexion = session.connection()
+    conexion.execute(_SQL_DIA, {**base, "num_ventas": 1, "total": total})
+    conexion.execute(_SQL_HORA, {**base, "num_ventas": 1, "total": total})
+    if recetas:
+        conexion.execute(_SQL_DIA_RECETA, recetas)
+        conexion.execute(_SQL_HORA_RECETA, recetas)
+
+
+def acumulados_pendientes(session: Session) -> bool:
+    """Hay ventas pero ningún acumulado (BD anterior a los acumulados)"""
+    hay_ventas = session.exec(select(Venta.id).limit(1)).first() is not None
+    return hay_ventas and session.exec(select(VentaHora.fecha).limit(1)).first() is None
+
+
+def reconstruir_acumulados(session: Session, desde: Optional[date] = None) -> Dict[str, int]:
+    """
+    Recalcula los acumulados desde ``desde`` (todo el historial si es None)
+    en una sola transacción. Devuelve cuántos renglones quedaron por tabla.
+    """
+    dia = func.date(Venta.creado_en)
+    hora = cast(func.strftime("%H", Venta.creado_en), Integer)
+    sucursal = func.coalesce(Venta.sucursal, "")
+
+    consultas = {
+        VentaDiaria: (
+            select(dia, sucursal, func.count(Venta.id), func.sum(Venta.total))
+            .group_by(dia, sucursal)
+        ),
+        VentaHora: (
+            select(dia, hora, sucursal, func.count(Venta.id), func.sum(Venta.total))
+            .group_by(dia, hora, sucursal)
+        ),
+        VentaDiariaReceta: (
+            select(
+                dia, sucursal, VentaItem.receta_id,
+                func.sum(VentaItem.cantidad), func.sum(VentaItem.subtotal),
+            )
+            .join(Venta, Venta.id == VentaItem.venta_id)
+            .group_by(dia, sucursal, VentaItem.receta_id)
+        ),
+        VentaHoraReceta: (
+            select(
+                dia, hora, sucursal, VentaItem.receta_id,
+                func.count(func.distinct(Venta.id)),
+                func.sum(VentaItem.cantidad), func.sum(VentaItem.subtotal),
+            )
+            .join(Venta, Venta.id == VentaItem.venta_id)
+            .group_by(dia, hora, sucursal, VentaItem.receta_id)
+        ),
+    }
+    columnas = {
+        VentaDiaria: ["fecha", "sucursal", "num_ventas", "total"],
+        VentaHora: ["fecha", "hora", "sucursal", "num_ventas", "total"],
+        VentaDiariaReceta: ["fecha", "sucursal", "receta_id", "unidades", "monto"],
+        VentaHoraReceta: [
+            "fecha", "hora", "sucursal", "receta_id", "num_ventas", "unidades", "monto"
+        ],
+    }
+
+    renglones = {}
+    for modelo, consulta in consultas.items():
+        borrar = delete(modelo)
+        if desde is not None:
+            borrar = borrar.where(modelo.fecha >= desde)
+            # Comparar la columna (no date(columna)) deja usar el índice
+            consulta = consulta.where(
+                Venta.creado_en >= datetime.combine(desde, datetime.min.time())
+            )
+        session.execute(borrar)
+        renglones[modelo.__tablename__] = session.execute(
+            insert(modelo).from_select(columnas[modelo], consulta)
+        ).rowcount
+    session.commit()
+
+    return renglones
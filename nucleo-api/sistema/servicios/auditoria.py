@@ -0,0 +1,387 @@
+"""
+📋 CONSULTA DE AUDITORÍA - ELCAFESIN
+Logs de sesión + movimientos de inventario en una sola consulta:
+
+    SELECT * FROM (logs de sesión JOIN usuario ... ORDER BY ... LIMIT n)
+    UNION ALL
+    SELECT * FROM (movimientos JOIN ingrediente ... ORDER BY ... LIMIT n)
+    ORDER BY creado_en DESC, tipo DESC, id DESC LIMIT n
+
+Cada rama usa el índice de ``creado_en`` y lee como máximo ``n`` filas, así
+que el costo no depende del tamaño del historial. La paginación es por
+cursor opaco sobre ``(creado_en, tipo, id)``.
+
+Los logs nuevos se publican en el bus de eventos después del commit (solo
+si hay algún stream abierto): un SELECT por transacción, sin importar
+cuántos suscriptores haya.
+"""
+import base64
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import String, and_, event, func, literal, or_, union_all
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session as SesionORM
+from sqlmodel import Session, select
+
+from sistema.configuracion.generaciones import al_confirmar, motor_de
+from sistema.entidades import Ingrediente, LogSesion, Movimiento, TipoMovimiento, Usuario
+from sistema.servicios.bus_eventos import buses
+
+logger = logging.getLogger(__name__)
+
+TIPOS = ("sesion", "movimiento")
+
+Cursor = Tuple[datetime, str, int]
+
+
+# ==================== CURSOR OPACO ====================
+
+def codificar_cursor(creado_en: datetime, tipo: str, id_: int) -> str:
+    crudo = json.dumps([creado_en.isoformat(), tipo, id_], separators=(",", ":"))
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Cursor:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        creado_en, tipo, id_ = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if tipo not in TIPOS:
+            raise ValueError(tipo)
+        return datetime.fromisoformat(creado_en), tipo, int(id_)
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+
+
+def _filtro_cursor(tipo: str, creado_en_col, id_col, cursor: Optional[Cursor], posteriores: bool):
+    """
+    Filas de la rama ``tipo`` anteriores (orden descendente, paginación) o
+    posteriores (orden ascendente, reanudar un stream) al cursor
+    """
+    if cursor is None:
+        return None
+    c_creado_en, c_tipo, c_id = cursor
+
+    if posteriores:
+        if tipo > c_tipo:
+            return creado_en_col >= c_creado_en
+        if tipo < c_tipo:
+            return creado_en_col > c_creado_en
+        return or_(
+            creado_en_col > c_creado_en,
+            and_(creado_en_col == c_creado_en, id_col > c_id),
+        )
+
+    if tipo < c_tipo:
+        return creado_en_col <= c_creado_en
+    if tipo > c_tipo:
+        return creado_en_col < c_creado_en
+    return or_(
+        creado_en_col < c_creado_en,
+        and_(creado_en_col == c_creado_en, id_col < c_id),
+    )
+
+
+def _ordenar(consulta, creado_en_col, id_col, posteriores: bool):
+    if posteriores:
+        return consulta.order_by(creado_en_col.asc(), id_col.asc())
+    return consulta.order_by(creado_en_col.desc(), id_col.desc())
+
+
+# ==================== RAMAS DE LA UNIÓN ====================
+
+def _select_sesion():
+    return (
+        select(
+            literal("sesion", String).label("tipo"),
+            LogSesion.id.label("id"),
+            LogSesion.creado_en.label("creado_en"),
+            Usuario.username.label("usuario"),
+            LogSesion.accion.label("accion"),
+            LogSesion.ip.label("ip"),
+            LogSesion.user_agent.label("user_agent"),
+            LogSesion.exito.label("exito"),
+            literal(None, String).label("ingrediente"),
+            literal(None, Movimiento.cantidad.type).label("cantidad"),
+            literal(None, Movimiento.tipo.type).label("tipo_movimiento"),
+            literal(None, String).label("referencia"),
+        )
+        .outerjoin(Usuario, Usuario.id == LogSesion.usuario_id)
+    )
+
+
+def _rama_sesion(cursor: Optional[Cursor], tope: int, posteriores: bool = False):
+    consulta = _select_sesion()
+    filtro = _filtro_cursor("sesion", LogSesion.creado_en, LogSesion.id, cursor, posteriores)
+    if filtro is not None:
+        consulta = consulta.where(filtro)
+    return (
+        _ordenar(consulta, LogSesion.creado_en, LogSesion.id, posteriores)
+        .limit(tope)
+        .subquery("sesiones")
+    )
+
+
+def _select_movimiento():
+    return (
+        select(
+            literal("movimiento", String).label("tipo"),
+            Movimiento.id.label("id"),
+            Movimiento.creado_en.label("creado_en"),
+            literal(None, String).label("usuario"),
+            literal(None, String).label("accion"),
+            literal(None, String).label("ip"),
+            literal(None, String).label("user_agent"),
+            literal(None, LogSesion.exito.type).label("exito"),
+            Ingrediente.nombre.label("ingrediente"),
+            Movimiento.cantidad.label("cantidad"),
+            Movimiento.tipo.label("tipo_movimiento"),
+            Movimiento.referencia.label("referencia"),
+        )
+        .outerjoin(Ingrediente, Ingrediente.id == Movimiento.ingrediente_id)
+    )
+
+
+def _rama_movimiento(cursor: Optional[Cursor], tope: int, posteriores: bool = False):
+    consulta = _select_movimiento()
+    filtro = _filtro_cursor("movimiento", Movimiento.creado_en, Movimiento.id, cursor, posteriores)
+    if filtro is not None:
+        consulta = consulta.where(filtro)
+    return (
+        _ordenar(consulta, Movimiento.creado_en, Movimiento.id, posteriores)
+        .limit(tope)
+        .subquery("movimientos")
+    )
+
+
+# ==================== FORMATO ====================
+
+def formatear_log(fila) -> dict:
+    """Fila de la unión -> diccionario que consume pantalla_logs.qml"""
+    if fila.tipo == "sesion":
+        return {
+            "id": f"sesion_{fila.id}",
+            "tipo": "sesion",
+            "usuario": fila.usuario or "Sistema",
+            "accion": fila.accion,
+            "detalles": {
+                "ip": fila.ip,
+                "user_agent": fila.user_agent,
+                "exito": fila.exito,
+            },
+            "fecha": fila.creado_en.isoformat(),
+        }
+
+    tipo_movimiento = TipoMovimiento(fila.tipo_movimiento).value
+    return {
+        "id": f"movimiento_{fila.id}",
+        "tipo": "movimiento",
+        "usuario": fila.referencia or "Sistema",
+        "accion": tipo_movimiento.upper(),
+        "detalles": {
+            "ingrediente": fila.ingrediente or "Desconocido",
+            "cantidad": fila.cantidad,
+            "tipo_movimiento": tipo_movimiento,
+            "referencia": fila.referencia,
+        },
+        "fecha": fila.creado_en.isoformat(),
+    }
+
+
+# ==================== CONSULTAS ====================
+
+def _consultar_union(session, tipos, posicion, tope, saltar, limite, posteriores):
+    ramas = []
+    if "sesion" in tipos:
+        ramas.append(_rama_sesion(posicion, tope, posteriores))
+    if "movimiento" in tipos:
+        ramas.append(_rama_movimiento(posicion, tope, posteriores))
+    if not ramas:
+        return []
+
+    union = union_all(*(select(rama) for rama in ramas)).subquery("logs")
+    columnas = (union.c.creado_en, union.c.tipo, union.c.id)
+    orden = [c.asc() for c in columnas] if posteriores else [c.desc() for c in columnas]
+    return session.execute(
+        select(union).order_by(*orden).offset(saltar).limit(limite)
+    ).all()
+
+
+def consultar_logs(
+    session: Session,
+    tipos: List[str],
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Devuelve una página de logs (más recientes primero) y el cursor de la
+    siguiente página (None si no hay más).
+
+    ``offset`` se mantiene por compatibilidad; con cursor se ignora.
+    """
+    posicion = decodificar_cursor(cursor) if cursor else None
+    saltar = 0 if posicion else offset
+    tope = saltar + limit + 1  # +1 para saber si hay otra página
+
+    filas = _consultar_union(session, tipos, posicion, tope, saltar, limit + 1, posteriores=False)
+
+    siguiente = None
+    if len(filas) > limit:
+        filas = filas[:limit]
+        ultima = filas[-1]
+        siguiente = codificar_cursor(ultima.creado_en, ultima.tipo, ultima.id)
+
+    return [formatear_log(fila) for fila in filas], siguiente
+
+
+def logs_posteriores(
+    session: Session, tipos: List[str], cursor: str, limite: int = 500
+) -> List[Tuple[str, dict]]:
+    """
+    Logs más nuevos que ``cursor`` en orden cronológico, cada uno con su
+    propio cursor (para reanudar un stream tras reconectar)
+    """
+    posicion = decodificar_cursor(cursor)
+    filas = _consultar_union(session, tipos, posicion, limite, 0, limite, posteriores=True)
+    return [
+        (codificar_cursor(fila.creado_en, fila.tipo, fila.id), formatear_log(fila))
+        for fila in filas
+    ]
+
+
+def logs_por_id(conexion: Connection, ids: Dict[str, Iterable[int]]) -> List[Tuple[str, dict]]:
+    """Logs concretos (``{"sesion": [...], "movimiento": [...]}``) en orden cronológico"""
+    ramas = []
+    if ids.get("sesion"):
+        ramas.append(_select_sesion().where(LogSesion.id.in_(ids["sesion"])))
+    if ids.get("movimiento"):
+        ramas.append(_select_movimiento().where(Movimiento.id.in_(ids["movimiento"])))
+    if not ramas:
+        return []
+
+    union = union_all(*ramas).subquery("logs")
+    filas = conexion.execute(
+        select(union).order_by(union.c.creado_en, union.c.tipo, union.c.id)
+    ).all()
+    return [
+        (codificar_cursor(fila.creado_en, fila.tipo, fila.id), formatear_log(fila))
+        for fila in filas
+    ]
+
+
+def consultar_kardex(
+    session: Session,
+    limit: int,
+    ingrediente_id: Optional[int] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Movimientos de inventario (más recientes primero) con el nombre del
+    ingrediente en la misma consulta, paginados por el mismo cursor que los
+    logs.
+    """
+    consulta = (
+        select(Movimiento, Ingrediente.nombre)
+        .outerjoin(Ingrediente, Ingrediente.id == Movimiento.ingrediente_id)
+    )
+    if ingrediente_id:
+        consulta = consulta.where(Movimiento.ingrediente_id == ingrediente_id)
+    if desde:
+        consulta = consulta.where(Movimiento.creado_en >= desde)
+    if hasta:
+        consulta = consulta.where(Movimiento.creado_en <= hasta)
+    if cursor:
+        posicion = decodificar_cursor(cursor)
+        if posicion[1] != "movimiento":
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+        consulta = consulta.where(_filtro_cursor(
+            "movimiento", Movimiento.creado_en, Movimiento.id, posicion, posteriores=False,
+        ))
+
+    filas = session.exec(
+        _ordenar(consulta, Movimiento.creado_en, Movimiento.id, posteriores=False)
+        .limit(limit + 1)
+    ).all()
+
+    siguiente = None
+    if len(filas) > limit:
+        filas = filas[:limit]
+        ultimo = filas[-1][0]
+        siguiente = codificar_cursor(ultimo.creado_en, "movimiento", ultimo.id)
+
+    return [
+        {
+            "id": mov.id,
+            "ingrediente_id": mov.ingrediente_id,
+            "ingrediente_nombre": nombre or "N/A",
+            "tipo": mov.tipo,
+            "cantidad": mov.cantidad,
+            "referencia": mov.referencia,
+            "fecha": mov.creado_en,
+        }
+        for mov, nombre in filas
+    ], siguiente
+
+
+def contar_logs(session: Session, tipos: List[str], exacto: bool = False) -> int:
+    """
+    Total de logs. Por defecto aproximado con MAX(id) (una lectura del
+    índice de la PK); ``exacto`` hace COUNT(*) sobre las tablas.
+    """
+    total = 0
+    for tipo, modelo in (("sesion", LogSesion), ("movimiento", Movimiento)):
+        if tipo in tipos:
+            agregado = func.count() if exacto else func.max(modelo.id)
+            total += session.exec(select(agregado).select_from(modelo)).one() or 0
+    return total
+
+
+# ==================== PUBLICACIÓN EN EL BUS ====================
+
+_CLAVE_NUEVOS = "_logs_nuevos"
+
+
+def registrar_logs_nuevos(session: Session, tipo: str, ids: Iterable[int]) -> None:
+    """
+    Anota logs insertados en la transacción en curso para publicarlos al
+    hacer commit. Las filas añadidas con ``session.add`` se detectan solas;
+    las inserciones masivas (``insert(...)``) deben llamar a esta función.
+    """
+    engine = motor_de(session)
+    if not buses.para(engine).activo:
+        return
+
+    pendientes = session.info.get(_CLAVE_NUEVOS)
+    if pendientes is None:
+        pendientes = session.info[_CLAVE_NUEVOS] = {tipo_: [] for tipo_ in TIPOS}
+        al_confirmar(session, lambda: _publicar(engine, session.info.pop(_CLAVE_NUEVOS, {})))
+    pendientes[tipo].extend(ids)
+
+
+def _publicar(engine, ids: Dict[str, List[int]]) -> None:
+    try:
+        with engine.connect() as conexion:
+            eventos = logs_por_id(conexion, ids)
+        buses.para(engine).publicar(eventos)
+    except Exception:
+        # El commit ya ocurrió; un stream sin este evento se recupera por cursor
+        logger.exception("No se pudieron publicar logs nuevos")
+
+
+@event.listens_for(SesionORM, "after_rollback")
+def _descartar_logs_nuevos(session: SesionORM) -> None:
+    session.info.pop(_CLAVE_NUEVOS, None)
+
+
+@event.listens_for(SesionORM, "after_flush")
+def _detectar_logs_nuevos(session: SesionORM, contexto) -> None:
+    for tipo, modelo in (("sesion", LogSesion), ("movimiento", Movimiento)):
+        ids = [obj.id for obj in session.new if isinstance(obj, modelo)]
+        if ids:
+            registrar_logs_nuevos(session, tipo, ids)
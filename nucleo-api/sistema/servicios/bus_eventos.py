@@ -0,0 +1,91 @@
+"""
+📡 BUS DE EVENTOS - ELCAFESIN
+Reparto en proceso de los logs recién confirmados a los streams abiertos.
+
+El publicador (un hilo de request cualquiera) entrega cada lote una sola
+vez al bus; el bus lo copia en la cola asyncio de cada suscriptor cuyo
+filtro de ``tipo`` coincida. Si un suscriptor no consume y su cola se
+llena, se marca como desbordado: su stream termina pidiendo reconexión y
+el cliente reanuda por cursor desde la BD.
+"""
+import asyncio
+import threading
+from dataclasses import dataclass, field
+from typing import FrozenSet, Iterable, List, Set, Tuple
+
+from sistema.configuracion.generaciones import CachePorMotor
+
+# (cursor, log formateado como en GET /logs)
+Evento = Tuple[str, dict]
+
+
+@dataclass(eq=False)
+class Suscripcion:
+    """Cola de eventos de un stream, atada al event loop que la creó"""
+    tipos: FrozenSet[str]
+    cola: asyncio.Queue
+    loop: asyncio.AbstractEventLoop
+    desbordada: bool = False
+
+    def _entregar(self, eventos: List[Evento]) -> None:
+        # Corre en el loop del suscriptor
+        for evento in eventos:
+            if self.desbordada:
+                return
+            if evento[1]["tipo"] not in self.tipos:
+                continue
+            try:
+                self.cola.put_nowait(evento)
+            except asyncio.QueueFull:
+                self.desbordada = True
+
+
+@dataclass
+class BusEventos:
+    """Suscriptores activos de un engine"""
+    _suscripciones: Set[Suscripcion] = field(default_factory=set)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @property
+    def activo(self) -> bool:
+        return bool(self._suscripciones)
+
+    def suscribir(self, tipos: Iterable[str], maximo: int) -> Suscripcion:
+        """Debe llamarse desde el event loop que consumirá la cola"""
+        suscripcion = Suscripcion(
+            tipos=frozenset(tipos),
+            cola=asyncio.Queue(maxsize=maximo),
+            loop=asyncio.get_running_loop(),
+        )
+        with self._lock:
+            self._suscripciones.add(suscripcion)
+        return suscripcion
+
+    def cancelar(self, suscripcion: Suscripcion) -> None:
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            suscripciones = list(self._suscripciones)
+        return {
+            "suscriptores": len(suscripciones),
+            "pendientes": sum(s.cola.qsize() for s in suscripciones),
+        }
+
+    def publicar(self, eventos: List[Evento]) -> None:
+        """Seguro desde cualquier hilo; no bloquea al publicador"""
+        if not eventos:
+            return
+        with self._lock:
+            suscripciones = list(self._suscripciones)
+
+        for suscripcion in suscripciones:
+            try:
+                suscripcion.loop.call_soon_threadsafe(suscripcion._entregar, eventos)
+            except RuntimeError:
+                # Loop cerrado: el stream ya no existe
+                self.cancelar(suscripcion)
+
+
+buses: "CachePorMotor[BusEventos]" = CachePorMotor(BusEventos)
@@ -0,0 +1,259 @@
+"""
+🧮 CAPACIDAD DE PRODUCCIÓN - ELCAFESIN
+"¿Cuántos lattes puedo vender todavía?" a partir del stock actual:
+
+    unidades(receta) = min over items of stock / (cantidad × (1 + merma))
+
+con las subrecetas explotadas a ingredientes, y el ingrediente que da ese mínimo (cuello de botella). En modo mezcla las
+recetas comparten ingredientes según una proporción objetivo.
+
+La tabla de capacidades vive en memoria y se actualiza por ingrediente:
+- ``registrar_venta`` descuenta el consumo del ticket tras el commit
+- un flush que cambie ``Ingrediente.stock`` (reabasto por PUT/PATCH) fija el
+  nuevo valor tras el commit
+- cada ``CAPACIDAD_REFRESCO_SEGUNDOS`` se relee el stock (una consulta) para
+  incorporar lo que escribieron otros workers (el tablero puede ir atrasado
+  a lo más ese intervalo respecto a ellos)
+
+La relectura se descarta si mientras corría hubo un descuento o un stock
+fijado (la época cambió) o si había una venta propia en curso: no se sabe
+si la foto ya incluye ese ticket, y aplicarla contaría la venta dos veces o
+pisaría el descuento. La siguiente llamada vuelve a intentarlo.
+
+En todos los casos solo se recalculan las recetas que usan los ingredientes
+que cambiaron (índice inverso). La estructura de recetas sale de la cache de
+costos y se reconstruye con sus mismas invalidaciones.
+"""
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session as SesionORM
+from sqlmodel import Session, select
+
+from sistema.configuracion.ajustes import obtener_ajustes
+from sistema.configuracion.generaciones import CachePorMotor, al_confirmar, motor_de
+from sistema.entidades import Ingrediente, Receta
+from sistema.servicios.costos_recetas import caches as caches_costos
+from sistema.servicios.explosion_recetas import consulta_explosion
+
+# Margen para que 3.0000000001 / 1.0 cuente como 3 unidades enteras
+_TOLERANCIA = 1e-9
+
+_CLAVE_CONSUMOS = "_capacidad_consumos"
+
+
+@dataclass
+class EstructuraCapacidad:
+    nombres: Dict[int, str]  # receta_id -> nombre (orden alfabético)
+    requisitos: Dict[int, List[Tuple[int, float]]]  # receta_id -> [(ingrediente_id, por unidad)]
+    usos: Dict[int, List[int]]  # ingrediente_id -> recetas que lo usan
+    ingredientes: Dict[int, str]  # ingrediente_id -> nombre
+
+
+@dataclass(frozen=True)
+class Capacidad:
+    unidades: Optional[int]  # None = sin límite (receta sin ingredientes)
+    cuello_botella: Optional[int]  # ingrediente_id
+
+
+Tablero = Tuple[EstructuraCapacidad, Dict[int, float], Dict[int, Capacidad]]
+
+
+def construir_estructura(session: Session) -> EstructuraCapacidad:
+    nombres = dict(session.exec(select(Receta.id, Receta.nombre).order_by(Receta.nombre)).all())
+    requisitos: Dict[int, List[Tuple[int, float]]] = {receta_id: [] for receta_id in nombres}
+    usos: Dict[int, List[int]] = {}
+    ingredientes: Dict[int, str] = {}
+
+    explosion = consulta_explosion().subquery()
+    for receta_id, ingrediente_id, nombre, por_unidad in session.exec(
+        select(explosion.c.raiz, Ingrediente.id, Ingrediente.nombre, explosion.c.cantidad)
+        .join(Ingrediente, Ingrediente.id == explosion.c.ingrediente_id)
+    ):
+        if por_unidad <= 0 or receta_id not in requisitos:
+            continue
+        requisitos[receta_id].append((ingrediente_id, por_unidad))
+        usos.setdefault(ingrediente_id, []).append(receta_id)
+        ingredientes[ingrediente_id] = nombre
+
+    return EstructuraCapacidad(nombres, requisitos, usos, ingredientes)
+
+
+def _calcular(requisitos: List[Tuple[int, float]], stock: Mapping[int, float]) -> Capacidad:
+    unidades, cuello = math.inf, None
+    for ingrediente_id, por_unidad in requisitos:
+        posibles = max(stock.get(ingrediente_id, 0.0), 0.0) / por_unidad
+        if posibles < unidades:
+            unidades, cuello = posibles, ingrediente_id
+    if cuello is None:
+        return Capacidad(None, None)
+    return Capacidad(math.floor(unidades + _TOLERANCIA), cuello)
+
+
+class MotorCapacidad:
+    """Stock y capacidad por receta de una base de datos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._estructura: Optional[EstructuraCapacidad] = None
+        self._stock: Dict[int, float] = {}
+        self._capacidad: Dict[int, Capacidad] = {}
+        self._refrescado_en = 0.0
+        # Sube con cada descuento o stock fijado: una relectura que empezó
+        # antes no se aplica
+        self._epoca = 0
+        self._ventas_en_curso = 0  # Consumo registrado y aún sin commit/rollback
+        self.recalculadas = 0
+
+    def tablero(self, session: Session) -> Tablero:
+        """Estructura, stock y capacidades vigentes (copias)"""
+        estructura = caches_costos.para_sesion(session).derivado(
+            session, "capacidad", construir_estructura
+        )
+        vencido = (
+            time.monotonic() - self._refrescado_en >= obtener_ajustes().CAPACIDAD_REFRESCO_SEGUNDOS
+        )
+        if estructura is not self._estructura or vencido:
+            with self._lock:
+                epoca = self._epoca
+            stock = dict(session.exec(select(Ingrediente.id, Ingrediente.stock)).all())
+            with self._lock:
+                vigente = epoca == self._epoca and not self._ventas_en_curso
+                if estructura is not self._estructura:
+                    # Sin foto anterior que conservar: se usa esta y, si no
+                    # es vigente, se relee en la próxima llamada
+                    self._estructura = estructura
+                    self._stock = stock
+                    self._capacidad = {}
+                    self._recalcular(estructura.requisitos.keys())
+                elif vigente:
+                    self._fijar(stock)
+                self._refrescado_en = time.monotonic() if vigente else 0.0
+
+        with self._lock:
+            return self._estructura, dict(self._stock), dict(self._capacidad)
+
+    def iniciar_consumo(self) -> None:
+        """Una venta reservó stock y aún no confirma (ver ``registrar_consumo``)"""
+        with self._lock:
+            self._ventas_en_curso += 1
+            self._epoca += 1
+
+    def consumir(self, consumo: Mapping[int, float]) -> None:
+        """Descuenta ``ingrediente_id -> cantidad`` (venta confirmada)"""
+        with self._lock:
+            self._ventas_en_curso -= 1
+            self._fijar({
+                ingrediente_id: self._stock.get(ingrediente_id, 0.0) - cantidad
+                for ingrediente_id, cantidad in consumo.items()
+            })
+
+    def cancelar_consumo(self) -> None:
+        with self._lock:
+            self._ventas_en_curso -= 1
+            self._epoca += 1
+
+    def fijar_stock(self, stock: Mapping[int, float]) -> None:
+        with self._lock:
+            self._fijar(stock)
+
+    def _fijar(self, stock: Mapping[int, float]) -> None:
+        self._epoca += 1
+        cambiados = [i for i, valor in stock.items() if self._stock.get(i) != valor]
+        self._stock.update(stock)
+        if self._estructura is None:
+            return
+        recetas = set()
+        for ingrediente_id in cambiados:
+            recetas.update(self._estructura.usos.get(ingrediente_id, ()))
+        self._recalcular(recetas)
+
+    def _recalcular(self, receta_ids: Iterable[int]) -> None:
+        requisitos = self._estructura.requisitos
+        for receta_id in receta_ids:
+            self._capacidad[receta_id] = _calcular(requisitos[receta_id], self._stock)
+            self.recalculadas += 1
+
+
+motores = CachePorMotor(MotorCapacidad)
+
+
+def capacidades(session: Session) -> Tablero:
+    return motores.para_sesion(session).tablero(session)
+
+
+def capacidad_mezcla(
+    estructura: EstructuraCapacidad, stock: Mapping[int, float], mezcla: Mapping[int, float]
+) -> dict:
+    """
+    Cuántas veces cabe la mezcla ``receta_id -> unidades`` con ``stock``,
+    repartiendo los ingredientes compartidos:
+
+        veces = min over ingredientes of stock / Σ_recetas unidades × por_unidad
+    """
+    demanda: Dict[int, float] = {}
+    for receta_id, unidades in mezcla.items():
+        for ingrediente_id, por_unidad in estructura.requisitos[receta_id]:
+            demanda[ingrediente_id] = demanda.get(ingrediente_id, 0.0) + unidades * por_unidad
+
+    veces, cuello = math.inf, None
+    for ingrediente_id, cantidad in demanda.items():
+        if cantidad <= 0:
+            continue
+        posibles = max(stock.get(ingrediente_id, 0.0), 0.0) / cantidad
+        if posibles < veces:
+            veces, cuello = posibles, ingrediente_id
+
+    return {
+        "veces": None if cuello is None else veces,
+        "cuello_botella": cuello,
+        "unidades": {
+            receta_id: None if cuello is None else math.floor(unidades * veces + _TOLERANCIA)
+            for receta_id, unidades in mezcla.items()
+        },
+        "uso_ingredientes": {
+            ingrediente_id: cantidad * (1.0 if cuello is None else veces)
+            for ingrediente_id, cantidad in demanda.items()
+        },
+    }
+
+
+def registrar_consumo(session: Session, consumo: Mapping[int, float]) -> None:
+    """
+    Descuenta ``consumo`` de la capacidad en memoria si la transacción
+    confirma. Hasta que termine, la venta cuenta como en curso y las
+    relecturas de stock no se aplican.
+    """
+    motor = motores.para(motor_de(session))
+    motor.iniciar_consumo()
+    session.info.setdefault(_CLAVE_CONSUMOS, []).append((motor, dict(consumo)))
+
+
+@event.listens_for(SesionORM, "after_commit")
+def _aplicar_consumos(session) -> None:
+    for motor, consumo in session.info.pop(_CLAVE_CONSUMOS, ()):
+        motor.consumir(consumo)
+
+
+@event.listens_for(SesionORM, "after_transaction_end")
+def _cancelar_consumos(session, transaccion) -> None:
+    # Rollback o sesión cerrada sin commit (after_commit ya se llevó los suyos)
+    if transaccion.parent is None:
+        for motor, _ in session.info.pop(_CLAVE_CONSUMOS, ()):
+            motor.cancelar_consumo()
+
+
+@event.listens_for(SesionORM, "after_flush")
+def _detectar_cambios_stock(session, contexto) -> None:
+    stock = {
+        obj.id: obj.stock
+        for obj in session.dirty
+        if isinstance(obj, Ingrediente) and inspect(obj).attrs.stock.history.has_changes()
+    }
+    if stock:
+        motor = motores.para(motor_de(session))
+        al_confirmar(session, lambda: motor.fijar_stock(stock))
@@ -0,0 +1,420 @@
+"""
+💵 CACHE DE COSTOS DE RECETAS - ELCAFESIN
+Costo total, precio sugerido y detalle de items de cada receta, calculados
+una vez y reutilizados hasta que cambie algo de lo que dependen.
+
+El stock (que cambia con cada venta) no se cachea: se lee en una sola
+consulta para todos los ingredientes de la respuesta.
+
+Junto a los costos se mantiene el índice inverso ``ingrediente -> recetas``
+(construido de ``receta_item`` en una consulta) para saber al instante qué
+recetas mueve un cambio de precio (``impacto_precios``).
+
+Invalidación (solo de las recetas afectadas):
+- Un flush que cambie ``costo_por_unidad``, ``nombre`` o ``unidad`` de un
+  Ingrediente (o lo borre) invalida las recetas que lo usan.
+- Un flush que cree, edite o borre una Receta o un RecetaItem invalida esa
+  receta (``_guardar_items``, edición de margen, etc.) y el índice inverso.
+- En ambos casos también se invalidan las recetas que usan a las afectadas
+  como subreceta, a cualquier nivel.
+- En ambos casos se incrementa la generación "costos_recetas"; los demás
+  workers la revisan cada ``COSTOS_REVISION_SEGUNDOS`` y vacían su cache si
+  cambió por una escritura ajena.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session as SesionORM, aliased
+from sqlmodel import Session, select
+
+from sistema.configuracion.ajustes import obtener_ajustes
+from sistema.configuracion.generaciones import (
+    CachePorMotor, al_confirmar, incrementar_generacion, leer_generacion, motor_de
+)
+from sistema.entidades import Ingrediente, Receta, RecetaItem
+from sistema.servicios.explosion_recetas import (
+    ascendientes, consulta_explosion, subconsulta_descendientes
+)
+
+GENERACION = "costos_recetas"
+
+# Campos de Ingrediente que forman parte del costo o del detalle cacheado
+CAMPOS_INGREDIENTE = ("costo_por_unidad", "nombre", "unidad")
+
+_CLAVE_AFECTADAS = "_costos_afectados"
+_CLAVE_INDICE = "_costos_indice"
+
+
+@dataclass(frozen=True)
+class ItemCosto:
+    ingrediente_id: Optional[int]
+    ingrediente_nombre: str  # Nombre de la subreceta si el item es una
+    cantidad: float
+    merma: float
+    costo_unitario: float  # Por unidad de ingrediente o de subreceta
+    unidad: Optional[str]
+    subreceta_id: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class CostoReceta:
+    margen: float
+    costo_total: float  # Sin redondear
+    precio_sugerido: float
+    items: Tuple[ItemCosto, ...]
+
+
+def calcular_costos(session: Session, recetas: Iterable[Receta]) -> Dict[int, CostoReceta]:
+    """
+    Calcula el costo de varias recetas (sin cache) con una sola consulta que
+    trae los items de las recetas y de todas sus subrecetas.
+
+    El DAG se recorre con memo: una subreceta que aparece en varias ramas se
+    costea una vez. Los items cuyo ingrediente o subreceta ya no existe se
+    ignoran.
+    """
+    recetas = {receta.id: receta for receta in recetas}
+    if not recetas:
+        return {}
+
+    Subreceta = aliased(Receta)
+    filas = session.exec(
+        select(
+            RecetaItem.receta_id,
+            RecetaItem.cantidad,
+            RecetaItem.merma,
+            Ingrediente.id,
+            Ingrediente.nombre,
+            Ingrediente.costo_por_unidad,
+            Ingrediente.unidad,
+            Subreceta.id,
+            Subreceta.nombre,
+        )
+        .outerjoin(Ingrediente, Ingrediente.id == RecetaItem.ingrediente_id)
+        .outerjoin(Subreceta, Subreceta.id == RecetaItem.subreceta_id)
+        .where(RecetaItem.receta_id.in_(subconsulta_descendientes(recetas.keys())))
+        .order_by(RecetaItem.receta_id, RecetaItem.id)
+    ).all()
+
+    crudos: Dict[int, list] = {}
+    for receta_id, *fila in filas:
+        ing_id, sub_id = fila[2], fila[6]
+        if ing_id is not None or sub_id is not None:
+            crudos.setdefault(receta_id, []).append(fila)
+
+    memo: Dict[int, float] = {}
+
+    def costo_unitario(receta_id: int, camino: FrozenSet[int]) -> float:
+        if receta_id in memo:
+            return memo[receta_id]
+        if receta_id in camino:
+            return 0.0  # Ciclo en datos que no pasaron por la validación
+        camino = camino | {receta_id}
+        memo[receta_id] = sum(
+            cantidad * (1 + (merma or 0.0))
+            * (costo if ing_id is not None else costo_unitario(sub_id, camino))
+            for cantidad, merma, ing_id, _, costo, _, sub_id, _ in crudos.get(receta_id, ())
+        )
+        return memo[receta_id]
+
+    margen_default = obtener_ajustes().MARGIN_DEFAULT
+    costos = {}
+    for receta_id, receta in recetas.items():
+        items = tuple(
+            ItemCosto(ing_id, nombre, cantidad, merma or 0.0, costo, unidad)
+            if ing_id is not None else
+            ItemCosto(
+                None, sub_nombre, cantidad, merma or 0.0,
+                costo_unitario(sub_id, frozenset()), None, sub_id,
+            )
+            for cantidad, merma, ing_id, nombre, costo, unidad, sub_id, sub_nombre
+            in crudos.get(receta_id, ())
+        )
+        costo_total = costo_unitario(receta_id, frozenset())
+        # Un margen 0 explícito se respeta (solo None toma el default)
+        margen = receta.margen if receta.margen is not None else margen_default
+        costos[receta_id] = CostoReceta(
+            margen=margen,
+            costo_total=costo_total,
+            precio_sugerido=costo_total * (1 + margen),
+            items=items,
+        )
+    return costos
+
+
+class CacheCostos:
+    """Costos de recetas de una base de datos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._costos: Dict[int, CostoReceta] = {}
+        self._por_ingrediente: Optional[Dict[int, Set[int]]] = None
+        # Estructuras de todo el menú (ej. la matriz de la simulación)
+        self._derivados: Dict[str, Any] = {}
+        # Sube con cada invalidación: un cálculo que empezó antes no se guarda
+        self._epoca = 0
+        self._generacion: Optional[int] = None
+        self._revisada_en = 0.0
+        self.aciertos = 0
+        self.calculadas = 0
+
+    def obtener(self, session: Session, recetas: Iterable[Receta]) -> Dict[int, CostoReceta]:
+        self._revisar_generacion(session)
+        recetas = list(recetas)
+
+        with self._lock:
+            costos = {r.id: self._costos[r.id] for r in recetas if r.id in self._costos}
+            epoca = self._epoca
+        faltantes = [r for r in recetas if r.id not in costos]
+        self.aciertos += len(costos)
+
+        if faltantes:
+            nuevos = calcular_costos(session, faltantes)
+            self.calculadas += len(nuevos)
+            with self._lock:
+                if epoca == self._epoca:
+                    self._costos.update(nuevos)
+            costos.update(nuevos)
+        return costos
+
+    def recetas_de(self, session: Session, ingrediente_ids: Iterable[int]) -> Set[int]:
+        """Recetas que usan alguno de ``ingrediente_ids`` (índice inverso)"""
+        self._revisar_generacion(session)
+        with self._lock:
+            indice, epoca = self._por_ingrediente, self._epoca
+
+        if indice is None:
+            indice = {}
+            explosion = consulta_explosion().subquery()
+            for ingrediente_id, receta_id in session.execute(
+                select(explosion.c.ingrediente_id, explosion.c.raiz)
+            ):
+                indice.setdefault(ingrediente_id, set()).add(receta_id)
+            with self._lock:
+                if epoca == self._epoca:
+                    self._por_ingrediente = indice
+
+        recetas: Set[int] = set()
+        for ingrediente_id in ingrediente_ids:
+            recetas |= indice.get(ingrediente_id, set())
+        return recetas
+
+    def derivado(self, session: Session, nombre: str, fabrica: Callable[[Session], Any]) -> Any:
+        """
+        Valor calculado a partir de todas las recetas; cualquier invalidación
+        lo descarta.
+        """
+        self._revisar_generacion(session)
+        with self._lock:
+            valor, epoca = self._derivados.get(nombre), self._epoca
+
+        if valor is None:
+            valor = fabrica(session)
+            with self._lock:
+                if epoca == self._epoca:
+                    self._derivados[nombre] = valor
+        return valor
+
+    def invalidar(self, receta_ids: Iterable[int], indice: bool = False) -> None:
+        with self._lock:
+            for receta_id in receta_ids:
+                self._costos.pop(receta_id, None)
+            if indice:
+                self._por_ingrediente = None
+            self._derivados.clear()
+            self._epoca += 1
+
+    def vaciar(self) -> None:
+        with self._lock:
+            self._costos.clear()
+            self._por_ingrediente = None
+            self._derivados.clear()
+            self._epoca += 1
+
+    def confirmar_generacion(self, anterior: int, nueva: int) -> None:
+        """Escritura propia: avanzar la generación sin vaciar lo demás"""
+        with self._lock:
+            if self._generacion == anterior:
+                self._generacion = nueva
+
+    @property
+    def epoca(self) -> int:
+        return self._epoca
+
+    def sincronizar(self, session: Session) -> Tuple[int, int]:
+        """
+        Revisa la generación sin esperar el intervalo y devuelve la
+        ``(generación, época)`` con la que quedó la cache: lo que se arme con
+        ella corresponde a esa generación mientras la época no cambie.
+        """
+        self._revisar_generacion(session, forzar=True)
+        with self._lock:
+            return self._generacion, self._epoca
+
+    def estadisticas(self) -> dict:
+        return {
+            "recetas": len(self._costos),
+            "ingredientes_indexados": len(self._por_ingrediente or ()),
+            "aciertos": self.aciertos,
+            "calculadas": self.calculadas,
+        }
+
+    def _revisar_generacion(self, session: Session, forzar: bool = False) -> None:
+        intervalo = obtener_ajustes().COSTOS_REVISION_SEGUNDOS
+        if not forzar and time.monotonic() - self._revisada_en < intervalo:
+            return
+
+        generacion = leer_generacion(session, GENERACION)
+        with self._lock:
+            if self._generacion is not None and generacion != self._generacion:
+                self._costos.clear()
+                self._por_ingrediente = None
+                self._derivados.clear()
+                self._epoca += 1
+            self._generacion = generacion
+            self._revisada_en = time.monotonic()
+
+
+caches = CachePorMotor(CacheCostos)
+
+
+def costos_recetas(session: Session, recetas: Iterable[Receta]) -> Dict[int, CostoReceta]:
+    """``receta_id -> CostoReceta`` desde la cache (calcula solo las faltantes)"""
+    return caches.para_sesion(session).obtener(session, recetas)
+
+
+def invalidar_costos(session: Session, receta_ids: Iterable[int], indice: bool = False) -> None:
+    """
+    Invalida el costo de ``receta_ids`` (y el índice inverso si ``indice``,
+    es decir, si cambiaron los items) al confirmar la transacción en curso.
+
+    Lo llama automáticamente el hook de flush; úsese a mano solo para
+    escrituras que no pasan por el ORM (UPDATE masivos de precios).
+    """
+    pendientes: Set[int] = session.info.get(_CLAVE_AFECTADAS)
+    if pendientes is None:
+        pendientes = session.info[_CLAVE_AFECTADAS] = set()
+        cache = caches.para(motor_de(session))
+        anterior = leer_generacion(session, GENERACION)
+        incrementar_generacion(session, GENERACION)
+
+        def aplicar():
+            cache.invalidar(
+                session.info.pop(_CLAVE_AFECTADAS, ()),
+                indice=session.info.pop(_CLAVE_INDICE, False),
+            )
+            cache.confirmar_generacion(anterior, anterior + 1)
+
+        al_confirmar(session, aplicar)
+    pendientes.update(receta_ids)
+    if indice:
+        session.info[_CLAVE_INDICE] = True
+
+
+@event.listens_for(SesionORM, "after_rollback")
+def _descartar_afectadas(session) -> None:
+    session.info.pop(_CLAVE_AFECTADAS, None)
+    session.info.pop(_CLAVE_INDICE, None)
+
+
+def recetas_con_ingrediente(session: Session, ingrediente_ids: Iterable[int]) -> Set[int]:
+    return caches.para_sesion(session).recetas_de(session, ingrediente_ids)
+
+
+def impacto_precios(session: Session, nuevos: Mapping[int, float]) -> List[dict]:
+    """
+    Recetas que cambian si ``ingrediente_id -> costo_por_unidad`` se aplica,
+    con su costo y precio actuales y los que tendrían.
+
+    Solo toca las recetas dependientes (índice inverso, incluye las que usan
+    el ingrediente a través de subrecetas) y ajusta su costo cacheado con la
+    diferencia de precio por la cantidad explotada, sin recalcularlas.
+    """
+    receta_ids = recetas_con_ingrediente(session, nuevos.keys())
+    if not receta_ids:
+        return []
+
+    recetas = session.exec(
+        select(Receta).where(Receta.id.in_(receta_ids)).order_by(Receta.nombre)
+    ).all()
+    costos = costos_recetas(session, recetas)
+
+    explosion = consulta_explosion(receta_ids).subquery()
+    diferencias: Dict[int, float] = {}
+    for receta_id, ingrediente_id, cantidad, costo_actual in session.execute(
+        select(
+            explosion.c.raiz, explosion.c.ingrediente_id, explosion.c.cantidad,
+            Ingrediente.costo_por_unidad,
+        )
+        .join(Ingrediente, Ingrediente.id == explosion.c.ingrediente_id)
+        .where(explosion.c.ingrediente_id.in_(list(nuevos.keys())))
+    ):
+        diferencias[receta_id] = (
+            diferencias.get(receta_id, 0.0) + cantidad * (nuevos[ingrediente_id] - costo_actual)
+        )
+
+    impacto = []
+    for receta in recetas:
+        costo = costos[receta.id]
+        costo_nuevo = costo.costo_total + diferencias.get(receta.id, 0.0)
+        precio_nuevo = costo_nuevo * (1 + costo.margen)
+        impacto.append({
+            "receta_id": receta.id,
+            "receta_nombre": receta.nombre,
+            "costo_actual": round(costo.costo_total, 2),
+            "costo_nuevo": round(costo_nuevo, 2),
+            "precio_actual": round(costo.precio_sugerido, 2),
+            "precio_nuevo": round(precio_nuevo, 2),
+            "diferencia_precio": round(precio_nuevo - costo.precio_sugerido, 2),
+        })
+    return impacto
+
+
+def _cambio_costo(ingrediente: Ingrediente) -> bool:
+    estado = inspect(ingrediente)
+    return any(estado.attrs[campo].history.has_changes() for campo in CAMPOS_INGREDIENTE)
+
+
+@event.listens_for(SesionORM, "after_flush")
+def _detectar_cambios_costos(session, contexto) -> None:
+    recetas: Set[int] = set()
+    ingredientes: Set[int] = set()
+    items = False  # Cambió algún RecetaItem: el índice inverso ya no sirve
+
+    for obj in session.new:
+        if isinstance(obj, Receta):
+            recetas.add(obj.id)  # Un id reutilizado no debe heredar la entrada anterior
+        elif isinstance(obj, RecetaItem):
+            recetas.add(obj.receta_id)
+            items = True
+    for obj in session.dirty:
+        if isinstance(obj, (Receta, RecetaItem)) and session.is_modified(obj):
+            if isinstance(obj, Receta):
+                recetas.add(obj.id)
+            else:
+                recetas.add(obj.receta_id)
+                items = True
+        elif isinstance(obj, Ingrediente) and _cambio_costo(obj):
+            ingredientes.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Receta):
+            recetas.add(obj.id)
+            items = True
+        elif isinstance(obj, RecetaItem):
+            recetas.add(obj.receta_id)
+            items = True
+        elif isinstance(obj, Ingrediente):
+            ingredientes.add(obj.id)
+
+    if ingredientes:
+        recetas.update(session.execute(
+            select(RecetaItem.receta_id.distinct())
+            .where(RecetaItem.ingrediente_id.in_(ingredientes))
+        ).scalars())
+
+    if recetas:
+        # Las recetas que usan a estas como subreceta también cambian de costo
+        invalidar_costos(session, ascendientes(session, recetas), indice=items)
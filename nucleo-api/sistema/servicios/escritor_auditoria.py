@@ -0,0 +1,194 @@
+"""
+📝 ESCRITOR DE AUDITORÍA - ELCAFESIN
+Los logs de sesión (login, logout, intentos fallidos) se encolan y un hilo
+de fondo los inserta en lotes: un INSERT y un commit por lote en vez de un
+commit (y su sync a disco) por cada login.
+
+- ``AUDITORIA_LOTE`` / ``AUDITORIA_INTERVALO_SEGUNDOS``: el lote se escribe
+  al llenarse o cuando pasa el intervalo desde su primer log
+- ``AUDITORIA_COLA_MAXIMA`` / ``AUDITORIA_POLITICA``: qué hacer con la
+  cola llena (escribir en el request, esperar o descartar)
+- ``detener()`` vacía la cola; se llama en el shutdown del lifespan
+
+Las BD en memoria comparten una única conexión entre hilos, así que con
+ellas (y con ``AUDITORIA_ASINCRONA=False``) se escribe en el request como
+antes.
+"""
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from sistema.configuracion import obtener_ajustes
+from sistema.configuracion.generaciones import motor_de
+from sistema.entidades import LogSesion
+from sistema.servicios.auditoria import registrar_logs_nuevos
+
+logger = logging.getLogger(__name__)
+
+_FIN = object()
+
+
+def _admite_asincrono(engine: Engine) -> bool:
+    return engine.url.database not in (None, "", ":memory:")
+
+
+class EscritorAuditoria:
+    """Cola acotada + hilo que la vacía en lotes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cola: Optional[queue.Queue] = None
+        self._hilo: Optional[threading.Thread] = None
+        self.escritos = 0
+        self.lotes = 0
+        self.sincronos = 0
+        self.descartados = 0
+        self.fallidos = 0
+
+    # ==================== PRODUCTOR ====================
+
+    def registrar(self, session: Session, **campos) -> None:
+        """
+        Registra un ``LogSesion``. La fecha se fija ahora, no al escribir.
+
+        Si el log no se encola, se añade a ``session`` y se hace commit.
+        """
+        campos.setdefault("creado_en", datetime.utcnow())
+        ajustes = obtener_ajustes()
+        engine = motor_de(session)
+
+        if ajustes.AUDITORIA_ASINCRONA and _admite_asincrono(engine):
+            cola = self._iniciar()
+            try:
+                if ajustes.AUDITORIA_POLITICA == "bloquear":
+                    cola.put((engine, campos), timeout=ajustes.AUDITORIA_ESPERA_SEGUNDOS)
+                else:
+                    cola.put_nowait((engine, campos))
+                return
+            except queue.Full:
+                if ajustes.AUDITORIA_POLITICA == "descartar":
+                    with self._lock:
+                        self.descartados += 1
+                    logger.warning("Cola de auditoría llena, log descartado: %s", campos["accion"])
+                    return
+
+        with self._lock:
+            self.sincronos += 1
+        session.add(LogSesion(**campos))
+        session.commit()
+
+    def _iniciar(self) -> queue.Queue:
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._cola = queue.Queue(maxsize=obtener_ajustes().AUDITORIA_COLA_MAXIMA)
+                self._hilo = threading.Thread(
+                    target=self._trabajar, args=(self._cola,),
+                    name="escritor-auditoria", daemon=True,
+                )
+                self._hilo.start()
+            return self._cola
+
+    # ==================== CONSUMIDOR ====================
+
+    def _trabajar(self, cola: queue.Queue) -> None:
+        while True:
+            primero = cola.get()
+            if primero is _FIN:
+                cola.task_done()
+                return
+
+            ajustes = obtener_ajustes()
+            lote: List[Tuple[Engine, dict]] = [primero]
+            limite = time.monotonic() + ajustes.AUDITORIA_INTERVALO_SEGUNDOS
+            fin = False
+            while len(lote) < ajustes.AUDITORIA_LOTE:
+                restante = limite - time.monotonic()
+                try:
+                    item = cola.get(timeout=restante) if restante > 0 else cola.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _FIN:
+                    fin = True
+                    break
+                lote.append(item)
+
+            self._escribir(lote)
+            for _ in range(len(lote) + fin):
+                cola.task_done()
+            if fin:
+                return
+
+    def _escribir(self, lote: List[Tuple[Engine, dict]]) -> None:
+        por_motor: Dict[Engine, List[dict]] = {}
+        for engine, campos in lote:
+            por_motor.setdefault(engine, []).append(campos)
+
+        for engine, filas in por_motor.items():
+            try:
+                self._insertar(engine, filas)
+            except Exception:
+                logger.exception("Falló el lote de auditoría, reintentando fila por fila")
+                for fila in filas:
+                    try:
+                        self._insertar(engine, [fila])
+                    except Exception:
+                        logger.exception("Log de auditoría perdido: %s", fila)
+                        with self._lock:
+                            self.fallidos += 1
+
+    def _insertar(self, engine: Engine, filas: List[dict]) -> None:
+        with Session(engine) as session:
+            ids = session.execute(insert(LogSesion).returning(LogSesion.id), filas).scalars().all()
+            registrar_logs_nuevos(session, "sesion", ids)
+            session.commit()
+        with self._lock:
+            self.escritos += len(filas)
+            self.lotes += 1
+
+    # ==================== CONTROL ====================
+
+    def vaciar(self) -> None:
+        """Bloquea hasta que todo lo encolado esté escrito"""
+        cola = self._cola
+        if cola is not None and self._hilo is not None and self._hilo.is_alive():
+            cola.join()
+
+    def detener(self) -> None:
+        """Escribe lo pendiente y termina el hilo (shutdown)"""
+        with self._lock:
+            cola, hilo = self._cola, self._hilo
+            self._cola = self._hilo = None
+        if hilo is not None and hilo.is_alive():
+            cola.put(_FIN)
+            hilo.join()
+
+        # Lo que un request alcanzó a encolar después del _FIN
+        rezagados = []
+        while cola is not None and not cola.empty():
+            item = cola.get_nowait()
+            if item is not _FIN:
+                rezagados.append(item)
+        if rezagados:
+            self._escribir(rezagados)
+
+    def estadisticas(self) -> dict:
+        cola = self._cola
+        with self._lock:
+            return {
+                "pendientes": cola.qsize() if cola is not None else 0,
+                "escritos": self.escritos,
+                "lotes": self.lotes,
+                "sincronos": self.sincronos,
+                "descartados": self.descartados,
+                "fallidos": self.fallidos,
+            }
+
+
+escritor_auditoria = EscritorAuditoria()
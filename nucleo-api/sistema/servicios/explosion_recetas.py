@@ -0,0 +1,151 @@
+"""
+🌳 SUBRECETAS Y EXPLOSIÓN DE MATERIALES - ELCAFESIN
+Un RecetaItem apunta a un ingrediente o a otra receta (subreceta: jarabes,
+cold brew, crema batida...). Las recetas forman un grafo dirigido acíclico;
+``validar_subrecetas`` rechaza cualquier item que cerraría un ciclo.
+
+La explosión a ingredientes es una sola consulta con CTE recursivo:
+
+    arbol(raiz, receta_id, factor)  -- factor = unidades de receta_id por
+                                       unidad de raiz (cantidad × (1 + merma))
+    SELECT raiz, ingrediente_id, SUM(factor × cantidad × (1 + merma))
+    FROM arbol JOIN receta_item ... GROUP BY raiz, ingrediente_id
+
+El costo con detalle por item se calcula en Python recorriendo el DAG con
+memo (ver ``costos_recetas``), así una subreceta compartida se costea una
+sola vez.
+"""
+from typing import Dict, Iterable, List, Optional, Set
+
+from fastapi import HTTPException
+from sqlalchemy import func, literal
+from sqlmodel import Session, select
+
+from sistema.entidades import Receta, RecetaItem
+
+# Tope de anidamiento: la validación impide ciclos, esto solo protege las
+# consultas recursivas de datos cargados sin pasar por ella
+MAX_PROFUNDIDAD = 16
+
+_items = RecetaItem.__table__
+
+
+def _efectiva(factor=None):
+    """``cantidad × (1 + merma)`` de un item (por ``factor`` si se da)"""
+    cantidad = _items.c.cantidad * (1 + func.coalesce(_items.c.merma, 0.0))
+    return cantidad if factor is None else factor * cantidad
+
+
+def consulta_explosion(receta_ids: Optional[Iterable[int]] = None):
+    """
+    SELECT ``(raiz, ingrediente_id, cantidad)``: ingredientes por unidad de
+    cada receta raíz, con subrecetas expandidas y merma incluida. Sin
+    ``receta_ids`` explota todas las recetas.
+    """
+    base = select(
+        Receta.id.label("raiz"), Receta.id.label("receta_id"),
+        literal(1.0).label("factor"), literal(0).label("nivel"),
+    )
+    if receta_ids is not None:
+        base = base.where(Receta.id.in_(list(receta_ids)))
+    arbol = base.cte("arbol", recursive=True)
+    arbol = arbol.union_all(
+        select(
+            arbol.c.raiz, _items.c.subreceta_id, _efectiva(arbol.c.factor), arbol.c.nivel + 1,
+        )
+        .join(_items, _items.c.receta_id == arbol.c.receta_id)
+        .where(_items.c.subreceta_id.isnot(None), arbol.c.nivel < MAX_PROFUNDIDAD)
+    )
+    return (
+        select(
+            arbol.c.raiz.label("raiz"),
+            _items.c.ingrediente_id.label("ingrediente_id"),
+            func.sum(_efectiva(arbol.c.factor)).label("cantidad"),
+        )
+        .join(_items, _items.c.receta_id == arbol.c.receta_id)
+        .where(_items.c.ingrediente_id.isnot(None))
+        .group_by(arbol.c.raiz, _items.c.ingrediente_id)
+    )
+
+
+def _cierre(receta_ids: Iterable[int], hacia_arriba: bool):
+    """CTE con ``receta_ids`` y sus descendientes (o ascendientes)"""
+    semilla = select(Receta.id.label("id")).where(Receta.id.in_(list(receta_ids)))
+    cierre = semilla.cte("cierre", recursive=True)
+    if hacia_arriba:
+        paso = select(_items.c.receta_id).join(cierre, _items.c.subreceta_id == cierre.c.id)
+    else:
+        paso = (
+            select(_items.c.subreceta_id)
+            .join(cierre, _items.c.receta_id == cierre.c.id)
+            .where(_items.c.subreceta_id.isnot(None))
+        )
+    # UNION (no ALL): termina aunque hubiera un ciclo en los datos
+    return cierre.union(paso)
+
+
+def descendientes(session: Session, receta_ids: Iterable[int]) -> Set[int]:
+    """``receta_ids`` y todas las subrecetas que usan, a cualquier nivel"""
+    receta_ids = list(receta_ids)
+    if not receta_ids:
+        return set()
+    cierre = _cierre(receta_ids, hacia_arriba=False)
+    return set(session.execute(select(cierre.c.id)).scalars())
+
+
+def ascendientes(session: Session, receta_ids: Iterable[int]) -> Set[int]:
+    """``receta_ids`` y todas las recetas que las usan, a cualquier nivel"""
+    receta_ids = list(receta_ids)
+    if not receta_ids:
+        return set()
+    cierre = _cierre(receta_ids, hacia_arriba=True)
+    return set(session.execute(select(cierre.c.id)).scalars())
+
+
+def subconsulta_descendientes(receta_ids: Iterable[int]):
+    """SELECT de ids para usar en ``.in_()`` (sin ir y volver a Python)"""
+    cierre = _cierre(receta_ids, hacia_arriba=False)
+    return select(cierre.c.id)
+
+
+def validar_subrecetas(session: Session, receta: Receta, subreceta_ids: List[int]) -> None:
+    """
+    Comprueba que las subrecetas existan y que usarlas dentro de ``receta``
+    no forme un ciclo.
+
+    Raises:
+        HTTPException 404: Alguna subreceta no existe
+        HTTPException 422: La receta terminaría conteniéndose a sí misma
+    """
+    if not subreceta_ids:
+        return
+
+    nombres = dict(session.exec(
+        select(Receta.id, Receta.nombre).where(Receta.id.in_(subreceta_ids))
+    ).all())
+    faltantes = sorted(set(subreceta_ids) - nombres.keys())
+    if faltantes:
+        raise HTTPException(status_code=404, detail=f"Subrecetas no encontradas: {faltantes}")
+
+    if receta.id is None or receta.id not in descendientes(session, subreceta_ids):
+        return  # Una receta nueva no puede estar dentro de otra todavía
+
+    # Hay ciclo: ubicar la subreceta que lo cierra para el mensaje
+    for subreceta_id in subreceta_ids:
+        if receta.id in descendientes(session, [subreceta_id]):
+            raise HTTPException(
+                status_code=422,
+                detail=f"Ciclo de subrecetas: '{receta.nombre}' ya forma parte de "
+                       f"'{nombres[subreceta_id]}'",
+            )
+
+
+def recetas_que_usan(session: Session, receta_id: int) -> Dict[int, str]:
+    """Recetas que usan ``receta_id`` directamente como subreceta"""
+    return dict(session.exec(
+        select(Receta.id, Receta.nombre)
+        .join(RecetaItem, RecetaItem.receta_id == Receta.id)
+        .where(RecetaItem.subreceta_id == receta_id)
+        .distinct()
+    ).all())
+
@@ -0,0 +1,60 @@
+"""
+🏷️ LISTA DE PRECIOS DE VENTA - ELCAFESIN
+Precio unitario de cada receta listo para cobrar:
+
+    precio_unitario = costo_total × (1 + margen)
+
+La lista es una foto versionada que vive como derivado de la cache de
+costos, así que se descarta con las mismas invalidaciones (precios de
+ingredientes, items, márgenes) y se reconstruye con los costos que siguen
+en cache. La versión es la generación "costos_recetas" con la que se armó;
+cada VentaItem la guarda para saber con qué lista se cobró.
+
+Los cambios hechos por otros workers llegan con la revisión periódica de la
+generación (``COSTOS_REVISION_SEGUNDOS``); armar la lista fuerza esa
+revisión, así que cada versión corresponde a un solo juego de precios.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable
+
+from sqlmodel import Session, select
+
+from sistema.entidades import Receta
+from sistema.servicios.costos_recetas import caches, costos_recetas
+
+
+@dataclass(frozen=True)
+class ListaPrecios:
+    version: int
+    precios: Dict[int, float]  # receta_id -> precio unitario (sin redondear)
+
+
+def construir_lista(session: Session) -> ListaPrecios:
+    """
+    La versión es la generación con la que está sincronizada la cache (no
+    una lectura suelta de la BD): así una versión no puede nombrar costos
+    de antes de la escritura de otro worker. Si una invalidación cae
+    mientras se arma, se vuelve a armar.
+    """
+    cache = caches.para_sesion(session)
+    while True:
+        version, epoca = cache.sincronizar(session)
+        recetas = session.exec(select(Receta)).all()
+        costos = costos_recetas(session, recetas)
+        if cache.epoca == epoca:
+            break
+    precios = {receta.id: costos[receta.id].precio_sugerido for receta in recetas}
+    return ListaPrecios(version=version, precios=precios)
+
+
+def lista_precios(session: Session, receta_ids: Iterable[int] = ()) -> ListaPrecios:
+    """
+    Lista vigente. Si le falta alguna de ``receta_ids`` (receta creada por
+    otro worker antes de la próxima revisión) se descarta y se rearma.
+    """
+    cache = caches.para_sesion(session)
+    lista = cache.derivado(session, "lista_precios", construir_lista)
+    if any(receta_id not in lista.precios for receta_id in receta_ids):
+        cache.vaciar()
+        lista = cache.derivado(session, "lista_precios", construir_lista)
+    return lista
@@ -0,0 +1,301 @@
+"""
+📈 MÉTRICAS - ELCAFESIN
+Contadores, indicadores e histogramas en memoria, expuestos en ``/metrics``
+con el formato de texto de Prometheus.
+
+- Por petición (``MedidorMetricas``): peticiones por ruta y estado,
+  histograma de latencia y peticiones en curso. Desde la medición SQL de la
+  petición (configuracion/sentencias_sql.py) salen las sentencias, el tiempo
+  de BD, la espera del pool y los probables N+1.
+- Al exponer (``al_exponer``): aciertos de las caches, colas en segundo
+  plano (auditoría, streams de logs), pool de conexiones y logins en curso.
+
+Todo lo que se escribe por petición se escribe desde el event loop: el
+middleware y el observador SQL corren ahí, y ``/metrics`` también es async.
+Un solo hilo escribe, así que no hay locks en el camino de la petición.
+Costo medido en ``benchmarks/bench_metricas.py``.
+
+Las etiquetas de ruta son plantillas (``/ventas/{venta_id}``); un path sin
+match cuenta como "(sin ruta)".
+"""
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from sistema.configuracion.ajustes import obtener_ajustes
+from sistema.configuracion.sentencias_sql import MedicionSQL, observar_peticiones, ruta_peticion
+
+Etiquetas = Tuple[str, ...]
+Muestra = Tuple[str, Dict[str, str], float]  # sufijo, etiquetas, valor
+
+LATENCIA_CUBETAS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ESPERA_POOL_CUBETAS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores: Dict[Etiquetas, float] = {}
+
+    def sumar(self, *valores: str, cantidad: float = 1.0) -> None:
+        self._valores[valores] = self._valores.get(valores, 0.0) + cantidad
+
+    def fijar(self, *valores: str, valor: float) -> None:
+        """Para totales que ya lleva otro componente (se leen al exponer)"""
+        self._valores[valores] = valor
+
+    def valor(self, *valores: str) -> float:
+        return self._valores.get(valores, 0.0)
+
+    def muestras(self) -> Iterator[Muestra]:
+        for valores, valor in self._valores.items():
+            yield "", dict(zip(self.etiquetas, valores)), valor
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+
+class Indicador(_Metrica):
+    tipo = "gauge"
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, limites: Sequence[float], etiquetas: Sequence[str] = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.limites = tuple(limites)
+        # etiquetas -> [cuenta por cubeta (+Inf al final), suma]
+        self._series: Dict[Etiquetas, list] = {}
+
+    def observar(self, valor: float, *valores: str) -> None:
+        serie = self._series.get(valores)
+        if serie is None:
+            serie = self._series[valores] = [[0] * (len(self.limites) + 1), 0.0]
+        serie[0][bisect_left(self.limites, valor)] += 1
+        serie[1] += valor
+
+    def cuenta(self, *valores: str) -> int:
+        serie = self._series.get(valores)
+        return sum(serie[0]) if serie else 0
+
+    def muestras(self) -> Iterator[Muestra]:
+        for valores, (cubetas, suma) in self._series.items():
+            etiquetas = dict(zip(self.etiquetas, valores))
+            acumulado = 0
+            for limite, cuenta in zip((*self.limites, float("inf")), cubetas):
+                acumulado += cuenta
+                yield "_bucket", {**etiquetas, "le": _numero(limite)}, acumulado
+            yield "_sum", etiquetas, suma
+            yield "_count", etiquetas, acumulado
+
+
+class Registro:
+    """Métricas de la aplicación y funciones que las actualizan al exponer"""
+
+    def __init__(self):
+        self._metricas: List[_Metrica] = []
+        self._al_exponer: List[Callable[[], None]] = []
+
+    def agregar(self, metrica: _Metrica) -> _Metrica:
+        self._metricas.append(metrica)
+        return metrica
+
+    def al_exponer(self, funcion: Callable[[], None]) -> Callable[[], None]:
+        self._al_exponer.append(funcion)
+        return funcion
+
+    def exponer(self) -> str:
+        """Formato de texto de Prometheus (versión 0.0.4)"""
+        for funcion in self._al_exponer:
+            funcion()
+        lineas = []
+        for metrica in self._metricas:
+            lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+            lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+            for sufijo, etiquetas, valor in metrica.muestras():
+                if etiquetas:
+                    texto = ",".join(f'{k}="{_escapar(v)}"' for k, v in etiquetas.items())
+                    lineas.append(f"{metrica.nombre}{sufijo}{{{texto}}} {_numero(valor)}")
+                else:
+                    lineas.append(f"{metrica.nombre}{sufijo} {_numero(valor)}")
+        return "\n".join(lineas) + "\n"
+
+
+registro = Registro()
+
+# ==================== PETICIONES ====================
+
+peticiones = registro.agregar(Contador(
+    "elcafesin_peticiones_total", "Peticiones HTTP atendidas", ("metodo", "ruta", "estado"),
+))
+latencia = registro.agregar(Histograma(
+    "elcafesin_peticion_segundos", "Duración de las peticiones HTTP", LATENCIA_CUBETAS, ("metodo", "ruta"),
+))
+en_curso = registro.agregar(Indicador("elcafesin_peticiones_en_curso", "Peticiones HTTP en curso"))
+
+
+class MedidorMetricas:
+    """Middleware ASGI: cuenta, mide y lleva las peticiones en curso"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        estado = 500  # Si la app falla sin responder, ServerErrorMiddleware manda un 500
+
+        async def enviar(mensaje):
+            nonlocal estado
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+            await send(mensaje)
+
+        en_curso.sumar()
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracion = time.perf_counter() - inicio
+            en_curso.sumar(cantidad=-1)
+            metodo, ruta = ruta_peticion(scope).split(" ", 1)
+            peticiones.sumar(metodo, ruta, str(estado))
+            latencia.observar(duracion, metodo, ruta)
+
+
+# ==================== BASE DE DATOS ====================
+
+sentencias_db = registro.agregar(Contador(
+    "elcafesin_db_sentencias_total", "Sentencias SQL ejecutadas por peticiones", ("metodo", "ruta"),
+))
+segundos_db = registro.agregar(Contador(
+    "elcafesin_db_segundos_total", "Tiempo en la BD de las peticiones", ("metodo", "ruta"),
+))
+n1_db = registro.agregar(Contador(
+    "elcafesin_db_n1_total", "Peticiones con una misma consulta repetida (probable N+1)", ("metodo", "ruta"),
+))
+espera_pool = registro.agregar(Histograma(
+    "elcafesin_pool_espera_segundos", "Espera por conexiones del pool en cada petición que la tuvo",
+    ESPERA_POOL_CUBETAS,
+))
+pool_conexiones = registro.agregar(Indicador(
+    "elcafesin_pool_conexiones", "Conexiones del pool de la app", ("estado",),
+))
+
+
+def _registrar_sql(medicion: MedicionSQL) -> None:
+    if not medicion.sentencias:
+        return
+    metodo, ruta = medicion.ruta.split(" ", 1)
+    sentencias_db.sumar(metodo, ruta, cantidad=medicion.sentencias)
+    segundos_db.sumar(metodo, ruta, cantidad=medicion.segundos)
+    if medicion.espera_pool:
+        espera_pool.observar(medicion.espera_pool)
+    if medicion.sentencias >= obtener_ajustes().SQL_N1_UMBRAL and medicion.repetidas():
+        n1_db.sumar(metodo, ruta)
+
+
+observar_peticiones(_registrar_sql)
+
+
+@registro.al_exponer
+def _pool() -> None:
+    from sistema.configuracion.base_datos import engine
+
+    pool = engine.pool
+    if hasattr(pool, "checkedout"):
+        pool_conexiones.fijar("en_uso", valor=pool.checkedout())
+        pool_conexiones.fijar("libres", valor=pool.checkedin())
+        pool_conexiones.fijar("desborde", valor=max(pool.overflow(), 0))
+
+
+# ==================== CACHES ====================
+
+cache_aciertos = registro.agregar(Contador(
+    "elcafesin_cache_aciertos_total", "Consultas resueltas por la cache", ("cache",),
+))
+cache_fallos = registro.agregar(Contador(
+    "elcafesin_cache_fallos_total", "Consultas que fueron a la BD", ("cache",),
+))
+cache_tasa = registro.agregar(Indicador(
+    "elcafesin_cache_tasa_aciertos", "Aciertos / consultas desde el arranque", ("cache",),
+))
+cache_recargas = registro.agregar(Contador(
+    "elcafesin_cache_recargas_total", "Recargas completas de la matriz de permisos", ("cache",),
+))
+
+
+@registro.al_exponer
+def _caches() -> None:
+    from sistema.configuracion.cache_usuarios import estadisticas_cache_usuarios
+    from sistema.configuracion.permiso import matrices
+    from sistema.servicios.costos_recetas import caches as caches_costos
+
+    usuarios = estadisticas_cache_usuarios()
+    costos = [c.estadisticas() for c in caches_costos.todas()]
+    totales = {
+        "usuarios": (usuarios["aciertos"], usuarios["fallos"]),
+        "costos_recetas": (sum(c["aciertos"] for c in costos), sum(c["calculadas"] for c in costos)),
+    }
+    for cache, (aciertos, fallos) in totales.items():
+        cache_aciertos.fijar(cache, valor=aciertos)
+        cache_fallos.fijar(cache, valor=fallos)
+        consultas = aciertos + fallos
+        cache_tasa.fijar(cache, valor=aciertos / consultas if consultas else 0.0)
+    cache_recargas.fijar("permisos", valor=sum(m.recargas for m in matrices.todas()))
+
+
+# ==================== TRABAJO EN SEGUNDO PLANO ====================
+
+cola_pendientes = registro.agregar(Indicador(
+    "elcafesin_cola_pendientes", "Elementos esperando en colas de segundo plano", ("cola",),
+))
+auditoria_logs = registro.agregar(Contador(
+    "elcafesin_auditoria_logs_total", "Logs de sesión procesados por el escritor de auditoría", ("resultado",),
+))
+streams_logs = registro.agregar(Indicador(
+    "elcafesin_logs_stream_suscriptores", "Streams de logs (SSE) abiertos",
+))
+logins_en_curso = registro.agregar(Indicador(
+    "elcafesin_login_en_curso", "Logins verificando contraseña (pool de bcrypt)",
+))
+logins_rechazados = registro.agregar(Contador(
+    "elcafesin_login_rechazos_total", "Logins rechazados con 429 por límite de concurrencia",
+))
+
+
+@registro.al_exponer
+def _segundo_plano() -> None:
+    from sistema.configuracion.limitador import limitador_login
+    from sistema.servicios.bus_eventos import buses
+    from sistema.servicios.escritor_auditoria import escritor_auditoria
+
+    auditoria = escritor_auditoria.estadisticas()
+    cola_pendientes.fijar("auditoria", valor=auditoria["pendientes"])
+    for resultado in ("escritos", "sincronos", "descartados", "fallidos"):
+        auditoria_logs.fijar(resultado, valor=auditoria[resultado])
+
+    streams = [bus.estadisticas() for bus in buses.todas()]
+    cola_pendientes.fijar("logs_stream", valor=sum(s["pendientes"] for s in streams))
+    streams_logs.fijar(valor=sum(s["suscriptores"] for s in streams))
+
+    logins_en_curso.fijar(valor=limitador_login.en_curso("ip"))
+    logins_rechazados.fijar(valor=limitador_login.rechazos)
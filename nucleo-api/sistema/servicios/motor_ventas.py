@@ -0,0 +1,248 @@
+"""
+🧮 MOTOR DE VENTAS - ELCAFESIN
+Procesa un ticket completo en memoria y lo escribe en una sola transacción
+
+Flujo:
+1. Expandir la lista de materiales de todas las recetas del ticket, con
+   sus subrecetas, hasta ingredientes (1 SELECT)
+2. Validar stock y poner precios desde la lista de precios en memoria (un
+   lookup por línea; cada VentaItem guarda la versión de la lista)
+3. Reservar stock con UPDATE condicionados (stock >= cantidad); si alguna
+   fila no se actualiza otra venta concurrente ganó la carrera y se revierte
+   todo el ticket
+4. Insertar venta, items y kardex, sumar la venta a los acumulados diarios
+   y hacer un solo commit (al confirmar, los movimientos se publican en el
+   stream de logs y el consumo se descuenta del tablero de capacidad)
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Protocol
+
+from fastapi import HTTPException
+from sqlalchemy import bindparam, insert, update
+from sqlmodel import Session, select
+
+from sistema.entidades import (
+    Venta, VentaItem, Receta, Ingrediente,
+    Movimiento, TipoMovimiento
+)
+from sistema.servicios.auditoria import registrar_logs_nuevos
+from sistema.servicios.acumulados import acumular_venta
+from sistema.servicios.capacidad import registrar_consumo
+from sistema.servicios.explosion_recetas import consulta_explosion
+from sistema.servicios.lista_precios import lista_precios
+
+
+class LineaVenta(Protocol):
+    """Cualquier objeto con receta_id y cantidad (ej. ItemVentaCreate)"""
+    receta_id: int
+    cantidad: float
+
+
+@dataclass
+class InsumoReceta:
+    """Ingrediente consumido por una unidad de receta"""
+    ingrediente_id: int
+    nombre: str
+    stock: float
+    cantidad: float  # Ya incluye la merma (de todos los niveles)
+
+
+@dataclass
+class RecetaExpandida:
+    """Receta con su lista de materiales"""
+    id: int
+    insumos: List[InsumoReceta] = field(default_factory=list)
+
+
+def expandir_recetas(session: Session, receta_ids: Iterable[int]) -> Dict[int, RecetaExpandida]:
+    """
+    Carga en una sola consulta todas las recetas pedidas con sus ingredientes
+    hoja: las subrecetas se expanden en la base de datos (CTE recursivo) y
+    cada insumo trae la cantidad total por unidad de la receta.
+
+    Las recetas sin items aparecen sin insumos; los items cuyo ingrediente ya
+    no existe se ignoran (mismo criterio que el cálculo de costos de recetas).
+    """
+    ids = set(receta_ids)
+    if not ids:
+        return {}
+
+    explosion = consulta_explosion(ids).subquery()
+    filas = session.exec(
+        select(
+            Receta.id,
+            explosion.c.cantidad,
+            Ingrediente.id,
+            Ingrediente.nombre,
+            Ingrediente.stock,
+        )
+        .outerjoin(explosion, explosion.c.raiz == Receta.id)
+        .outerjoin(Ingrediente, Ingrediente.id == explosion.c.ingrediente_id)
+        .where(Receta.id.in_(ids))
+    ).all()
+
+    recetas: Dict[int, RecetaExpandida] = {}
+    for receta_id, cantidad, ing_id, nombre, stock in filas:
+        receta = recetas.get(receta_id)
+        if receta is None:
+            receta = recetas[receta_id] = RecetaExpandida(id=receta_id)
+
+        if ing_id is None:
+            continue
+
+        receta.insumos.append(
+            InsumoReceta(
+                ingrediente_id=ing_id,
+                nombre=nombre,
+                stock=stock,
+                cantidad=cantidad,
+            )
+        )
+
+    return recetas
+
+
+def reservar_stock(session: Session, requerido: Dict[int, float]) -> bool:
+    """
+    Descuenta stock con UPDATE condicionados en un solo executemany:
+
+        UPDATE ingrediente SET stock = stock - :q WHERE id = :id AND stock >= :q
+
+    Devuelve False si alguna fila no cumplió la condición; en ese caso el
+    llamador debe hacer rollback de la transacción.
+    """
+    if not requerido:
+        return True
+
+    tabla = Ingrediente.__table__
+    resultado = session.execute(
+        update(tabla)
+        .where(
+            tabla.c.id == bindparam("b_id"),
+            tabla.c.stock >= bindparam("b_cantidad"),
+        )
+        .values(stock=tabla.c.stock - bindparam("b_cantidad")),
+        [
+            {"b_id": ingrediente_id, "b_cantidad": cantidad}
+            for ingrediente_id, cantidad in requerido.items()
+        ],
+    )
+    return resultado.rowcount == len(requerido)
+
+
+def _stock_insuficiente(nombre: str, disponible: float, necesario: float) -> HTTPException:
+    return HTTPException(
+        status_code=400,
+        detail=f"Stock insuficiente de {nombre}. "
+               f"Disponible: {disponible}, Necesario: {necesario:.2f}"
+    )
+
+
+def _error_stock_insuficiente(session: Session, requerido: Dict[int, float]) -> HTTPException:
+    """Relee el stock tras perder la reserva para informar qué ingrediente faltó"""
+    filas = session.exec(
+        select(Ingrediente.id, Ingrediente.nombre, Ingrediente.stock)
+        .where(Ingrediente.id.in_(requerido.keys()))
+    ).all()
+    for ingrediente_id, nombre, stock in filas:
+        if stock < requerido[ingrediente_id]:
+            return _stock_insuficiente(nombre, stock, requerido[ingrediente_id])
+
+    # Ingrediente eliminado en paralelo
+    return HTTPException(status_code=409, detail="El inventario cambió durante la venta, reintenta")
+
+
+def registrar_venta(
+    session: Session,
+    lineas: List[LineaVenta],
+    cliente_id: Optional[int] = None,
+    sucursal: Optional[str] = None,
+) -> Venta:
+    """
+    Registra un ticket completo.
+
+    Raises:
+        HTTPException 404: Alguna receta no existe
+        HTTPException 400: Stock insuficiente de algún ingrediente
+        HTTPException 409: El inventario cambió durante la venta
+    """
+    recetas = expandir_recetas(session, (linea.receta_id for linea in lineas))
+
+    # FASE 1: Consumo total por ingrediente (en orden de aparición)
+    requerido: Dict[int, float] = {}
+    insumos: Dict[int, InsumoReceta] = {}
+
+    for linea in lineas:
+        receta = recetas.get(linea.receta_id)
+        if receta is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Receta {linea.receta_id} no encontrada"
+            )
+
+        for insumo in receta.insumos:
+            requerido[insumo.ingrediente_id] = (
+                requerido.get(insumo.ingrediente_id, 0.0) + insumo.cantidad * linea.cantidad
+            )
+            insumos[insumo.ingrediente_id] = insumo
+
+    # Validación temprana con el stock leído (evita escribir si ya no alcanza)
+    for ingrediente_id, cantidad_necesaria in requerido.items():
+        insumo = insumos[ingrediente_id]
+        if insumo.stock < cantidad_necesaria:
+            raise _stock_insuficiente(insumo.nombre, insumo.stock, cantidad_necesaria)
+
+    # FASE 2: Precios del ticket (sin recalcular costos)
+    lista = lista_precios(session, recetas.keys())
+    items: List[dict] = []
+    total_venta = 0.0
+
+    for linea in lineas:
+        precio_unitario = lista.precios[linea.receta_id]
+        subtotal = precio_unitario * linea.cantidad
+
+        items.append({
+            "receta_id": linea.receta_id,
+            "cantidad": linea.cantidad,
+            "precio_unitario": precio_unitario,
+            "subtotal": subtotal,
+            "lista_precios_version": lista.version,
+        })
+        total_venta += subtotal
+
+    # FASE 3: Reservar stock (atómico frente a otros workers)
+    if not reservar_stock(session, requerido):
+        session.rollback()
+        raise _error_stock_insuficiente(session, requerido)
+    registrar_consumo(session, requerido)
+
+    # FASE 4: Escritura del ticket en la misma transacción
+    venta = Venta(cliente_id=cliente_id, sucursal=sucursal, total=total_venta)
+    session.add(venta)
+    session.flush()
+
+    # Inserciones masivas (executemany); el kardex devuelve sus ids para
+    # publicarlos en el stream de logs
+    session.execute(insert(VentaItem), [{**item, "venta_id": venta.id} for item in items])
+
+    if requerido:
+        movimiento_ids = session.execute(insert(Movimiento).returning(Movimiento.id), [
+            {
+                "ingrediente_id": ingrediente_id,
+                "tipo": TipoMovimiento.VENTA,
+                "cantidad": -cantidad,
+                "referencia": f"Venta #{venta.id}",
+            }
+            for ingrediente_id, cantidad in requerido.items()
+        ]).scalars().all()
+        registrar_logs_nuevos(session, "movimiento", movimiento_ids)
+
+    acumular_venta(
+        session, venta.creado_en, venta.sucursal, venta.total,
+        ((item["receta_id"], item["cantidad"], item["subtotal"]) for item in items),
+    )
+
+    session.commit()
+    session.refresh(venta)
+
+    return venta
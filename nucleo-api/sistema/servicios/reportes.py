@@ -0,0 +1,251 @@
+"""
+📊 CONSULTAS DE REPORTES - ELCAFESIN
+Totales de ventas calculados en SQL (SUM/COUNT agrupados), nunca cargando
+objetos ``Venta`` en memoria.
+
+Un rango se parte en tres tramos:
+
+    [desde ........ |== días completos ==| ........ hasta]
+     venta (parcial)    venta_diaria        venta (parcial)
+
+Los días completos se leen de los acumulados diarios (un renglón por día y
+sucursal) y solo los extremos parciales tocan la tabla ``venta``. Con
+cubetas por hora el tramo central son las horas completas de ``venta_hora``.
+
+Los patrones por hora del día y día de la semana salen solo de
+``venta_hora`` / ``venta_hora_receta`` (a lo más 24 renglones por día).
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Integer, cast, tuple_
+from sqlmodel import Session, func, select
+
+from sistema.entidades import Venta, VentaDiaria, VentaHora, VentaHoraReceta
+from sistema.servicios.acumulados import clave_sucursal
+
+
+class Periodo(str, Enum):
+    """Tamaño de cubeta de una serie de tiempo"""
+    HORA = "hora"
+    DIA = "dia"
+    SEMANA = "semana"  # Etiqueta = lunes de la semana
+    MES = "mes"
+
+
+def _cubeta(columna, periodo: Periodo):
+    if periodo == Periodo.HORA:
+        return func.strftime("%Y-%m-%dT%H:00", columna)
+    if periodo == Periodo.DIA:
+        return func.date(columna)
+    if periodo == Periodo.SEMANA:
+        return func.date(columna, "-6 days", "weekday 1")
+    return func.strftime("%Y-%m", columna)
+
+
+DIAS_SEMANA = ("lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo")
+
+
+@dataclass
+class Acumulado:
+    total: float = 0.0
+    num_ventas: int = 0
+    unidades: Optional[float] = None  # Solo al filtrar por receta
+
+    def como_dict(self) -> dict:
+        datos = {
+            "total_ventas": round(self.total, 2),
+            "num_ventas": self.num_ventas,
+            "ticket_promedio": round(self.total / self.num_ventas, 2) if self.num_ventas else 0.0,
+        }
+        if self.unidades is not None:
+            datos["unidades"] = round(self.unidades, 3)
+        return datos
+
+
+Clave = Tuple[Optional[str], Optional[str]]  # (cubeta, sucursal)
+
+
+def _truncar(momento: datetime, periodo: Optional[Periodo]) -> datetime:
+    if periodo == Periodo.HORA:
+        return momento.replace(minute=0, second=0, microsecond=0)
+    return datetime.combine(momento.date(), time.min)
+
+
+def _tramos(
+    desde: datetime, hasta: datetime, periodo: Optional[Periodo]
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Días (u horas, si el periodo es HORA) completos ``[primero, ultimo)``
+    contenidos en ``[desde, hasta]``
+    """
+    paso = timedelta(hours=1) if periodo == Periodo.HORA else timedelta(days=1)
+    primero = _truncar(desde, periodo)
+    if primero < desde:
+        primero += paso
+    # ``hasta`` es inclusivo: el tramo termina completo si hasta + 1µs cae en el borde
+    ultimo = _truncar(hasta + timedelta(microseconds=1), periodo)
+    if primero >= ultimo:
+        return None, None
+    return primero, ultimo
+
+
+def _sumar(
+    acumulados: Dict[Clave, Acumulado], filas, periodo: Optional[Periodo], por_sucursal: bool
+) -> None:
+    for fila in filas:
+        valores = list(fila)
+        cubeta = valores.pop(0) if periodo else None
+        sucursal = valores.pop(0) if por_sucursal else None
+        total, num_ventas = valores
+        acumulado = acumulados.setdefault((cubeta, sucursal or None), Acumulado())
+        acumulado.total += total or 0.0
+        acumulado.num_ventas += num_ventas or 0
+
+
+def _desde_ventas(session, desde, hasta, incluir_hasta, sucursal, periodo, por_sucursal):
+    grupos = []
+    if periodo:
+        grupos.append(_cubeta(Venta.creado_en, periodo))
+    if por_sucursal:
+        grupos.append(Venta.sucursal)
+    columnas = grupos + [func.sum(Venta.total), func.count(Venta.id)]
+
+    consulta = select(*columnas).where(
+        Venta.creado_en >= desde,
+        Venta.creado_en <= hasta if incluir_hasta else Venta.creado_en < hasta,
+    )
+    if sucursal:
+        consulta = consulta.where(Venta.sucursal == sucursal)
+    if grupos:
+        consulta = consulta.group_by(*grupos)
+    return session.exec(consulta).all()
+
+
+def _desde_acumulados(session, primero, ultimo, sucursal, periodo, por_sucursal):
+    if periodo == Periodo.HORA:
+        modelo = VentaHora
+        grupos = [func.printf("%sT%02d:00", VentaHora.fecha, VentaHora.hora)]
+        rango = [
+            tuple_(VentaHora.fecha, VentaHora.hora) >= (primero.date(), primero.hour),
+            tuple_(VentaHora.fecha, VentaHora.hora) < (ultimo.date(), ultimo.hour),
+        ]
+    else:
+        modelo = VentaDiaria
+        grupos = [_cubeta(VentaDiaria.fecha, periodo)] if periodo else []
+        rango = [VentaDiaria.fecha >= primero.date(), VentaDiaria.fecha < ultimo.date()]
+    if por_sucursal:
+        grupos.append(modelo.sucursal)
+    columnas = grupos + [func.sum(modelo.total), func.sum(modelo.num_ventas)]
+
+    consulta = select(*columnas).where(*rango)
+    if sucursal:
+        consulta = consulta.where(modelo.sucursal == clave_sucursal(sucursal))
+    if grupos:
+        consulta = consulta.group_by(*grupos)
+    return session.exec(consulta).all()
+
+
+def resumen_ventas(
+    session: Session,
+    desde: datetime,
+    hasta: datetime,
+    sucursal: Optional[str] = None,
+    periodo: Optional[Periodo] = None,
+    por_sucursal: bool = False,
+) -> Tuple[Acumulado, List[dict]]:
+    """
+    Total del rango ``[desde, hasta]`` y, si se pide ``periodo`` o
+    ``por_sucursal``, la serie ordenada por cubeta y sucursal.
+    """
+    acumulados: Dict[Clave, Acumulado] = {}
+    primero, ultimo = _tramos(desde, hasta, periodo)
+
+    if primero is None:
+        _sumar(acumulados, _desde_ventas(
+            session, desde, hasta, True, sucursal, periodo, por_sucursal
+        ), periodo, por_sucursal)
+    else:
+        if desde < primero:
+            _sumar(acumulados, _desde_ventas(
+                session, desde, primero, False, sucursal, periodo, por_sucursal
+            ), periodo, por_sucursal)
+        _sumar(acumulados, _desde_acumulados(
+            session, primero, ultimo, sucursal, periodo, por_sucursal
+        ), periodo, por_sucursal)
+        if ultimo <= hasta:
+            _sumar(acumulados, _desde_ventas(
+                session, ultimo, hasta, True, sucursal, periodo, por_sucursal
+            ), periodo, por_sucursal)
+
+    total = Acumulado()
+    for acumulado in acumulados.values():
+        total.total += acumulado.total
+        total.num_ventas += acumulado.num_ventas
+
+    serie = []
+    if periodo or por_sucursal:
+        for (cubeta, suc), acumulado in sorted(
+            acumulados.items(), key=lambda par: (par[0][0] or "", par[0][1] or "")
+        ):
+            if not acumulado.num_ventas:
+                continue
+            punto = {}
+            if periodo:
+                punto["periodo"] = cubeta
+            if por_sucursal:
+                punto["sucursal"] = suc
+            punto.update(acumulado.como_dict())
+            serie.append(punto)
+
+    return total, serie
+
+
+def patrones_ventas(
+    session: Session,
+    desde: date,
+    hasta: date,
+    sucursal: Optional[str] = None,
+    receta_id: Optional[int] = None,
+    desfase_horas: int = 0,
+) -> Dict[Tuple[int, int], Acumulado]:
+    """
+    Ventas de los días ``[desde, hasta]`` por (día de la semana, hora del
+    día): lunes = 0, horas 0-23 desplazadas ``desfase_horas`` desde UTC.
+
+    Con ``receta_id`` cuenta solo esa receta (tickets que la incluyen,
+    unidades y monto de sus renglones).
+    """
+    modelo = VentaHoraReceta if receta_id is not None else VentaHora
+    dia_semana = cast(func.strftime("%w", modelo.fecha), Integer)  # 0 = domingo
+    metricas = [func.sum(modelo.num_ventas)]
+    if receta_id is not None:
+        metricas += [func.sum(VentaHoraReceta.monto), func.sum(VentaHoraReceta.unidades)]
+    else:
+        metricas += [func.sum(VentaHora.total)]
+
+    consulta = (
+        select(dia_semana, modelo.hora, *metricas)
+        .where(modelo.fecha >= desde, modelo.fecha <= hasta)
+        .group_by(dia_semana, modelo.hora)
+    )
+    if sucursal:
+        consulta = consulta.where(modelo.sucursal == clave_sucursal(sucursal))
+    if receta_id is not None:
+        consulta = consulta.where(VentaHoraReceta.receta_id == receta_id)
+
+    celdas: Dict[Tuple[int, int], Acumulado] = {
+        (dia, hora): Acumulado(unidades=0.0 if receta_id is not None else None)
+        for dia in range(7) for hora in range(24)
+    }
+    for domingo_0, hora, num_ventas, total, *unidades in session.exec(consulta).all():
+        # El desfase se aplica por grupo: todos sus renglones se mueven igual
+        dias_extra, hora_local = divmod(hora + desfase_horas, 24)
+        celda = celdas[((domingo_0 + 6 + dias_extra) % 7, hora_local)]
+        celda.num_ventas += num_ventas or 0
+        celda.total += total or 0.0
+        if unidades:
+            celda.unidades += unidades[0] or 0.0
+    return celdas
@@ -0,0 +1,160 @@
+"""
+🧪 SIMULACIÓN DE PRECIOS - ELCAFESIN
+"¿Qué pasa si el café sube 12% y la leche baja 5%?" para todo el menú y
+varios escenarios en una sola petición.
+
+La matriz receta × ingrediente (``cantidad × (1 + merma)``, con las
+subrecetas ya explotadas a ingredientes) se guarda por columnas, como arreglos ``array`` (sin objetos ORM):
+
+    columnas[ingrediente_id] = (filas: array('l'), coeficientes: array('d'))
+
+Un escenario copia el vector de costos actuales y solo suma
+``coeficiente × Δprecio`` en las columnas de los ingredientes que cambian,
+así que el costo depende de cuántas recetas tocan esos ingredientes, no del
+tamaño del menú. La matriz vive en la cache de costos y se descarta con
+cualquier cambio de precios o de items.
+"""
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Sequence, Set, Tuple
+
+from fastapi import HTTPException
+from sqlmodel import Session, select
+
+from sistema.configuracion.ajustes import obtener_ajustes
+from sistema.entidades import Ingrediente, Receta
+from sistema.servicios.costos_recetas import caches
+from sistema.servicios.explosion_recetas import consulta_explosion
+
+Columna = Tuple["array[int]", "array[float]"]
+
+
+@dataclass
+class MatrizCostos:
+    receta_ids: List[int]
+    nombres: List[str]
+    margenes: "array[float]"
+    costos: "array[float]"  # Costo actual de cada receta (fila)
+    precios: Dict[int, float]  # Costo por unidad actual de cada ingrediente
+    columnas: Dict[int, Columna]
+
+
+def construir_matriz(session: Session) -> MatrizCostos:
+    """Arma la matriz de todo el menú con dos consultas"""
+    margen_default = obtener_ajustes().MARGIN_DEFAULT
+    recetas = session.exec(
+        select(Receta.id, Receta.nombre, Receta.margen).order_by(Receta.nombre)
+    ).all()
+    filas = {receta_id: n for n, (receta_id, _, _) in enumerate(recetas)}
+
+    precios: Dict[int, float] = {}
+    columnas: Dict[int, Columna] = {}
+    costos = array("d", bytes(8 * len(recetas)))
+    explosion = consulta_explosion().subquery()
+    for receta_id, ingrediente_id, coeficiente, costo in session.exec(
+        select(
+            explosion.c.raiz, Ingrediente.id, explosion.c.cantidad, Ingrediente.costo_por_unidad,
+        )
+        .join(Ingrediente, Ingrediente.id == explosion.c.ingrediente_id)
+    ):
+        fila = filas[receta_id]
+        columna = columnas.get(ingrediente_id)
+        if columna is None:
+            columna = columnas[ingrediente_id] = (array("l"), array("d"))
+            precios[ingrediente_id] = costo
+        columna[0].append(fila)
+        columna[1].append(coeficiente)
+        costos[fila] += coeficiente * costo
+
+    return MatrizCostos(
+        receta_ids=[receta_id for receta_id, _, _ in recetas],
+        nombres=[nombre for _, nombre, _ in recetas],
+        margenes=array("d", (
+            margen if margen is not None else margen_default for _, _, margen in recetas
+        )),
+        costos=costos,
+        precios=precios,
+        columnas=columnas,
+    )
+
+
+def matriz_costos(session: Session) -> MatrizCostos:
+    return caches.para_sesion(session).derivado(session, "simulacion", construir_matriz)
+
+
+def _nuevos_precios(
+    session: Session, matriz: MatrizCostos,
+    variaciones: Mapping[int, float], precios: Mapping[int, float],
+) -> Dict[int, float]:
+    """``ingrediente_id -> costo`` de un escenario (solo ingredientes usados)"""
+    desconocidos = (set(variaciones) | set(precios)) - matriz.precios.keys()
+    if desconocidos:
+        existentes = set(session.exec(
+            select(Ingrediente.id).where(Ingrediente.id.in_(desconocidos))
+        ).all())
+        if desconocidos - existentes:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Ingredientes no encontrados: {sorted(desconocidos - existentes)}",
+            )
+
+    nuevos = {
+        ingrediente_id: matriz.precios[ingrediente_id] * (1 + porcentaje / 100)
+        for ingrediente_id, porcentaje in variaciones.items()
+        if ingrediente_id in matriz.precios
+    }
+    # Un precio absoluto manda sobre la variación del mismo ingrediente
+    nuevos.update(
+        (ingrediente_id, precio) for ingrediente_id, precio in precios.items()
+        if ingrediente_id in matriz.precios
+    )
+    return nuevos
+
+
+def evaluar(matriz: MatrizCostos, nuevos: Mapping[int, float]) -> Tuple["array[float]", Set[int]]:
+    """Costo de cada receta con los precios ``nuevos`` y filas que cambiaron"""
+    costos = array("d", matriz.costos)
+    tocadas: Set[int] = set()
+    for ingrediente_id, precio in nuevos.items():
+        delta = precio - matriz.precios[ingrediente_id]
+        if not delta:
+            continue
+        filas, coeficientes = matriz.columnas[ingrediente_id]
+        for fila, coeficiente in zip(filas, coeficientes):
+            costos[fila] += coeficiente * delta
+        tocadas.update(filas)
+    return costos, tocadas
+
+
+def simular_escenarios(
+    session: Session,
+    escenarios: Sequence[Tuple[Mapping[int, float], Mapping[int, float]]],
+) -> Tuple[MatrizCostos, List[dict]]:
+    """
+    Evalúa ``(variaciones %, precios absolutos)`` por escenario.
+
+    Por receta (en el orden de ``matriz.receta_ids``): costo nuevo, precio
+    sugerido nuevo y cambio del margen real si el precio actual no se mueve.
+    Las recetas que el escenario no toca copian los valores actuales; solo
+    las tocadas se redondean y recalculan.
+    """
+    matriz = matriz_costos(session)
+    margenes = matriz.margenes
+    costo_base = [round(c, 2) for c in matriz.costos]
+    precio_base = [round(c * (1 + m), 2) for c, m in zip(matriz.costos, margenes)]
+    delta_base = [0.0 if c > 0 else None for c in matriz.costos]
+
+    resultados = []
+    for variaciones, precios in escenarios:
+        costos, tocadas = evaluar(matriz, _nuevos_precios(session, matriz, variaciones, precios))
+        costo, precio, margen_delta = costo_base.copy(), precio_base.copy(), delta_base.copy()
+        for fila in tocadas:
+            c, c0, m = costos[fila], matriz.costos[fila], margenes[fila]
+            costo[fila] = round(c, 2)
+            precio[fila] = round(c * (1 + m), 2)
+            # Margen real con el precio actual: c0 (1 + m) / c - 1, menos m
+            margen_delta[fila] = round((1 + m) * (c0 / c - 1), 4) if c > 0 else None
+        resultados.append(
+            {"costo": costo, "precio_sugerido": precio, "margen_delta": margen_delta}
+        )
+    return matriz, resultados
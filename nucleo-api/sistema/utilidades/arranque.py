@@ -0,0 +1,37 @@
+"""
+⚡ ARRANQUE DE LA BASE DE DATOS - ELCAFESIN
+Tablas, migraciones, datos iniciales y acumulados, solo cuando hace falta:
+si la huella guardada en la BD coincide con la del código (ver
+``sistema.configuracion.migraciones``) el arranque es una sola consulta.
+"""
+from typing import Optional
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from sistema.configuracion.base_datos import crear_tablas, engine
+from sistema.configuracion.migraciones import guardar_huella, huella_arranque, leer_huella
+from sistema.servicios.acumulados import acumulados_pendientes, reconstruir_acumulados
+from sistema.utilidades.seed_inicial import VERSION_SEMILLA, inicializar_datos
+
+
+def preparar_base_datos(motor: Optional[Engine] = None) -> bool:
+    """
+    Deja la BD lista para servir. Devuelve True si ya lo estaba (arranque
+    rápido) y False si hubo que crear, migrar o sembrar.
+    """
+    motor = motor or engine
+    huella = huella_arranque(VERSION_SEMILLA)
+    if leer_huella(motor) == huella:
+        print(f"⚡ Base de datos al día ({huella})")
+        return True
+
+    crear_tablas(motor)
+    with Session(motor) as session:
+        inicializar_datos(session)
+        if acumulados_pendientes(session):
+            print("📅 Generando acumulados de ventas desde el historial...")
+            reconstruir_acumulados(session)
+
+    guardar_huella(motor, huella)
+    return False
@@ -0,0 +1,146 @@
+"""
+⏱️ PERFIL DE IMPORTACIÓN - ELCAFESIN
+Cuánto cuesta ``import main`` (lo que paga cada worker al arrancar, cada
+recarga y cada script) y qué módulos se llevan el tiempo, con los datos de
+``python -X importtime`` de un intérprete limpio.
+
+- propio: tiempo del cuerpo del módulo (definir clases, modelos, rutas)
+- acumulado: propio más lo que importó por primera vez
+
+Con varias repeticiones se queda con el mínimo de cada módulo (el ruido
+solo suma). ``tests/test_importacion.py`` usa el total como presupuesto.
+
+Uso (desde nucleo-api/):
+    python -m sistema.utilidades.perfil_importacion [--modulo main] [--top 20]
+        [--repeticiones 3] [--presupuesto-ms 2500] [--json]
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List
+
+BASE_DIR = Path(__file__).resolve().parents[2]  # nucleo-api/
+
+# Tiempo máximo de ``import main`` (ms); IMPORTACION_PRESUPUESTO_MS lo cambia
+PRESUPUESTO_IMPORTACION_MS = 2500.0
+
+_LINEA = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+@dataclass(frozen=True)
+class TiempoImportacion:
+    modulo: str
+    propio_ms: float
+    acumulado_ms: float
+    nivel: int  # profundidad en el árbol de importaciones (0 = raíz)
+
+
+def presupuesto_ms() -> float:
+    return float(os.environ.get("IMPORTACION_PRESUPUESTO_MS", PRESUPUESTO_IMPORTACION_MS))
+
+
+def ejecutar_limpio(codigo: str, *opciones: str) -> subprocess.CompletedProcess:
+    """Corre ``codigo`` en un intérprete nuevo con nucleo-api en el path"""
+    entorno = dict(os.environ)
+    entorno["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(BASE_DIR), entorno.get("PYTHONPATH")])
+    )
+    return subprocess.run(
+        [sys.executable, *opciones, "-c", codigo],
+        cwd=BASE_DIR, env=entorno, capture_output=True, text=True, check=True,
+    )
+
+
+def parsear_importtime(salida: str) -> List[TiempoImportacion]:
+    tiempos = []
+    for linea in salida.splitlines():
+        coincide = _LINEA.match(linea)
+        if coincide:
+            propio, acumulado, sangria, modulo = coincide.groups()
+            tiempos.append(TiempoImportacion(
+                modulo=modulo,
+                propio_ms=int(propio) / 1000,
+                acumulado_ms=int(acumulado) / 1000,
+                nivel=len(sangria) // 2,
+            ))
+    return tiempos
+
+
+def medir_importacion(modulo: str = "main") -> List[TiempoImportacion]:
+    """Una corrida de ``-X importtime`` importando ``modulo``"""
+    return parsear_importtime(ejecutar_limpio(f"import {modulo}", "-X", "importtime").stderr)
+
+
+def perfil_importacion(modulo: str = "main", repeticiones: int = 3) -> Dict[str, TiempoImportacion]:
+    """Mínimo por módulo entre ``repeticiones`` corridas"""
+    perfil: Dict[str, TiempoImportacion] = {}
+    for _ in range(repeticiones):
+        for tiempo in medir_importacion(modulo):
+            previo = perfil.get(tiempo.modulo)
+            if previo is None or tiempo.acumulado_ms < previo.acumulado_ms:
+                perfil[tiempo.modulo] = tiempo
+    return perfil
+
+
+def modulos_propios(perfil: Dict[str, TiempoImportacion], prefijo: str = "sistema") -> List[TiempoImportacion]:
+    """Módulos del proyecto, del más caro al más barato (acumulado)"""
+    return sorted(
+        (t for nombre, t in perfil.items() if nombre == prefijo or nombre.startswith(prefijo + ".")),
+        key=lambda t: -t.acumulado_ms,
+    )
+
+
+def paquetes_externos(perfil: Dict[str, TiempoImportacion], prefijo: str = "sistema") -> Dict[str, float]:
+    """Tiempo propio sumado por paquete de primer nivel (sin los del proyecto)"""
+    paquetes: Dict[str, float] = {}
+    for nombre, tiempo in perfil.items():
+        paquete = nombre.split(".")[0]
+        if paquete not in (prefijo, "main"):
+            paquetes[paquete] = paquetes.get(paquete, 0.0) + tiempo.propio_ms
+    return dict(sorted(paquetes.items(), key=lambda p: -p[1]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modulo", default="main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--presupuesto-ms", type=float, default=None)
+    parser.add_argument("--json", action="store_true", help="Volcar el perfil completo en JSON")
+    args = parser.parse_args()
+
+    perfil = perfil_importacion(args.modulo, args.repeticiones)
+    total = perfil[args.modulo].acumulado_ms
+
+    if args.json:
+        print(json.dumps([asdict(t) for t in perfil.values()], indent=2))
+    else:
+        from benchmarks.comun import imprimir_tabla
+
+        print(f"📦 import {args.modulo}: {total:.0f} ms (mínimo de {args.repeticiones} corridas)\n")
+        imprimir_tabla(
+            ["módulo", "propio ms", "acumulado ms"],
+            [
+                [t.modulo, f"{t.propio_ms:.1f}", f"{t.acumulado_ms:.1f}"]
+                for t in modulos_propios(perfil)[: args.top]
+            ],
+        )
+        print()
+        imprimir_tabla(
+            ["paquete externo", "propio ms"],
+            [[p, f"{ms:.1f}"] for p, ms in list(paquetes_externos(perfil).items())[: args.top]],
+        )
+
+    presupuesto = args.presupuesto_ms
+    if presupuesto is not None and total > presupuesto:
+        print(f"\n❌ {total:.0f} ms supera el presupuesto de {presupuesto:.0f} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
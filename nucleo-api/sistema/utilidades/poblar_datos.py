@@ -8,6 +8,7 @@ from sistema.entidades import (
     Cliente, Proveedor, Ingrediente, Receta, RecetaItem,
     Venta, VentaItem, Movimiento, TipoMovimiento
 )
+from sistema.servicios.acumulados import reconstruir_acumulados
 from datetime import datetime, timedelta
 import random
 
@@ -287,6 +288,8 @@ def poblar_ventas(session: Session, recetas: list, clientes: list):
             
             ventas_creadas += 1
     
+    # Las ventas se insertaron sin pasar por el motor de ventas
+    reconstruir_acumulados(session)
     print(f"✅ {ventas_creadas} ventas creadas")
 
 
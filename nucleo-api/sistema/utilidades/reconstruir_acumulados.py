@@ -0,0 +1,42 @@
+"""
+📅 RECONSTRUIR ACUMULADOS DE VENTAS - ELCAFESIN
+Recalcula los acumulados diarios (``venta_diaria``, ``venta_diaria_receta``)
+y por hora (``venta_hora``, ``venta_hora_receta``, usados por
+``/reportes/serie``) desde el historial de ventas. Necesario una vez al
+actualizar (las ventas previas no tienen acumulado) y después de cargar o
+corregir ventas fuera de la API.
+
+Uso (desde nucleo-api/):
+    python -m sistema.utilidades.reconstruir_acumulados [--desde 2025-01-01]
+"""
+import argparse
+from datetime import date
+
+from sqlmodel import Session
+
+from sistema.configuracion import crear_tablas, engine
+from sistema.servicios.acumulados import reconstruir_acumulados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--desde", type=date.fromisoformat, default=None,
+        help="Solo desde este día (AAAA-MM-DD); por defecto todo el historial",
+    )
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("📅 RECONSTRUYENDO ACUMULADOS DE VENTAS")
+    print("=" * 60)
+
+    crear_tablas()
+    with Session(engine) as session:
+        renglones = reconstruir_acumulados(session, desde=args.desde)
+
+    for tabla, cantidad in renglones.items():
+        print(f"✅ {tabla}: {cantidad} renglones")
+
+
+if __name__ == "__main__":
+    main()
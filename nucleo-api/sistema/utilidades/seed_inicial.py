@@ -1,10 +1,21 @@
 """
 🌱 SEED INICIAL - ELCAFESIN
 Carga datos iniciales: usuarios, roles y permisos
+
+Una consulta para saber qué usuarios faltan (solo esos pagan bcrypt) y
+inserciones masivas con ON CONFLICT DO NOTHING, así dos workers que
+arrancan a la vez no chocan. Subir ``VERSION_SEMILLA`` al cambiar estos
+datos: forma parte de la huella de arranque y obliga a volver a sembrar.
 """
+from datetime import datetime
+
+from sqlalchemy.dialects.sqlite import insert
 from sqlmodel import Session, select
 from sistema.entidades import Usuario, Rol, PermisoRol, Accion
 from sistema.configuracion import hash_password
+from sistema.configuracion.permiso import notificar_cambio_permisos
+
+VERSION_SEMILLA = 1
 
 
 def inicializar_datos(session: Session):
@@ -43,23 +54,37 @@ def inicializar_datos(session: Session):
         }
     ]
 
-    usuarios_creados = 0
-    for datos_usuario in usuarios_iniciales:
-        existe = session.exec(
-            select(Usuario).where(Usuario.username == datos_usuario["username"])
-        ).first()
+    existentes = set(session.exec(
+        select(Usuario.username).where(
+            Usuario.username.in_([u["username"] for u in usuarios_iniciales])
+        )
+    ).all())
+    faltantes = [u for u in usuarios_iniciales if u["username"] not in existentes]
 
-        if not existe:
-            nuevo_usuario = Usuario(
-                username=datos_usuario["username"],
-                nombre=datos_usuario["nombre"],
-                password_hash=hash_password(datos_usuario["password"]),
-                rol=datos_usuario["rol"],
-                activo=True
-            )
-            session.add(nuevo_usuario)
-            usuarios_creados += 1
-            print(f"   📝 Usuario '{datos_usuario['username']}' creado (pass: {datos_usuario['password']})")
+    usuarios_creados = 0
+    if faltantes:
+        ahora = datetime.utcnow()
+        # RETURNING solo trae los insertados (no los que saltó el ON CONFLICT)
+        insertados = set(session.connection().execute(
+            insert(Usuario)
+            .on_conflict_do_nothing(index_elements=["username"])
+            .returning(Usuario.username),
+            [
+                {
+                    "username": datos_usuario["username"],
+                    "nombre": datos_usuario["nombre"],
+                    "password_hash": hash_password(datos_usuario["password"]),
+                    "rol": datos_usuario["rol"],
+                    "activo": True,
+                    "creado_en": ahora,
+                }
+                for datos_usuario in faltantes
+            ],
+        ).scalars())
+        usuarios_creados = len(insertados)
+        for datos_usuario in faltantes:
+            if datos_usuario["username"] in insertados:
+                print(f"   📝 Usuario '{datos_usuario['username']}' creado (pass: {datos_usuario['password']})")
 
     if usuarios_creados > 0:
         session.commit()
@@ -106,22 +131,20 @@ def inicializar_datos(session: Session):
         ("VENDEDOR", "inventario", Accion.VER),  # Solo ver stock
     ]
     
-    permisos_creados = 0
-    for rol, recurso, accion in permisos_base:
-        # Verificar si ya existe
-        existe = session.exec(
-            select(PermisoRol).where(
-                PermisoRol.rol == rol,
-                PermisoRol.recurso == recurso,
-                PermisoRol.accion == accion
-            )
-        ).first()
-        
-        if not existe:
-            session.add(PermisoRol(rol=rol, recurso=recurso, accion=accion))
-            permisos_creados += 1
+    # Requiere el índice único (rol, recurso, accion) de la migración 3
+    ahora = datetime.utcnow()
+    permisos_creados = session.connection().execute(
+        insert(PermisoRol).on_conflict_do_nothing(
+            index_elements=["rol", "recurso", "accion"]
+        ),
+        [
+            {"rol": rol, "recurso": recurso, "accion": accion, "creado_en": ahora}
+            for rol, recurso, accion in permisos_base
+        ],
+    ).rowcount
     
     if permisos_creados > 0:
+        notificar_cambio_permisos(session)  # El INSERT masivo no pasa por el hook de flush
         session.commit()
         print(f"   ✅ {permisos_creados} permisos creados")
     else:
@@ -0,0 +1,151 @@
+"""Pruebas de los acumulados diarios de ventas."""
+import math
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from sistema.entidades import (
+    Ingrediente, Receta, RecetaItem, Venta, VentaDiaria, VentaDiariaReceta, VentaHora,
+    VentaHoraReceta, VentaItem
+)
+from sistema.rutas.reportes_rutas import obtener_dashboard
+from sistema.rutas.ventas_rutas import ItemVentaCreate
+from sistema.servicios.acumulados import acumulados_pendientes, reconstruir_acumulados
+from sistema.servicios.motor_ventas import registrar_venta
+
+
+@pytest.fixture()
+def engine():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture()
+def recetas(engine):
+    with Session(engine) as session:
+        cafe = Ingrediente(nombre="Café", unidad="kg", costo_por_unidad=100, stock=1000)
+        session.add(cafe)
+        session.commit()
+        ids = []
+        for nombre, cantidad in (("Espresso", 0.01), ("Americano", 0.02)):
+            receta = Receta(nombre=nombre, margen=1.0)
+            session.add(receta)
+            session.commit()
+            session.add(RecetaItem(receta_id=receta.id, ingrediente_id=cafe.id, cantidad=cantidad))
+            session.commit()
+            ids.append(receta.id)
+        return ids
+
+
+def _vender(engine, lineas, sucursal="Centro"):
+    with Session(engine) as session:
+        return registrar_venta(
+            session, [ItemVentaCreate(receta_id=r, cantidad=c) for r, c in lineas], sucursal=sucursal
+        ).total
+
+
+def _acumulados(engine):
+    with Session(engine) as session:
+        dias = {
+            (fila.fecha, fila.sucursal): (fila.num_ventas, round(fila.total, 6))
+            for fila in session.exec(select(VentaDiaria))
+        }
+        recetas = {
+            (fila.fecha, fila.sucursal, fila.receta_id): (fila.unidades, round(fila.monto, 6))
+            for fila in session.exec(select(VentaDiariaReceta))
+        }
+    return dias, recetas
+
+
+def test_cada_venta_actualiza_los_acumulados(engine, recetas):
+    espresso, americano = recetas
+    totales = [
+        _vender(engine, [(espresso, 2), (americano, 1), (espresso, 1)]),
+        _vender(engine, [(americano, 3)]),
+        _vender(engine, [(espresso, 1)], sucursal=None),
+    ]
+
+    dias, por_receta = _acumulados(engine)
+    hoy = datetime.utcnow().date()
+
+    assert dias[(hoy, "Centro")] == (2, round(totales[0] + totales[1], 6))
+    assert dias[(hoy, "")] == (1, round(totales[2], 6))
+    assert por_receta[(hoy, "Centro", espresso)][0] == 3  # repetida en el ticket
+    assert por_receta[(hoy, "Centro", americano)][0] == 4
+
+    with Session(engine) as session:
+        horas = session.exec(select(VentaHora).where(VentaHora.sucursal == "Centro")).all()
+        por_receta_hora = session.exec(
+            select(VentaHoraReceta).where(VentaHoraReceta.receta_id == espresso)
+        ).all()
+        tablero = obtener_dashboard(session=session, usuario_actual=None)
+    assert sum(h.num_ventas for h in horas) == 2
+    assert sum(r.num_ventas for r in por_receta_hora) == 2  # tickets, no renglones
+    assert sum(r.unidades for r in por_receta_hora) == 4
+    assert tablero["num_ventas_hoy"] == 3
+    assert math.isclose(tablero["ventas_hoy"], round(sum(totales), 2))
+
+
+def test_reconstruir_desde_historial_coincide_con_incremental(engine, recetas):
+    espresso, americano = recetas
+    _vender(engine, [(espresso, 2), (americano, 1)])
+    _vender(engine, [(americano, 1)], sucursal="Norte")
+    incrementales = _acumulados(engine)
+
+    # Ventas históricas insertadas sin el motor (como poblar_datos)
+    with Session(engine) as session:
+        for dias_atras in (3, 3, 40):
+            venta = Venta(
+                sucursal="Centro", total=10.0,
+                creado_en=datetime.utcnow() - timedelta(days=dias_atras),
+            )
+            session.add(venta)
+            session.flush()
+            session.add(VentaItem(venta_id=venta.id, receta_id=espresso, cantidad=1, subtotal=10.0))
+        session.commit()
+
+        reconstruir_acumulados(session)
+        assert not acumulados_pendientes(session)
+
+    dias, por_receta = _acumulados(engine)
+    hace_3 = (datetime.utcnow() - timedelta(days=3)).date()
+    assert dias[(hace_3, "Centro")] == (2, 20.0)
+    assert por_receta[(hace_3, "Centro", espresso)] == (2.0, 20.0)
+    assert len(dias) == len(incrementales[0]) + 2
+    for clave, valor in incrementales[0].items():
+        assert dias[clave] == valor
+
+    # Parcial: solo toca días desde ``desde``
+    with Session(engine) as session:
+        renglones = reconstruir_acumulados(session, desde=hace_3)
+    assert renglones["venta_diaria"] == len(dias) - 1
+    assert _acumulados(engine) == (dias, por_receta)
+
+
+def test_dashboard_no_recorre_ventas(engine, recetas):
+    for _ in range(30):
+        _vender(engine, [(recetas[0], 1)])
+
+    sentencias = []
+    event.listen(engine, "before_cursor_execute", lambda *args: sentencias.append(args[2]))
+    with Session(engine) as session:
+        obtener_dashboard(session=session, usuario_actual=None)
+
+    assert len(sentencias) == 2  # acumulados + stock bajo
+    assert not any("FROM venta " in s or "FROM venta\n" in s for s in sentencias)
+
+
+def test_pendientes_en_bd_anterior(engine):
+    with Session(engine) as session:
+        assert not acumulados_pendientes(session)
+        session.add(Venta(total=5.0, creado_en=datetime(2024, 3, 1, 10)))
+        session.commit()
+        assert acumulados_pendientes(session)
+        reconstruir_acumulados(session)
+        assert session.get(VentaDiaria, (date(2024, 3, 1), "")).total == 5.0
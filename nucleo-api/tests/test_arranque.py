@@ -0,0 +1,99 @@
+"""
+Arranque de la BD: huella, datos iniciales masivos y migración de permisos únicos.
+"""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+
+from sistema.configuracion.migraciones import MIGRACIONES, Migracion, leer_huella, migrar
+from sistema.utilidades import arranque, seed_inicial
+from sistema.utilidades.arranque import preparar_base_datos
+
+
+@pytest.fixture(name="motor")
+def motor_fixture(monkeypatch):
+    # bcrypt real no aporta nada aquí
+    monkeypatch.setattr(seed_inicial, "hash_password", lambda password: f"hash:{password}")
+    return create_engine("sqlite://", poolclass=StaticPool)
+
+
+def _contar(motor, tabla):
+    with motor.connect() as conexion:
+        return conexion.execute(text(f"SELECT count(*) FROM {tabla}")).scalar()
+
+
+def test_primer_arranque_siembra_y_guarda_la_huella(motor):
+    assert leer_huella(motor) is None
+    assert preparar_base_datos(motor) is False
+
+    assert _contar(motor, "usuario") == 4
+    assert _contar(motor, "permiso_rol") == 28
+    assert leer_huella(motor) == arranque.huella_arranque(seed_inicial.VERSION_SEMILLA)
+
+
+def test_segundo_arranque_es_una_consulta(motor, contar_sentencias, monkeypatch):
+    preparar_base_datos(motor)
+
+    def no_hashear(password):
+        raise AssertionError("el arranque rápido no debe hashear")
+
+    monkeypatch.setattr(seed_inicial, "hash_password", no_hashear)
+    with contar_sentencias(motor, maximo=1):
+        assert preparar_base_datos(motor) is True
+
+
+def test_resiembra_solo_paga_los_usuarios_faltantes(motor, monkeypatch, capsys):
+    preparar_base_datos(motor)
+    with motor.begin() as conexion:
+        conexion.execute(text("DELETE FROM usuario WHERE username = 'gerente1'"))
+        conexion.execute(text("DELETE FROM huella_arranque"))
+
+    hasheados = []
+    monkeypatch.setattr(seed_inicial, "hash_password", lambda p: hasheados.append(p) or p)
+    capsys.readouterr()
+    assert preparar_base_datos(motor) is False
+
+    assert hasheados == ["gerente123"]
+    salida = capsys.readouterr().out
+    assert [linea.split("'")[1] for linea in salida.splitlines() if "📝" in linea] == ["gerente1"]
+    assert "1 usuarios creados" in salida
+    assert _contar(motor, "usuario") == 4
+    assert _contar(motor, "permiso_rol") == 28
+
+
+def test_cambiar_semilla_o_migraciones_obliga_al_arranque_completo(motor, monkeypatch):
+    preparar_base_datos(motor)
+
+    monkeypatch.setattr(arranque, "VERSION_SEMILLA", seed_inicial.VERSION_SEMILLA + 1)
+    assert preparar_base_datos(motor) is False
+    assert preparar_base_datos(motor) is True
+
+    nueva = Migracion(MIGRACIONES[-1].version + 1, "prueba", lambda conexion: None)
+    monkeypatch.setattr(
+        "sistema.configuracion.migraciones.MIGRACIONES", (*MIGRACIONES, nueva)
+    )
+    assert preparar_base_datos(motor) is False
+    assert preparar_base_datos(motor) is True
+
+
+def test_migracion_de_permisos_unicos_quita_duplicados():
+    motor = create_engine("sqlite://", poolclass=StaticPool)
+    with motor.begin() as conexion:
+        conexion.exec_driver_sql(
+            "CREATE TABLE permiso_rol (id INTEGER PRIMARY KEY, rol VARCHAR(20) NOT NULL, "
+            "recurso VARCHAR(50) NOT NULL, accion VARCHAR(8) NOT NULL, creado_en DATETIME NOT NULL)"
+        )
+        conexion.exec_driver_sql(
+            "INSERT INTO permiso_rol (rol, recurso, accion, creado_en) VALUES "
+            "('ADMIN', 'ventas', 'VER', '2026-01-01'), ('ADMIN', 'ventas', 'VER', '2026-01-02'), "
+            "('VENDEDOR', 'ventas', 'VER', '2026-01-01')"
+        )
+
+    SQLModel.metadata.create_all(motor)  # Deja permiso_rol como estaba
+    migrar(motor)
+
+    with motor.connect() as conexion:
+        assert conexion.exec_driver_sql(
+            "SELECT id, rol FROM permiso_rol ORDER BY id"
+        ).all() == [(1, "ADMIN"), (3, "VENDEDOR")]
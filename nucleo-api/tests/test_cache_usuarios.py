@@ -0,0 +1,102 @@
+"""Pruebas de la cache de usuarios autenticados."""
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+
+from sistema.configuracion import crear_token, obtener_ajustes, obtener_usuario_actual
+from sistema.configuracion.cache_usuarios import cache_para
+from sistema.contratos.auth_contratos import UsuarioUpdate
+from sistema.entidades import Rol, Usuario
+from sistema.rutas import usuarios_rutas
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'usuarios.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture()
+def usuarios(engine):
+    with Session(engine) as session:
+        admin = Usuario(username="admin", password_hash="x", rol=Rol.ADMIN, activo=True)
+        caja = Usuario(username="caja1", password_hash="x", rol=Rol.VENDEDOR, activo=True)
+        session.add_all([admin, caja])
+        session.commit()
+        return {"admin": admin.id, "caja1": caja.id}
+
+
+def test_peticiones_repetidas_no_consultan_usuario(engine, usuarios):
+    token = crear_token("caja1", extra_data={"rol": "VENDEDOR"})
+    sentencias = []
+    event.listen(engine, "before_cursor_execute", lambda *args: sentencias.append(args[2]))
+
+    for _ in range(20):
+        with Session(engine) as session:
+            usuario = obtener_usuario_actual(token=token, session=session)
+            assert usuario.username == "caja1"
+            assert usuario.rol == "VENDEDOR"
+
+    consultas_usuario = [sql for sql in sentencias if "FROM usuario" in sql]
+    assert len(consultas_usuario) == 1
+
+    with Session(engine) as session:
+        estadisticas = cache_para(session).estadisticas()
+    assert estadisticas["aciertos"] == 19
+    assert estadisticas["fallos"] == 1
+
+
+def test_desactivar_expulsa_al_instante(engine, usuarios):
+    token = crear_token("caja1")
+
+    with Session(engine) as session:
+        obtener_usuario_actual(token=token, session=session)
+
+    with Session(engine) as session:
+        admin = session.get(Usuario, usuarios["admin"])
+        usuarios_rutas.desactivar_usuario(usuarios["caja1"], session=session, usuario_actual=admin)
+
+    with Session(engine) as session:
+        with pytest.raises(HTTPException) as error:
+            obtener_usuario_actual(token=token, session=session)
+        assert error.value.status_code == 403
+
+
+def test_actualizar_refleja_el_nuevo_rol(engine, usuarios):
+    token = crear_token("caja1")
+
+    with Session(engine) as session:
+        assert obtener_usuario_actual(token=token, session=session).rol == "VENDEDOR"
+
+    with Session(engine) as session:
+        admin = session.get(Usuario, usuarios["admin"])
+        usuarios_rutas.actualizar_usuario(
+            usuarios["caja1"], UsuarioUpdate(rol=Rol.GERENTE), session=session, usuario_actual=admin
+        )
+
+    with Session(engine) as session:
+        assert obtener_usuario_actual(token=token, session=session).rol == "GERENTE"
+
+
+def test_capacidad_y_ttl(engine, usuarios, monkeypatch):
+    ajustes = obtener_ajustes()
+    monkeypatch.setattr(ajustes, "USUARIOS_CACHE_MAXIMO", 2)
+
+    tokens = [crear_token("caja1", extra_data={"n": n}) for n in range(3)]
+    with Session(engine) as session:
+        for token in tokens:
+            obtener_usuario_actual(token=token, session=session)
+        assert cache_para(session).estadisticas()["entradas"] == 2
+
+    monkeypatch.setattr(ajustes, "USUARIOS_CACHE_TTL_SEGUNDOS", 0.0)
+    with Session(engine) as session:
+        cache = cache_para(session)
+        obtener_usuario_actual(token=tokens[0], session=session)
+        fallos = cache.fallos
+        obtener_usuario_actual(token=tokens[0], session=session)
+        assert cache.fallos == fallos + 1
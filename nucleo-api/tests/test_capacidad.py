@@ -0,0 +1,172 @@
+"""Pruebas del tablero de capacidad ("cuántos puedo hacer")."""
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlmodel import Session
+
+from sistema.configuracion import obtener_ajustes
+from sistema.entidades import Ingrediente, Receta, RecetaItem
+from sistema.rutas import ingredientes_rutas, recetas_rutas
+from sistema.servicios.capacidad import motores, registrar_consumo
+from sistema.servicios.motor_ventas import registrar_venta
+
+
+@pytest.fixture
+def barra(test_engine, monkeypatch):
+    # Sin relecturas periódicas: cada cambio debe llegar por los hooks
+    monkeypatch.setattr(obtener_ajustes(), "CAPACIDAD_REFRESCO_SEGUNDOS", 3600.0)
+    with Session(test_engine) as session:
+        cafe = Ingrediente(nombre="Café", unidad="kg", costo_por_unidad=300.0, stock=1.0)
+        leche = Ingrediente(nombre="Leche", unidad="l", costo_por_unidad=25.0, stock=10.0)
+        cacao = Ingrediente(nombre="Cacao", unidad="kg", costo_por_unidad=200.0, stock=0.5)
+        azucar = Ingrediente(nombre="Azúcar", unidad="kg", costo_por_unidad=30.0, stock=5.0)
+        latte = Receta(nombre="Latte", margen=1.0)
+        mocha = Receta(nombre="Mocha", margen=1.0)
+        agua = Receta(nombre="Agua caliente", margen=1.0)
+        session.add_all([cafe, leche, cacao, azucar, latte, mocha, agua])
+        session.flush()
+        session.add_all([
+            RecetaItem(receta_id=latte.id, ingrediente_id=cafe.id, cantidad=0.02),
+            RecetaItem(receta_id=latte.id, ingrediente_id=leche.id, cantidad=0.2, merma=0.25),
+            RecetaItem(receta_id=mocha.id, ingrediente_id=cafe.id, cantidad=0.02),
+            RecetaItem(receta_id=mocha.id, ingrediente_id=leche.id, cantidad=0.15),
+            RecetaItem(receta_id=mocha.id, ingrediente_id=cacao.id, cantidad=0.025),
+            RecetaItem(receta_id=agua.id, ingrediente_id=azucar.id, cantidad=0.01),
+        ])
+        session.commit()
+        return SimpleNamespace(
+            cafe=cafe.id, leche=leche.id, cacao=cacao.id, azucar=azucar.id,
+            latte=latte.id, mocha=mocha.id, agua=agua.id,
+        )
+
+
+def _tablero(engine):
+    with Session(engine) as session:
+        return {
+            r["receta_nombre"]: r
+            for r in recetas_rutas.tablero_capacidad(session=session, usuario_actual=None)["recetas"]
+        }
+
+
+def test_unidades_y_cuello_de_botella(test_engine, barra):
+    tablero = _tablero(test_engine)
+
+    # Latte: café 1.0 / 0.02 = 50, leche 10 / 0.25 = 40
+    assert tablero["Latte"]["unidades"] == 40
+    assert tablero["Latte"]["cuello_botella"]["ingrediente_nombre"] == "Leche"
+    assert tablero["Latte"]["cuello_botella"]["por_unidad"] == 0.25
+    # Mocha: café 50, leche 66, cacao 20
+    assert tablero["Mocha"]["unidades"] == 20
+    assert tablero["Mocha"]["cuello_botella"]["ingrediente_id"] == barra.cacao
+    assert list(tablero) == ["Agua caliente", "Latte", "Mocha"]
+
+
+def test_venta_actualiza_solo_las_recetas_afectadas(test_engine, barra, contar_sentencias):
+    _tablero(test_engine)
+    motor = motores.para(test_engine)
+    recalculadas = motor.recalculadas
+
+    with Session(test_engine) as session:
+        registrar_venta(session, [SimpleNamespace(receta_id=barra.mocha, cantidad=4)])
+
+    with contar_sentencias(test_engine) as sentencias:
+        tablero = _tablero(test_engine)
+
+    assert not any("FROM ingrediente" in s for s in sentencias)
+    assert motor.recalculadas - recalculadas == 2  # latte y mocha, no el agua
+    assert tablero["Mocha"]["unidades"] == 16  # cacao 0.4 / 0.025
+    assert tablero["Latte"]["unidades"] == 37  # leche 9.4 / 0.25
+    assert tablero["Latte"]["cuello_botella"]["stock"] == pytest.approx(9.4)
+
+
+def test_reabasto_por_patch(test_engine, barra):
+    _tablero(test_engine)
+    with Session(test_engine) as session:
+        ingredientes_rutas.actualizar_parcial_ingrediente(
+            ingrediente_id=barra.cacao, datos={"stock": 5.0}, session=session, usuario_actual=None,
+        )
+
+    tablero = _tablero(test_engine)
+    assert tablero["Mocha"]["unidades"] == 50
+    assert tablero["Mocha"]["cuello_botella"]["ingrediente_nombre"] == "Café"
+
+
+def test_escritura_de_otro_worker_llega_con_la_relectura(test_engine, barra, monkeypatch):
+    _tablero(test_engine)
+    with Session(test_engine) as session:
+        session.connection().exec_driver_sql("UPDATE ingrediente SET stock = 0.1 WHERE nombre = 'Café'")
+        session.commit()
+    assert _tablero(test_engine)["Latte"]["unidades"] == 40
+
+    monkeypatch.setattr(obtener_ajustes(), "CAPACIDAD_REFRESCO_SEGUNDOS", 0.0)
+    assert _tablero(test_engine)["Latte"]["unidades"] == 5
+
+
+def test_mezcla_reparte_ingredientes_compartidos(test_engine, barra):
+    with Session(test_engine) as session:
+        respuesta = recetas_rutas.capacidad_conjunta(
+            datos=recetas_rutas.MezclaProduccion(mezcla={barra.latte: 3, barra.mocha: 1}),
+            session=session, usuario_actual=None,
+        )
+
+    # Por mezcla: café 0.08, leche 0.9, cacao 0.025 -> café 12.5, leche 11.1, cacao 20
+    assert respuesta["veces"] == pytest.approx(10 / 0.9, abs=1e-4)
+    assert respuesta["cuello_botella"]["ingrediente_nombre"] == "Leche"
+    assert {r["receta_nombre"]: r["unidades"] for r in respuesta["recetas"]} == {
+        "Latte": 33, "Mocha": 11
+    }
+
+    with Session(test_engine) as session, pytest.raises(HTTPException) as error:
+        recetas_rutas.capacidad_conjunta(
+            datos=recetas_rutas.MezclaProduccion(mezcla={999: 1}), session=session, usuario_actual=None,
+        )
+    assert error.value.status_code == 404
+
+
+def test_relectura_con_venta_en_curso_no_la_cuenta_dos_veces(test_engine, barra, monkeypatch):
+    _tablero(test_engine)
+    motor = motores.para(test_engine)
+    monkeypatch.setattr(obtener_ajustes(), "CAPACIDAD_REFRESCO_SEGUNDOS", 0.0)
+
+    # Venta ya confirmada en la BD cuyo descuento en memoria aún no corre
+    motor.iniciar_consumo()
+    with Session(test_engine) as session:
+        session.connection().exec_driver_sql("UPDATE ingrediente SET stock = 0.4 WHERE nombre = 'Cacao'")
+        session.commit()
+    assert _tablero(test_engine)["Mocha"]["unidades"] == 20  # relectura descartada
+    motor.consumir({barra.cacao: 0.1})
+
+    monkeypatch.setattr(obtener_ajustes(), "CAPACIDAD_REFRESCO_SEGUNDOS", 3600.0)
+    assert _tablero(test_engine)["Mocha"]["unidades"] == 16
+
+
+def test_relectura_no_pisa_un_stock_fijado_mientras_corria(test_engine, barra, monkeypatch):
+    _tablero(test_engine)
+    motor = motores.para(test_engine)
+    monkeypatch.setattr(obtener_ajustes(), "CAPACIDAD_REFRESCO_SEGUNDOS", 0.0)
+
+    def reabasto_concurrente(conexion, cursor, sentencia, *args):
+        if sentencia.startswith("SELECT ingrediente.id, ingrediente.stock"):
+            motor.fijar_stock({barra.cacao: 5.0})
+
+    event.listen(test_engine, "after_cursor_execute", reabasto_concurrente)
+    try:
+        tablero = _tablero(test_engine)
+    finally:
+        event.remove(test_engine, "after_cursor_execute", reabasto_concurrente)
+    assert tablero["Mocha"]["unidades"] == 50  # la foto (cacao 0.5) se descartó
+
+
+def test_venta_sin_commit_no_queda_en_curso(test_engine, barra):
+    motor = motores.para(test_engine)
+    # Como en registrar_venta: el consumo se registra con la reserva ya hecha
+    with Session(test_engine) as session:
+        session.connection()
+        registrar_consumo(session, {barra.cacao: 0.1})
+        session.rollback()
+    with Session(test_engine) as session:
+        session.connection()
+        registrar_consumo(session, {barra.cacao: 0.1})
+    assert motor._ventas_en_curso == 0
@@ -0,0 +1,230 @@
+"""Pruebas de la cache de costos de recetas y su invalidación."""
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session, select
+
+from sistema.configuracion import obtener_ajustes
+from sistema.configuracion.generaciones import incrementar_generacion
+from sistema.entidades import Ingrediente, Receta, RecetaItem
+from sistema.rutas import ingredientes_rutas, recetas_rutas
+from sistema.servicios.costos_recetas import GENERACION, caches
+from sistema.servicios.lista_precios import lista_precios
+
+
+@pytest.fixture
+def menu(test_engine):
+    """30 recetas; la receta n usa el insumo n % 5 y, si n es par, la leche"""
+    with Session(test_engine) as session:
+        insumos = [
+            Ingrediente(nombre=f"Insumo {n}", unidad="kg", costo_por_unidad=10.0 + n, stock=50.0,
+                        min_stock=1.0)
+            for n in range(5)
+        ]
+        leche = Ingrediente(nombre="Leche", unidad="l", costo_por_unidad=20.0, stock=8.0, min_stock=2.0)
+        session.add_all(insumos + [leche])
+        session.commit()
+        for n in range(30):
+            receta = Receta(nombre=f"Receta {n}", margen=0.5)
+            session.add(receta)
+            session.flush()
+            session.add(RecetaItem(receta_id=receta.id, ingrediente_id=insumos[n % 5].id, cantidad=1.0))
+            if n % 2 == 0:
+                session.add(RecetaItem(receta_id=receta.id, ingrediente_id=leche.id, cantidad=0.5, merma=0.1))
+        session.commit()
+        return {"insumos": [i.id for i in insumos], "leche": leche.id}
+
+
+def _listar(engine):
+    with Session(engine) as session:
+        return {r.nombre: r for r in recetas_rutas.listar_recetas(session=session, usuario_actual=None)}
+
+
+def test_listado_en_consultas_constantes(test_engine, menu, contar_sentencias):
+    with contar_sentencias(test_engine, maximo=4):  # generación + recetas + items + stock
+        primero = _listar(test_engine)
+    with contar_sentencias(test_engine, maximo=2) as sentencias:  # recetas + stock
+        segundo = _listar(test_engine)
+
+    assert not any("receta_item" in s for s in sentencias)
+    assert primero == segundo
+    receta = primero["Receta 2"]
+    assert receta.costo_total == round(12.0 + 0.5 * 1.1 * 20.0, 2)
+    assert receta.precio_sugerido == round((12.0 + 0.5 * 1.1 * 20.0) * 1.5, 2)
+    assert [i.ingrediente_nombre for i in receta.items] == ["Insumo 2", "Leche"]
+    assert caches.para(test_engine).estadisticas()["recetas"] == 30
+
+
+def test_cambio_de_precio_recalcula_solo_las_recetas_afectadas(test_engine, menu):
+    _listar(test_engine)
+    cache = caches.para(test_engine)
+    calculadas = cache.calculadas
+
+    with Session(test_engine) as session:
+        ingredientes_rutas.actualizar_parcial_ingrediente(
+            ingrediente_id=menu["leche"], datos={"costo_por_unidad": 30.0},
+            session=session, usuario_actual=None,
+        )
+
+    recetas = _listar(test_engine)
+    assert cache.calculadas - calculadas == 15
+    assert recetas["Receta 4"].costo_total == round(14.0 + 0.5 * 1.1 * 30.0, 2)
+    assert recetas["Receta 3"].costo_total == 13.0
+
+
+def test_cambio_de_stock_no_invalida_pero_se_ve(test_engine, menu):
+    _listar(test_engine)
+    cache = caches.para(test_engine)
+    calculadas = cache.calculadas
+
+    with Session(test_engine) as session:
+        datos = session.get(Ingrediente, menu["leche"]).model_copy(update={"stock": 1.5})
+        ingredientes_rutas.actualizar_ingrediente(
+            ingrediente_id=menu["leche"], datos=datos, session=session, usuario_actual=None,
+        )
+
+    recetas = _listar(test_engine)
+    assert cache.calculadas == calculadas
+    assert recetas["Receta 0"].items[1].stock == 1.5
+
+
+def test_editar_items_invalida_la_receta(test_engine, menu):
+    _listar(test_engine)
+    with Session(test_engine) as session:
+        receta = session.exec(
+            select(Receta).where(Receta.nombre == "Receta 1")
+        ).one()
+        actualizada = recetas_rutas.actualizar_receta(
+            receta_id=receta.id,
+            datos=recetas_rutas.RecetaUpdate(
+                nombre="Receta 1", margen=1.0,
+                items=[recetas_rutas.RecetaItemPayload(ingrediente_id=menu["leche"], cantidad=2.0)],
+            ),
+            session=session, usuario_actual=None,
+        )
+
+    assert actualizada.costo_total == 40.0
+    assert _listar(test_engine)["Receta 1"].precio_sugerido == 80.0
+
+
+def test_escritura_de_otro_worker_vacia_la_cache(test_engine, menu, monkeypatch):
+    monkeypatch.setattr(obtener_ajustes(), "COSTOS_REVISION_SEGUNDOS", 0.0)
+    _listar(test_engine)
+    cache = caches.para(test_engine)
+    calculadas = cache.calculadas
+
+    # Otro proceso: UPDATE directo + generación, sin pasar por esta cache
+    with Session(test_engine) as session:
+        session.connection().exec_driver_sql("UPDATE ingrediente SET costo_por_unidad = 0")
+        incrementar_generacion(session, GENERACION)
+        session.commit()
+
+    assert all(r.costo_total == 0 for r in _listar(test_engine).values())
+    assert cache.calculadas - calculadas == 30
+
+
+def test_impacto_usa_el_indice_inverso(test_engine, menu, contar_sentencias):
+    _listar(test_engine)
+    with Session(test_engine) as session:
+        ingredientes_rutas.impacto_cambio_precio(
+            ingrediente_id=menu["insumos"][0], costo_nuevo=None, session=session, usuario_actual=None,
+        )
+        # Índice y costos ya en memoria: ingrediente + recetas + explosión
+        # (solo de las recetas dependientes)
+        with contar_sentencias(test_engine, maximo=3) as sentencias:
+            impacto = ingredientes_rutas.impacto_cambio_precio(
+                ingrediente_id=menu["leche"], costo_nuevo=30.0, session=session, usuario_actual=None,
+            )
+
+    assert sum("receta_item" in s for s in sentencias) == 1
+    assert len(impacto["recetas"]) == 15
+    receta_4 = next(r for r in impacto["recetas"] if r["receta_nombre"] == "Receta 4")
+    assert receta_4["costo_actual"] == round(14.0 + 0.55 * 20.0, 2)
+    assert receta_4["costo_nuevo"] == round(14.0 + 0.55 * 30.0, 2)
+    assert receta_4["diferencia_precio"] == round(0.55 * 10.0 * 1.5, 2)
+
+
+def test_indice_se_actualiza_al_editar_items(test_engine, menu):
+    with Session(test_engine) as session:
+        assert "Receta 1" not in {
+            r["receta_nombre"] for r in ingredientes_rutas.impacto_cambio_precio(
+                ingrediente_id=menu["leche"], costo_nuevo=None, session=session, usuario_actual=None,
+            )["recetas"]
+        }
+        receta = session.exec(select(Receta).where(Receta.nombre == "Receta 1")).one()
+        recetas_rutas.actualizar_receta(
+            receta_id=receta.id,
+            datos=recetas_rutas.RecetaUpdate(
+                nombre="Receta 1",
+                items=[recetas_rutas.RecetaItemPayload(ingrediente_id=menu["leche"], cantidad=1.0)],
+            ),
+            session=session, usuario_actual=None,
+        )
+        impacto = ingredientes_rutas.impacto_cambio_precio(
+            ingrediente_id=menu["leche"], costo_nuevo=None, session=session, usuario_actual=None,
+        )
+
+    assert len(impacto["recetas"]) == 16
+
+
+def test_actualizacion_masiva_de_precios(test_engine, menu):
+    with Session(test_engine) as session:
+        sin_margen = session.exec(select(Receta).where(Receta.nombre == "Receta 4")).one()
+        sin_margen.margen = 0.0
+        session.add(sin_margen)
+        session.commit()
+        sin_margen_id = sin_margen.id
+    _listar(test_engine)
+    cache = caches.para(test_engine)
+    calculadas = cache.calculadas
+
+    with Session(test_engine) as session:
+        respuesta = ingredientes_rutas.actualizar_precios(
+            precios=[
+                ingredientes_rutas.PrecioIngrediente(ingrediente_id=menu["leche"], costo_por_unidad=30.0),
+                ingredientes_rutas.PrecioIngrediente(ingrediente_id=menu["insumos"][1], costo_por_unidad=1.0),
+            ],
+            session=session, usuario_actual=None,
+        )
+
+    # Pares (leche) + n % 5 == 1 (los impares 1, 11, 21 no usan leche)
+    assert respuesta["actualizados"] == 2
+    assert len(respuesta["recetas"]) == 18
+    recetas = _listar(test_engine)
+    assert cache.calculadas - calculadas == 18
+    for cambio in respuesta["recetas"]:
+        assert recetas[cambio["receta_nombre"]].costo_total == cambio["costo_nuevo"]
+        assert recetas[cambio["receta_nombre"]].precio_sugerido == cambio["precio_nuevo"]
+    receta_4 = next(c for c in respuesta["recetas"] if c["receta_nombre"] == "Receta 4")
+    assert receta_4["precio_actual"] == receta_4["costo_actual"] == round(14.0 + 0.55 * 20.0, 2)
+    assert receta_4["precio_nuevo"] == receta_4["costo_nuevo"] == round(14.0 + 0.55 * 30.0, 2)
+    with Session(test_engine) as session:
+        assert lista_precios(session).precios[sin_margen_id] == pytest.approx(receta_4["precio_nuevo"])
+
+    with Session(test_engine) as session, pytest.raises(HTTPException) as error:
+        ingredientes_rutas.actualizar_precios(
+            precios=[ingredientes_rutas.PrecioIngrediente(ingrediente_id=999, costo_por_unidad=1.0)],
+            session=session, usuario_actual=None,
+        )
+    assert error.value.status_code == 404
+
+
+def test_impacto_sin_costo_nuevo_usa_el_actual(client, auth_headers, sample_receta, sample_ingrediente):
+    respuesta = client.get(f"/ingredientes/{sample_ingrediente.id}/impacto", headers=auth_headers)
+
+    assert respuesta.status_code == 200
+    impacto = respuesta.json()
+    assert impacto["costo_nuevo"] == impacto["costo_actual"] == 150.0
+    assert [r["receta_nombre"] for r in impacto["recetas"]] == ["Café Americano"]
+    assert impacto["recetas"][0]["costo_nuevo"] == impacto["recetas"][0]["costo_actual"]
+
+
+def test_margen_cero_explicito(test_engine, menu):
+    with Session(test_engine) as session:
+        receta = session.exec(select(Receta).where(Receta.nombre == "Receta 3")).one()
+        receta.margen = 0.0
+        session.add(receta)
+        session.commit()
+        precio_lista = lista_precios(session).precios[receta.id]
+
+    assert precio_lista == 13.0
+    assert _listar(test_engine)["Receta 3"].precio_sugerido == 13.0
@@ -0,0 +1,102 @@
+"""Pruebas del escritor de auditoría en lotes."""
+import threading
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, func, select
+
+from sistema.configuracion import obtener_ajustes
+from sistema.entidades import LogSesion, Rol, Usuario
+from sistema.servicios.escritor_auditoria import EscritorAuditoria
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'auditoria.db'}", connect_args={"check_same_thread": False}
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Usuario(username="caja1", password_hash="x", rol=Rol.VENDEDOR))
+        session.commit()
+    return engine
+
+
+@pytest.fixture()
+def escritor():
+    escritor = EscritorAuditoria()
+    yield escritor
+    escritor.detener()
+
+
+def _contar(engine) -> int:
+    with Session(engine) as session:
+        return session.exec(select(func.count()).select_from(LogSesion)).one()
+
+
+def _registrar(escritor, engine, accion="LOGIN") -> None:
+    with Session(engine) as session:
+        escritor.registrar(session, usuario_id=1, accion=accion, ip="10.0.0.1")
+
+
+def test_agrupa_en_lotes_y_vacia_al_detener(engine, escritor, monkeypatch):
+    ajustes = obtener_ajustes()
+    monkeypatch.setattr(ajustes, "AUDITORIA_LOTE", 20)
+    monkeypatch.setattr(ajustes, "AUDITORIA_INTERVALO_SEGUNDOS", 30.0)
+
+    for i in range(50):
+        _registrar(escritor, engine, f"LOGIN_{i}")
+
+    escritor.detener()  # no espera al intervalo: escribe lo pendiente ya
+
+    assert _contar(engine) == 50
+    assert escritor.estadisticas() == {
+        "pendientes": 0, "escritos": 50, "lotes": 3,
+        "sincronos": 0, "descartados": 0, "fallidos": 0,
+    }
+    with Session(engine) as session:
+        primero = session.exec(select(LogSesion).order_by(LogSesion.id)).first()
+    assert primero.accion == "LOGIN_0"
+
+
+@pytest.mark.parametrize("politica, esperados", [("sincrono", 4), ("descartar", 3)])
+def test_cola_llena_aplica_la_politica(engine, escritor, monkeypatch, politica, esperados):
+    ajustes = obtener_ajustes()
+    monkeypatch.setattr(ajustes, "AUDITORIA_COLA_MAXIMA", 2)
+    monkeypatch.setattr(ajustes, "AUDITORIA_LOTE", 1)
+    monkeypatch.setattr(ajustes, "AUDITORIA_POLITICA", politica)
+
+    # El hilo queda atascado escribiendo el primer log
+    escribiendo, liberar = threading.Event(), threading.Event()
+    insertar = escritor._insertar
+
+    def insertar_lento(engine_, filas):
+        escribiendo.set()
+        liberar.wait(5)
+        insertar(engine_, filas)
+
+    monkeypatch.setattr(escritor, "_insertar", insertar_lento)
+
+    _registrar(escritor, engine)
+    assert escribiendo.wait(5)
+    _registrar(escritor, engine)
+    _registrar(escritor, engine)  # cola llena (2)
+    _registrar(escritor, engine, "DESBORDE")
+
+    assert _contar(engine) == (1 if politica == "sincrono" else 0)
+    liberar.set()
+    escritor.vaciar()
+
+    assert _contar(engine) == esperados
+    estadisticas = escritor.estadisticas()
+    assert estadisticas["sincronos"] == (politica == "sincrono")
+    assert estadisticas["descartados"] == (politica == "descartar")
+
+
+def test_bd_en_memoria_escribe_en_el_request(escritor):
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+
+    _registrar(escritor, engine)
+
+    assert _contar(engine) == 1
+    assert escritor.estadisticas()["sincronos"] == 1
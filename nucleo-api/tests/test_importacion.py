@@ -0,0 +1,55 @@
+"""
+Costo de ``import main``: presupuesto de tiempo, dependencias diferidas y
+routers bajo demanda. Cada prueba corre en un intérprete limpio.
+"""
+import json
+
+from sistema.configuracion.diferidos import DIFERIDOS
+from sistema.utilidades.perfil_importacion import (
+    ejecutar_limpio, modulos_propios, perfil_importacion, presupuesto_ms,
+)
+
+
+def _modulos_cargados(codigo: str, prefijos) -> list:
+    salida = ejecutar_limpio(
+        f"import json, sys\n{codigo}\n"
+        f"print(json.dumps(sorted(m for m in sys.modules if m.startswith({tuple(prefijos)!r}))))"
+    ).stdout
+    return json.loads(salida.splitlines()[-1])
+
+
+def test_import_main_dentro_del_presupuesto():
+    perfil = perfil_importacion("main", repeticiones=2)
+    total = perfil["main"].acumulado_ms
+    caros = "\n".join(
+        f"  {t.modulo}: {t.propio_ms:.1f} ms propio, {t.acumulado_ms:.1f} ms acumulado"
+        for t in modulos_propios(perfil)[:10]
+    )
+    assert total <= presupuesto_ms(), (
+        f"import main tardó {total:.0f} ms (presupuesto {presupuesto_ms():.0f} ms)\n{caros}"
+    )
+
+
+def test_import_main_no_carga_las_dependencias_diferidas():
+    assert _modulos_cargados("import main", DIFERIDOS) == []
+
+
+def test_precargar_diferidos_las_importa():
+    cargados = _modulos_cargados(
+        "from sistema.configuracion.diferidos import precargar_diferidos\nprecargar_diferidos()",
+        DIFERIDOS,
+    )
+    assert set(DIFERIDOS) <= set(cargados)
+
+
+def test_un_modulo_de_rutas_no_importa_los_demas():
+    cargados = _modulos_cargados("import sistema.rutas.ventas_rutas", ["sistema.rutas"])
+    assert cargados == ["sistema.rutas", "sistema.rutas.ventas_rutas"]
+
+
+def test_routers_del_paquete_se_resuelven_al_pedirlos():
+    from sistema import rutas
+    from sistema.rutas import ventas_rutas
+
+    assert rutas.ventas_router is ventas_rutas.router
+    assert set(rutas.__all__) >= {"ventas_router", "logs_router"}
@@ -0,0 +1,135 @@
+"""Pruebas del login con bcrypt en pool de procesos, límites y re-hash."""
+import threading
+
+import bcrypt
+import pytest
+from fastapi import HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlmodel import Session, SQLModel, create_engine
+from starlette.requests import Request
+
+from sistema.configuracion import obtener_ajustes
+from sistema.configuracion import hashing
+from sistema.configuracion.limitador import LimitadorConcurrencia, limitador_login
+from sistema.entidades import Rol, Usuario
+from sistema.rutas import auth_rutas
+
+
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=rounds)).decode()
+
+
+def _login(session, username, password, ip="10.0.0.1"):
+    request = Request({"type": "http", "client": (ip, 0), "headers": []})
+    form = OAuth2PasswordRequestForm(username=username, password=password)
+    return auth_rutas.login(request=request, form_data=form, session=session)
+
+
+@pytest.fixture()
+def session(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'login.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Usuario(username="caja1", password_hash=_hash("caja123", 4), rol=Rol.VENDEDOR))
+        session.commit()
+        yield session
+
+
+@pytest.fixture()
+def pool_de_un_proceso(monkeypatch):
+    monkeypatch.setattr(obtener_ajustes(), "BCRYPT_PROCESOS", 1)
+    hashing.cerrar_pool_hash()
+    yield
+    hashing.cerrar_pool_hash()
+
+
+def test_verificacion_en_pool_de_procesos(pool_de_un_proceso):
+    password_hash = _hash("secreto", 4)
+    assert hashing.verificar_password_pool("secreto", password_hash)
+    assert not hashing.verificar_password_pool("otro", password_hash)
+    assert hashing._pool is not None
+
+
+def test_login_con_pool(session, pool_de_un_proceso):
+    assert _login(session, "caja1", "caja123").access_token
+
+    with pytest.raises(HTTPException) as error:
+        _login(session, "caja1", "incorrecta")
+    assert error.value.status_code == 401
+
+
+def test_limite_por_usuario_y_por_ip():
+    limitador = LimitadorConcurrencia()
+    por_usuario = [("usuario", "caja1", 2), ("ip", "10.0.0.1", 3)]
+
+    with limitador.reservar(por_usuario), limitador.reservar(por_usuario):
+        with pytest.raises(HTTPException) as error:
+            with limitador.reservar(por_usuario):
+                pass
+        assert error.value.status_code == 429
+
+        # Otro usuario desde la misma IP aún tiene un cupo
+        with limitador.reservar([("usuario", "caja2", 2), ("ip", "10.0.0.1", 3)]):
+            with pytest.raises(HTTPException):
+                with limitador.reservar([("usuario", "caja3", 2), ("ip", "10.0.0.1", 3)]):
+                    pass
+
+    assert limitador.en_curso("ip") == 0
+    assert limitador.rechazos == 2
+    with limitador.reservar(por_usuario):
+        assert limitador.en_curso("usuario") == 1
+
+
+def test_login_rechaza_rafaga_del_mismo_usuario(session, monkeypatch):
+    monkeypatch.setattr(obtener_ajustes(), "BCRYPT_PROCESOS", 0)
+    monkeypatch.setattr(obtener_ajustes(), "LOGIN_CONCURRENCIA_POR_USUARIO", 1)
+
+    dentro, liberar = threading.Event(), threading.Event()
+
+    def checkpw_lento(*args):
+        dentro.set()
+        liberar.wait(5)
+        return False
+
+    monkeypatch.setattr(hashing.bcrypt, "checkpw", checkpw_lento)
+
+    errores = []
+
+    def intento():
+        try:
+            with Session(session.get_bind()) as otra:
+                _login(otra, "caja1", "mala")
+        except HTTPException as error:
+            errores.append(error.status_code)
+
+    hilo = threading.Thread(target=intento)
+    hilo.start()
+    assert dentro.wait(5)
+
+    with pytest.raises(HTTPException) as error:
+        _login(session, "caja1", "mala", ip="10.0.0.2")
+    assert error.value.status_code == 429
+
+    liberar.set()
+    hilo.join()
+    assert errores == [401]
+    assert limitador_login.en_curso("usuario") == 0
+
+
+def test_rehash_al_cambiar_el_costo(session, monkeypatch):
+    ajustes = obtener_ajustes()
+    monkeypatch.setattr(ajustes, "BCRYPT_PROCESOS", 0)
+    monkeypatch.setattr(ajustes, "BCRYPT_ROUNDS", 5)
+
+    _login(session, "caja1", "caja123")
+    usuario = session.get(Usuario, 1)
+    assert hashing.costo_hash(usuario.password_hash) == 4  # desactivado por defecto
+
+    monkeypatch.setattr(ajustes, "BCRYPT_REHASH", True)
+    _login(session, "caja1", "caja123")
+    session.refresh(usuario)
+    assert hashing.costo_hash(usuario.password_hash) == 5
+    assert _login(session, "caja1", "caja123").access_token
@@ -37,12 +37,12 @@ async def test_admin_login_and_register_sale(session: Session):
     token_out = auth_rutas.login(request=request, form_data=form, session=session)
     token = token_out.access_token
 
-    usuario = await obtener_usuario_actual(token=token, session=session)
+    usuario = obtener_usuario_actual(token=token, session=session)
     assert usuario.username == "admin"
 
     permiso_crear_venta = requiere_permiso("ventas", "crear")
     # Debe pasar sin lanzar excepción gracias al permiso sembrado para ADMIN
-    usuario_con_permiso = await permiso_crear_venta(usuario_actual=usuario, session=session)
+    usuario_con_permiso = permiso_crear_venta(usuario_actual=usuario, session=session)
     assert usuario_con_permiso.id == usuario.id
 
     cafe = ingredientes_rutas.crear_ingrediente(
@@ -0,0 +1,97 @@
+"""Pruebas de la consulta de logs con UNION ALL y cursor (keyset)."""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, text
+from sqlmodel import Session, SQLModel, create_engine
+
+from sistema.entidades import Ingrediente, LogSesion, Movimiento, Rol, TipoMovimiento, Usuario
+from sistema.servicios.auditoria import TIPOS, consultar_logs, contar_logs
+
+BASE = datetime(2025, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture()
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def _poblar(engine, cantidad: int) -> None:
+    with Session(engine) as session:
+        usuario = Usuario(username="admin", password_hash="x", rol=Rol.ADMIN)
+        cafe = Ingrediente(nombre="Café", unidad="kg", costo_por_unidad=10, stock=100)
+        session.add_all([usuario, cafe])
+        session.commit()
+
+        for i in range(cantidad):
+            # Cada dos registros comparten fecha: obliga a desempatar por (tipo, id)
+            fecha = BASE + timedelta(seconds=i // 2)
+            session.add(LogSesion(usuario_id=usuario.id, accion=f"LOGIN_{i}", creado_en=fecha))
+            session.add(Movimiento(
+                ingrediente_id=cafe.id, tipo=TipoMovimiento.ENTRADA,
+                cantidad=i, referencia=f"Compra {i}", creado_en=fecha,
+            ))
+        session.commit()
+
+
+def test_cursor_recorre_todo_sin_huecos_ni_duplicados(engine):
+    _poblar(engine, 25)
+
+    with Session(engine) as session:
+        completos, _ = consultar_logs(session, list(TIPOS), limit=500)
+
+        recorridos, cursor = [], None
+        while True:
+            pagina, cursor = consultar_logs(session, list(TIPOS), limit=7, cursor=cursor)
+            recorridos.extend(pagina)
+            if cursor is None:
+                break
+
+    assert len(completos) == 50
+    assert [log["id"] for log in recorridos] == [log["id"] for log in completos]
+
+    fechas = [log["fecha"] for log in completos]
+    assert fechas == sorted(fechas, reverse=True)
+    assert completos[0]["id"] == "sesion_25"
+    assert completos[1]["id"] == "movimiento_25"
+    assert completos[1]["detalles"]["ingrediente"] == "Café"
+    assert completos[1]["accion"] == "ENTRADA"
+    assert completos[0]["usuario"] == "admin"
+
+
+def test_costo_constante_sin_consultas_por_fila(engine):
+    _poblar(engine, 200)
+    sentencias = []
+    event.listen(engine, "before_cursor_execute", lambda *args: sentencias.append(args[2]))
+
+    with Session(engine) as session:
+        logs, cursor = consultar_logs(session, list(TIPOS), limit=100)
+        total = contar_logs(session, list(TIPOS))
+        exacto = contar_logs(session, ["sesion"], exacto=True)
+
+    assert len(logs) == 100 and cursor
+    assert total == 400
+    assert exacto == 200
+    assert len(sentencias) == 4  # unión + MAX por tabla + COUNT
+
+
+def test_plan_usa_indices_de_fecha(engine):
+    with engine.connect() as conexion:
+        plan = " ".join(
+            str(fila[-1]) for fila in conexion.execute(text(
+                "EXPLAIN QUERY PLAN SELECT id FROM log_sesion "
+                "ORDER BY creado_en DESC, id DESC LIMIT 10"
+            ))
+        )
+    assert "ix_log_sesion_creado_en" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_cursor_invalido(engine):
+    with Session(engine) as session:
+        with pytest.raises(HTTPException) as error:
+            consultar_logs(session, list(TIPOS), limit=10, cursor="no-es-un-cursor")
+    assert error.value.status_code == 400
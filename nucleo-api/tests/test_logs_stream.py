@@ -0,0 +1,166 @@
+"""Pruebas del stream de logs (SSE) alimentado por el bus de eventos."""
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from sistema.entidades import Ingrediente, LogSesion, Receta, RecetaItem, Rol, Usuario
+from sistema.rutas.logs_rutas import stream_logs
+from sistema.rutas.ventas_rutas import ItemVentaCreate
+from sistema.servicios.auditoria import TIPOS, consultar_logs, logs_posteriores
+from sistema.servicios.bus_eventos import buses
+from sistema.servicios.motor_ventas import registrar_venta
+
+BASE = datetime(2025, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture()
+def engine():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Usuario(username="admin", password_hash="x", rol=Rol.ADMIN))
+        session.commit()
+    return engine
+
+
+class RequestFalso:
+    async def is_disconnected(self) -> bool:
+        return True
+
+
+def _login(engine, accion: str, segundos: int = 0) -> None:
+    with Session(engine) as session:
+        session.add(LogSesion(
+            usuario_id=1, accion=accion, creado_en=BASE + timedelta(seconds=segundos)
+        ))
+        session.commit()
+
+
+def _evento(mensaje: str) -> dict:
+    campos = dict(linea.split(": ", 1) for linea in mensaje.strip().splitlines())
+    return {**campos, "data": json.loads(campos["data"])}
+
+
+async def _recibir(cola):
+    return await asyncio.wait_for(cola.get(), 1)
+
+
+def test_bus_publica_al_confirmar_y_filtra_por_tipo(engine):
+    async def escenario():
+        bus = buses.para(engine)
+        sesiones = bus.suscribir(["sesion"], maximo=10)
+        movimientos = bus.suscribir(["movimiento"], maximo=10)
+
+        with Session(engine) as session:
+            session.add(LogSesion(usuario_id=1, accion="LOGIN"))
+            session.flush()
+            session.rollback()  # lo revertido no se publica
+        await asyncio.to_thread(_login, engine, "LOGOUT")
+
+        _, log = await _recibir(sesiones.cola)
+        assert log["accion"] == "LOGOUT" and log["usuario"] == "admin"
+        assert sesiones.cola.empty() and movimientos.cola.empty()
+
+        with Session(engine) as session:
+            assert consultar_logs(session, ["sesion"], limit=1)[0][0] == log
+        bus.cancelar(sesiones)
+        bus.cancelar(movimientos)
+        assert not bus.activo
+
+    asyncio.run(escenario())
+
+
+def test_venta_publica_un_evento_por_movimiento(engine):
+    with Session(engine) as session:
+        cafe = Ingrediente(nombre="Café", unidad="kg", costo_por_unidad=100, stock=5)
+        leche = Ingrediente(nombre="Leche", unidad="l", costo_por_unidad=20, stock=5)
+        receta = Receta(nombre="Latte")
+        session.add_all([cafe, leche, receta])
+        session.commit()
+        session.add_all([
+            RecetaItem(receta_id=receta.id, ingrediente_id=cafe.id, cantidad=0.02),
+            RecetaItem(receta_id=receta.id, ingrediente_id=leche.id, cantidad=0.2),
+        ])
+        session.commit()
+        receta_id = receta.id
+
+    def vender():
+        with Session(engine) as session:
+            return registrar_venta(session, [ItemVentaCreate(receta_id=receta_id, cantidad=2)]).id
+
+    async def escenario():
+        bus = buses.para(engine)
+        suscripcion = bus.suscribir(TIPOS, maximo=10)
+        venta_id = await asyncio.to_thread(vender)
+
+        logs = [(await _recibir(suscripcion.cola))[1] for _ in range(2)]
+        assert {log["detalles"]["ingrediente"] for log in logs} == {"Café", "Leche"}
+        assert all(log["usuario"] == f"Venta #{venta_id}" for log in logs)
+        bus.cancelar(suscripcion)
+
+    asyncio.run(escenario())
+
+
+def test_logs_posteriores_reanudan_en_orden(engine):
+    for i in range(5):
+        _login(engine, f"LOGIN_{i}", segundos=i)
+
+    with Session(engine) as session:
+        pagina, _ = consultar_logs(session, ["sesion"], limit=3)
+        _, cursor = consultar_logs(session, ["sesion"], limit=3)  # cursor tras LOGIN_2
+        siguientes = logs_posteriores(session, ["sesion"], cursor)
+
+    assert [log["accion"] for log in pagina] == ["LOGIN_4", "LOGIN_3", "LOGIN_2"]
+    assert [log["accion"] for _, log in siguientes] == ["LOGIN_3", "LOGIN_4"]
+
+
+def test_stream_reanuda_y_luego_sigue_en_vivo(engine, monkeypatch):
+    from sistema.configuracion import obtener_ajustes
+
+    monkeypatch.setattr(obtener_ajustes(), "LOGS_STREAM_PING_SEGUNDOS", 0.05)
+    for i in range(3):
+        _login(engine, f"LOGIN_{i}", segundos=i)
+
+    async def escenario():
+        with Session(engine) as session:
+            _, cursor = consultar_logs(session, ["sesion"], limit=2)  # tras LOGIN_1
+            respuesta = await stream_logs(
+                RequestFalso(), tipo="sesion", cursor=cursor, last_event_id=None,
+                session=session, usuario_actual=None,
+            )
+        assert respuesta.media_type == "text/event-stream"
+        mensajes = respuesta.body_iterator
+
+        relleno = _evento(await mensajes.__anext__())
+        assert relleno["event"] == "log" and relleno["data"]["accion"] == "LOGIN_2"
+
+        await asyncio.to_thread(_login, engine, "LOGIN_3", 3)
+        en_vivo = _evento(await mensajes.__anext__())
+        assert en_vivo["data"]["accion"] == "LOGIN_3"
+        assert en_vivo["id"] != relleno["id"]
+
+        # Sin eventos y con el cliente desconectado, el stream termina
+        with pytest.raises(StopAsyncIteration):
+            await mensajes.__anext__()
+        assert not buses.para(engine).activo
+
+    asyncio.run(escenario())
+
+
+def test_suscriptor_lento_queda_desbordado(engine):
+    async def escenario():
+        bus = buses.para(engine)
+        suscripcion = bus.suscribir(TIPOS, maximo=2)
+        for i in range(4):
+            await asyncio.to_thread(_login, engine, f"LOGIN_{i}", i)
+        await asyncio.sleep(0)
+        assert suscripcion.desbordada and suscripcion.cola.qsize() == 2
+        bus.cancelar(suscripcion)
+
+    asyncio.run(escenario())
@@ -0,0 +1,114 @@
+"""Pruebas de la matriz de permisos compilada en memoria."""
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from sistema.configuracion import obtener_ajustes, requiere_permiso
+from sistema.configuracion.permiso import matriz_para
+from sistema.entidades import PermisoRol, Rol, Usuario, UsuarioPermiso
+
+
+def _crear_engine(ruta):
+    engine = create_engine(f"sqlite:///{ruta}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    return _crear_engine(tmp_path / "permisos.db")
+
+
+@pytest.fixture()
+def vendedor(engine):
+    with Session(engine) as session:
+        usuario = Usuario(username="caja1", password_hash="x", rol=Rol.VENDEDOR, activo=True)
+        session.add(usuario)
+        session.add(PermisoRol(rol="VENDEDOR", recurso="ventas", accion="crear"))
+        session.commit()
+        session.refresh(usuario)
+        return usuario
+
+
+def _tiene_permiso(session, usuario, recurso, accion) -> bool:
+    try:
+        requiere_permiso(recurso, accion)(usuario_actual=usuario, session=session)
+        return True
+    except HTTPException as error:
+        assert error.status_code == 403
+        return False
+
+
+def test_verificaciones_en_caliente_no_consultan_la_bd(engine, vendedor):
+    sentencias = []
+    event.listen(engine, "before_cursor_execute", lambda *args: sentencias.append(args[2]))
+
+    with Session(engine) as session:
+        assert _tiene_permiso(session, vendedor, "ventas", "crear")
+        carga = len(sentencias)
+
+        for _ in range(50):
+            assert _tiene_permiso(session, vendedor, "ventas", "crear")
+            assert not _tiene_permiso(session, vendedor, "usuarios", "eliminar")
+
+    assert carga == 3  # generación + permiso_rol + usuario_permiso
+    assert len(sentencias) == carga
+
+
+def test_cambios_se_aplican_al_confirmar(engine, vendedor):
+    with Session(engine) as session:
+        assert not _tiene_permiso(session, vendedor, "inventario", "ver")
+
+        session.add(PermisoRol(rol="VENDEDOR", recurso="inventario", accion="ver"))
+        session.commit()
+        assert _tiene_permiso(session, vendedor, "inventario", "ver")
+
+        # La excepción por usuario tiene prioridad sobre el rol
+        session.add(UsuarioPermiso(
+            usuario_id=vendedor.id, recurso="inventario", accion="ver", permitido=False
+        ))
+        session.commit()
+        assert not _tiene_permiso(session, vendedor, "inventario", "ver")
+
+        excepcion = session.exec(select(UsuarioPermiso)).one()
+        session.delete(excepcion)
+        session.commit()
+        assert _tiene_permiso(session, vendedor, "inventario", "ver")
+
+
+def test_rollback_no_invalida(engine, vendedor):
+    with Session(engine) as session:
+        assert _tiene_permiso(session, vendedor, "ventas", "crear")
+        recargas = matriz_para(session).recargas
+
+        session.add(PermisoRol(rol="VENDEDOR", recurso="reportes", accion="ver"))
+        session.flush()
+        session.rollback()
+
+        assert not _tiene_permiso(session, vendedor, "reportes", "ver")
+        assert matriz_para(session).recargas == recargas
+
+
+def test_otro_worker_ve_el_cambio_por_generacion(tmp_path, monkeypatch):
+    ruta = tmp_path / "compartida.db"
+    worker_a, worker_b = _crear_engine(ruta), _crear_engine(ruta)
+
+    with Session(worker_a) as session:
+        usuario = Usuario(username="caja2", password_hash="x", rol=Rol.VENDEDOR, activo=True)
+        session.add(usuario)
+        session.commit()
+        session.refresh(usuario)
+
+    with Session(worker_b) as session_b:
+        assert not _tiene_permiso(session_b, usuario, "ventas", "ver")
+
+        with Session(worker_a) as session_a:
+            session_a.add(PermisoRol(rol="VENDEDOR", recurso="ventas", accion="ver"))
+            session_a.commit()
+
+        # Dentro del intervalo de revisión el worker B aún usa su copia
+        assert not _tiene_permiso(session_b, usuario, "ventas", "ver")
+
+        monkeypatch.setattr(obtener_ajustes(), "PERMISOS_REVISION_SEGUNDOS", 0.0)
+        assert _tiene_permiso(session_b, usuario, "ventas", "ver")
@@ -0,0 +1,113 @@
+"""
+Métricas en formato Prometheus: histogramas, middleware por ruta,
+métricas de BD y el endpoint /metrics.
+"""
+import re
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from sistema.configuracion.base_datos import PoolMedido, crear_motor
+from sistema.configuracion.sentencias_sql import medir_sql
+from sistema.entidades import Receta, Venta, VentaItem
+from sistema.servicios import metricas
+from sistema.servicios.metricas import Contador, Histograma, MedidorMetricas, Registro
+
+_LINEA = re.compile(r'^[a-z_]+(\{([a-z_]+="[^"]*",?)*\})? (-?[0-9.e+-]+|\+Inf)$')
+
+
+def test_histograma_acumula_cubetas():
+    registro = Registro()
+    histograma = registro.agregar(Histograma("espera_segundos", "Espera", (0.1, 1.0), ("cola",)))
+    for valor in (0.05, 0.1, 0.5, 3.0):
+        histograma.observar(valor, "a")
+    registro.agregar(Contador("eventos_total", "Eventos", ("tipo",))).sumar('con "comillas"\n')
+
+    assert registro.exponer().splitlines() == [
+        "# HELP espera_segundos Espera",
+        "# TYPE espera_segundos histogram",
+        'espera_segundos_bucket{cola="a",le="0.1"} 2',
+        'espera_segundos_bucket{cola="a",le="1"} 3',
+        'espera_segundos_bucket{cola="a",le="+Inf"} 4',
+        'espera_segundos_sum{cola="a"} 3.65',
+        'espera_segundos_count{cola="a"} 4',
+        "# HELP eventos_total Eventos",
+        "# TYPE eventos_total counter",
+        'eventos_total{tipo="con \\"comillas\\"\\n"} 1',
+    ]
+
+
+def test_middleware_cuenta_por_plantilla_de_ruta():
+    app = FastAPI()
+    app.add_middleware(MedidorMetricas)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(status_code=404)
+        return {"id": item_id}
+
+    client = TestClient(app)
+    antes_ok = metricas.peticiones.valor("GET", "/items/{item_id}", "200")
+    antes_404 = metricas.peticiones.valor("GET", "/items/{item_id}", "404")
+    antes_sin_ruta = metricas.peticiones.valor("GET", "(sin ruta)", "404")
+    antes_latencia = metricas.latencia.cuenta("GET", "/items/{item_id}")
+
+    for item_id in (1, 2, 0):
+        client.get(f"/items/{item_id}")
+    client.get("/no/existe")
+
+    assert metricas.peticiones.valor("GET", "/items/{item_id}", "200") == antes_ok + 2
+    assert metricas.peticiones.valor("GET", "/items/{item_id}", "404") == antes_404 + 1
+    assert metricas.peticiones.valor("GET", "(sin ruta)", "404") == antes_sin_ruta + 1
+    assert metricas.latencia.cuenta("GET", "/items/{item_id}") == antes_latencia + 3
+    assert metricas.en_curso.valor() == 0
+
+
+def test_sentencias_de_bd_por_ruta(client, auth_headers, test_session):
+    receta = Receta(nombre="Latte")
+    venta = Venta(sucursal="Centro", total=10.0)
+    test_session.add_all([receta, venta])
+    test_session.flush()
+    test_session.add(VentaItem(venta_id=venta.id, receta_id=receta.id, cantidad=1,
+                               precio_unitario=10.0, subtotal=10.0))
+    test_session.commit()
+    antes = metricas.sentencias_db.valor("GET", "/ventas/{venta_id}")
+
+    client.get(f"/ventas/{venta.id}", headers=auth_headers)
+
+    assert metricas.sentencias_db.valor("GET", "/ventas/{venta_id}") >= antes + 2
+    assert metricas.segundos_db.valor("GET", "/ventas/{venta_id}") > 0
+
+
+def test_endpoint_metrics(client):
+    client.get("/salud")
+    respuesta = client.get("/metrics")
+
+    assert respuesta.status_code == 200
+    assert respuesta.headers.get("content-type").startswith("text/plain; version=0.0.4")
+    cuerpo = respuesta.text
+    for nombre in (
+        "elcafesin_peticiones_total", "elcafesin_peticion_segundos", "elcafesin_peticiones_en_curso",
+        "elcafesin_db_sentencias_total", "elcafesin_pool_espera_segundos",
+        "elcafesin_cache_tasa_aciertos", "elcafesin_cola_pendientes",
+    ):
+        assert f"# TYPE {nombre} " in cuerpo
+    assert 'elcafesin_peticiones_total{metodo="GET",ruta="/salud",estado="200"}' in cuerpo
+    assert 'elcafesin_cola_pendientes{cola="auditoria"}' in cuerpo
+    invalidas = [l for l in cuerpo.splitlines() if not l.startswith("#") and not _LINEA.match(l)]
+    assert not invalidas
+
+
+def test_pool_medido_suma_la_espera_a_la_peticion(tmp_path):
+    motor = crear_motor(url=f"sqlite:///{tmp_path / 'pool.db'}", perfil="prod")
+    assert isinstance(motor.pool, PoolMedido)
+
+    with medir_sql() as medicion:
+        with motor.connect() as conexion:
+            conexion.execute(text("SELECT 1"))
+    motor.dispose()
+
+    assert medicion.espera_pool > 0
+    assert medicion.sentencias >= 1
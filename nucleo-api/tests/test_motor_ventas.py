@@ -0,0 +1,195 @@
+"""Pruebas del motor de ventas por conjuntos (un ticket = una transacción)."""
+import math
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from sistema.configuracion import obtener_ajustes
+from sistema.entidades import Ingrediente, Movimiento, Receta, RecetaItem, Rol, Venta, VentaItem
+from sistema.rutas import ventas_rutas
+from sistema.servicios.lista_precios import lista_precios
+
+
+class DummyUser:
+    def __init__(self):
+        self.id = 555
+        self.username = "motor-tester"
+        self.rol = Rol.VENDEDOR
+        self.activo = True
+
+
+@pytest.fixture()
+def engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture()
+def menu(engine):
+    """Seis recetas que comparten café y leche."""
+    with Session(engine) as session:
+        cafe = Ingrediente(nombre="Café", unidad="kg", costo_por_unidad=100.0, stock=5.0)
+        leche = Ingrediente(nombre="Leche", unidad="l", costo_por_unidad=20.0, stock=10.0)
+        azucar = Ingrediente(nombre="Azúcar", unidad="kg", costo_por_unidad=30.0, stock=2.0)
+        session.add_all([cafe, leche, azucar])
+        session.commit()
+
+        recetas = []
+        for i in range(6):
+            receta = Receta(nombre=f"Bebida {i}", margen=0.5 if i % 2 else None)
+            session.add(receta)
+            session.commit()
+            session.add_all([
+                RecetaItem(receta_id=receta.id, ingrediente_id=cafe.id, cantidad=0.02, merma=0.1),
+                RecetaItem(receta_id=receta.id, ingrediente_id=leche.id, cantidad=0.2, merma=0.0),
+                RecetaItem(receta_id=receta.id, ingrediente_id=azucar.id, cantidad=0.01),
+            ])
+            session.commit()
+            recetas.append(receta.id)
+
+        return {"cafe": cafe.id, "leche": leche.id, "azucar": azucar.id, "recetas": recetas}
+
+
+def _contar_sql(engine):
+    sentencias = []
+    event.listen(engine, "before_cursor_execute", lambda *args: sentencias.append(args[2]))
+    return sentencias
+
+
+def test_ticket_de_seis_lineas_usa_consultas_constantes(engine, menu, monkeypatch):
+    monkeypatch.setattr(obtener_ajustes(), "COSTOS_REVISION_SEGUNDOS", 3600.0)
+    lineas = [
+        ventas_rutas.ItemVentaCreate(receta_id=receta_id, cantidad=2)
+        for receta_id in menu["recetas"]
+    ]
+
+    with Session(engine) as session:
+        lista = lista_precios(session)  # Se arma una vez, no por venta
+        sentencias = _contar_sql(engine)
+        venta = ventas_rutas.crear_venta(
+            datos=ventas_rutas.VentaCreate(sucursal="Centro", items=lineas),
+            session=session,
+            usuario_actual=DummyUser(),
+        )
+
+        # BOM + venta + items + stock + kardex + 4 acumulados + refresh
+        assert len(sentencias) <= 10
+        # El BOM es un CTE recursivo (WITH RECURSIVE ... SELECT)
+        assert sum(1 for s in sentencias if s.lstrip().upper().startswith(("SELECT", "WITH"))) == 2
+
+        costo = 0.02 * 1.1 * 100 + 0.2 * 20 + 0.01 * 30
+        esperado = 3 * costo * 1.4 * 2 + 3 * costo * 1.5 * 2
+        assert math.isclose(venta.total, esperado, rel_tol=1e-9)
+
+        cafe = session.get(Ingrediente, menu["cafe"])
+        leche = session.get(Ingrediente, menu["leche"])
+        assert math.isclose(cafe.stock, 5.0 - 6 * 2 * 0.022, rel_tol=1e-9)
+        assert math.isclose(leche.stock, 10.0 - 6 * 2 * 0.2, rel_tol=1e-9)
+
+        items = session.exec(select(VentaItem).where(VentaItem.venta_id == venta.id)).all()
+        assert [i.receta_id for i in items] == menu["recetas"]
+        assert {i.lista_precios_version for i in items} == {lista.version}
+
+        movimientos = session.exec(select(Movimiento)).all()
+        assert len(movimientos) == 3
+        assert all(m.referencia == f"Venta #{venta.id}" for m in movimientos)
+
+
+def test_stock_insuficiente_no_escribe_nada(engine, menu):
+    with Session(engine) as session:
+        with pytest.raises(HTTPException) as error:
+            ventas_rutas.crear_venta(
+                datos=ventas_rutas.VentaCreate(
+                    items=[ventas_rutas.ItemVentaCreate(receta_id=menu["recetas"][0], cantidad=300)]
+                ),
+                session=session,
+                usuario_actual=DummyUser(),
+            )
+
+        assert error.value.status_code == 400
+        assert "Stock insuficiente de Café" in error.value.detail
+        assert session.exec(select(Venta)).all() == []
+        assert session.get(Ingrediente, menu["cafe"]).stock == 5.0
+
+
+def test_receta_inexistente_devuelve_404(engine, menu):
+    with Session(engine) as session:
+        with pytest.raises(HTTPException) as error:
+            ventas_rutas.crear_venta(
+                datos=ventas_rutas.VentaCreate(
+                    items=[
+                        ventas_rutas.ItemVentaCreate(receta_id=menu["recetas"][0]),
+                        ventas_rutas.ItemVentaCreate(receta_id=9999),
+                    ]
+                ),
+                session=session,
+                usuario_actual=DummyUser(),
+            )
+
+        assert error.value.status_code == 404
+        assert session.exec(select(Venta)).all() == []
+
+
+def test_cambio_de_precio_publica_una_nueva_version(engine, menu):
+    def vender():
+        with Session(engine) as session:
+            venta = ventas_rutas.crear_venta(
+                datos=ventas_rutas.VentaCreate(
+                    items=[ventas_rutas.ItemVentaCreate(receta_id=menu["recetas"][1])]
+                ),
+                session=session,
+                usuario_actual=DummyUser(),
+            )
+            return session.exec(select(VentaItem).where(VentaItem.venta_id == venta.id)).one()
+
+    antes = vender()
+    with Session(engine) as session:
+        session.get(Ingrediente, menu["leche"]).costo_por_unidad = 30.0
+        session.commit()
+    despues = vender()
+
+    assert despues.lista_precios_version > antes.lista_precios_version
+    assert math.isclose(despues.precio_unitario - antes.precio_unitario, 0.2 * 10 * 1.5, rel_tol=1e-9)
+
+
+def test_version_de_lista_corresponde_a_sus_precios_entre_workers(tmp_path, monkeypatch):
+    # Dos workers = dos engines (y dos caches) sobre el mismo archivo
+    monkeypatch.setattr(obtener_ajustes(), "COSTOS_REVISION_SEGUNDOS", 3600.0)
+    url = f"sqlite:///{tmp_path / 'workers.db'}"
+    worker_a, worker_b = create_engine(url), create_engine(url)
+    SQLModel.metadata.create_all(worker_a)
+    with Session(worker_a) as session:
+        leche = Ingrediente(nombre="Leche", unidad="l", costo_por_unidad=10.0)
+        latte, mocha = Receta(nombre="Latte", margen=0.0), Receta(nombre="Mocha", margen=0.0)
+        session.add_all([leche, latte, mocha])
+        session.commit()
+        session.add(RecetaItem(receta_id=latte.id, ingrediente_id=leche.id, cantidad=1.0))
+        session.commit()
+        ids = {"leche": leche.id, "latte": latte.id, "mocha": mocha.id}
+
+    with Session(worker_a) as session:
+        assert lista_precios(session).precios[ids["latte"]] == 10.0
+
+    with Session(worker_b) as session:  # B sube la leche
+        session.get(Ingrediente, ids["leche"]).costo_por_unidad = 20.0
+        session.commit()
+    with Session(worker_a) as session:  # A edita una receta que no la usa
+        session.get(Receta, ids["mocha"]).margen = 0.5
+        session.commit()
+
+    with Session(worker_a) as session:
+        lista = lista_precios(session)
+    with Session(worker_b) as session:
+        referencia = lista_precios(session)
+
+    assert lista.precios[ids["latte"]] == 20.0
+    assert lista.version == referencia.version
+    assert lista.precios == referencia.precios
@@ -0,0 +1,48 @@
+"""Pruebas de los perfiles de base de datos (dev/prod)."""
+import pytest
+from sqlalchemy import text
+
+from sistema.configuracion import Ajustes
+from sistema.configuracion.base_datos import crear_motor
+
+
+def _pragmas(engine):
+    with engine.connect() as conexion:
+        return {
+            nombre: conexion.execute(text(f"PRAGMA {nombre}")).scalar()
+            for nombre in ("journal_mode", "synchronous", "busy_timeout", "temp_store", "cache_size")
+        }
+
+
+def test_perfil_prod_aplica_pragmas_y_pool(tmp_path):
+    ajustes = Ajustes(DB_POOL_SIZE=7, SQLITE_BUSY_TIMEOUT_MS=1234)
+    engine = crear_motor(f"sqlite:///{tmp_path / 'prod.db'}", perfil="prod", ajustes_bd=ajustes)
+
+    assert _pragmas(engine) == {
+        "journal_mode": "wal",
+        "synchronous": 1,  # NORMAL
+        "busy_timeout": 1234,
+        "temp_store": 2,  # MEMORY
+        "cache_size": ajustes.SQLITE_CACHE_SIZE,
+    }
+    assert engine.echo is False
+    assert engine.pool.size() == 7
+
+
+def test_perfil_dev_mantiene_sqlite_por_defecto(tmp_path):
+    engine = crear_motor(f"sqlite:///{tmp_path / 'dev.db'}", perfil="dev", ajustes_bd=Ajustes())
+
+    assert _pragmas(engine)["journal_mode"] == "delete"
+    assert engine.echo is True
+
+
+def test_echo_explicito_y_bd_en_memoria():
+    engine = crear_motor("sqlite://", perfil="prod", ajustes_bd=Ajustes(DB_ECHO=True))
+
+    assert engine.echo is True
+    assert _pragmas(engine)["temp_store"] == 2
+
+
+def test_perfil_desconocido():
+    with pytest.raises(ValueError):
+        crear_motor("sqlite://", perfil="turbo", ajustes_bd=Ajustes())
@@ -0,0 +1,139 @@
+"""
+Planes de las consultas frecuentes y migraciones de esquema.
+
+Se ejecutan las rutas y servicios reales, se capturan sus SELECT y se pasa
+cada uno por ``EXPLAIN QUERY PLAN``: si alguno recorre una tabla completa
+(``SCAN tabla`` sin índice) la prueba falla.
+"""
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel
+
+from sistema.configuracion.migraciones import MIGRACIONES, migrar
+from sistema.rutas import permisos_rutas, reportes_rutas, ventas_rutas
+from sistema.servicios.auditoria import codificar_cursor, consultar_kardex, consultar_logs
+from sistema.servicios.reportes import resumen_ventas
+
+_SCAN = re.compile(r"^SCAN (\w+)")
+
+AHORA = datetime(2026, 3, 10, 12, 0)
+
+
+def _capturar(engine, funcion):
+    """SELECT emitidos por ``funcion`` con sus parámetros"""
+    consultas = []
+
+    def escuchar(conexion, cursor, sentencia, parametros, contexto, varios):
+        if sentencia.lstrip().upper().startswith(("SELECT", "WITH")):
+            consultas.append((sentencia, parametros))
+
+    event.listen(engine, "before_cursor_execute", escuchar)
+    try:
+        with Session(engine) as session:
+            try:
+                funcion(session)
+            except HTTPException:
+                pass  # Un 404 también deja su consulta registrada
+    finally:
+        event.remove(engine, "before_cursor_execute", escuchar)
+    return consultas
+
+
+def _recorridos_completos(engine, consultas):
+    tablas = set(SQLModel.metadata.tables)
+    completos = []
+    with engine.connect() as conexion:
+        for sentencia, parametros in consultas:
+            plan = conexion.exec_driver_sql("EXPLAIN QUERY PLAN " + sentencia, parametros).all()
+            for *_, detalle in plan:
+                coincide = _SCAN.match(detalle)
+                if coincide and coincide.group(1) in tablas and "USING" not in detalle:
+                    completos.append(f"{detalle}\n    en: {sentencia}")
+    return completos
+
+
+CONSULTAS_FRECUENTES = {
+    "ventas por sucursal": lambda s: ventas_rutas.listar_ventas(
+        sucursal="Centro", fecha_desde=AHORA - timedelta(days=7), fecha_hasta=None,
+        limit=50, offset=0, session=s, usuario_actual=None,
+    ),
+    "ventas recientes": lambda s: ventas_rutas.listar_ventas(
+        sucursal=None, fecha_desde=None, fecha_hasta=None,
+        limit=50, offset=0, session=s, usuario_actual=None,
+    ),
+    "resumen de ventas del día": lambda s: resumen_ventas(
+        s, AHORA - timedelta(hours=6), AHORA,
+    ),
+    "resumen de ventas por sucursal": lambda s: resumen_ventas(
+        s, AHORA - timedelta(hours=6), AHORA, sucursal="Centro", por_sucursal=True,
+    ),
+    "top recetas del periodo": lambda s: reportes_rutas.top_recetas_vendidas(
+        limit=10, fecha_desde=AHORA - timedelta(days=1), fecha_hasta=AHORA,
+        session=s, usuario_actual=None,
+    ),
+    "logs": lambda s: consultar_logs(s, ["sesion", "movimiento"], 50),
+    "logs, página siguiente": lambda s: consultar_logs(
+        s, ["sesion", "movimiento"], 50, cursor=codificar_cursor(AHORA, "sesion", 10),
+    ),
+    "kardex de un ingrediente": lambda s: consultar_kardex(s, 50, ingrediente_id=1),
+    "kardex por rango": lambda s: consultar_kardex(
+        s, 50, desde=AHORA - timedelta(days=1), hasta=AHORA,
+    ),
+    "permiso de rol": lambda s: permisos_rutas.eliminar_permiso_rol(
+        rol="vendedor", recurso="ventas", accion="ver", session=s, usuario_actual=None,
+    ),
+    "permiso de usuario": lambda s: permisos_rutas.eliminar_permiso_usuario(
+        usuario_id=1, recurso="ventas", accion="ver", session=s, usuario_actual=None,
+    ),
+}
+
+
+@pytest.mark.parametrize("nombre", sorted(CONSULTAS_FRECUENTES))
+def test_consulta_frecuente_usa_indices(test_engine, nombre):
+    consultas = _capturar(test_engine, CONSULTAS_FRECUENTES[nombre])
+    assert consultas, "la función ya no consulta la BD: actualizar la lista"
+    completos = _recorridos_completos(test_engine, consultas)
+    assert not completos, "Recorrido completo de tabla:\n" + "\n".join(completos)
+
+
+def _indices(engine):
+    inspector = inspect(engine)
+    return {
+        tabla: sorted((i["name"], tuple(i["column_names"])) for i in inspector.get_indexes(tabla))
+        for tabla in inspector.get_table_names()
+    }
+
+
+def test_migraciones_llevan_una_bd_vieja_al_esquema_del_modelo(test_engine):
+    viejo = create_engine("sqlite://", poolclass=StaticPool)
+    with viejo.begin() as conexion:
+        # Esquema anterior: índice simple de fecha, sin compuestos ni columnas nuevas
+        conexion.exec_driver_sql(
+            "CREATE TABLE venta (id INTEGER PRIMARY KEY, cliente_id INTEGER, sucursal VARCHAR(50), "
+            "total FLOAT NOT NULL, creado_en DATETIME NOT NULL)"
+        )
+        conexion.exec_driver_sql("CREATE INDEX ix_venta_creado_en ON venta (creado_en)")
+        conexion.exec_driver_sql(
+            "INSERT INTO venta VALUES (1, NULL, 'Centro', 10.0, '2026-03-10 10:00:00')"
+        )
+    SQLModel.metadata.create_all(viejo)  # Lo que hace crear_tablas antes de migrar
+
+    assert [m.version for m in migrar(viejo)] == [m.version for m in MIGRACIONES]
+    assert migrar(viejo) == []
+    assert _indices(viejo) == _indices(test_engine)
+    with viejo.connect() as conexion:
+        assert conexion.exec_driver_sql("SELECT total FROM venta").scalar() == 10.0
+        assert conexion.exec_driver_sql(
+            "SELECT max(version) FROM esquema_version"
+        ).scalar() == MIGRACIONES[-1].version
+
+
+def test_bd_nueva_registra_las_migraciones_sin_cambios(test_engine):
+    antes = _indices(test_engine)
+    assert len(migrar(test_engine)) == len(MIGRACIONES)
+    assert _indices(test_engine) == antes
@@ -0,0 +1,103 @@
+"""Pruebas de /reportes/top_recetas y /reportes/movimientos_inventario (sin N+1)."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from sistema.entidades import (
+    Ingrediente, Movimiento, Receta, TipoMovimiento, Venta, VentaItem
+)
+from sistema.rutas.reportes_rutas import top_recetas_vendidas
+from sistema.servicios.auditoria import codificar_cursor
+
+INICIO = datetime(2025, 5, 1)
+
+
+@pytest.fixture
+def datos(test_engine):
+    with Session(test_engine) as session:
+        session.add_all([Receta(nombre=f"Receta {n}") for n in range(1, 21)])
+        session.add_all([
+            Ingrediente(nombre=f"Insumo {n}", unidad="kg", costo_por_unidad=1.0, stock=100.0)
+            for n in range(1, 11)
+        ])
+        session.commit()
+        session.execute(insert(Venta), [
+            {"id": n, "total": 0.0, "creado_en": INICIO + timedelta(hours=n)} for n in range(1, 41)
+        ])
+        session.execute(insert(VentaItem), [
+            {"venta_id": n, "receta_id": n % 20 + 1, "cantidad": 1 + n % 3, "subtotal": 10.0 * n}
+            for n in range(1, 41)
+        ])
+        # Varios movimientos con el mismo creado_en: el cursor desempata por id
+        session.execute(insert(Movimiento), [
+            {
+                "ingrediente_id": n % 10 + 1, "tipo": TipoMovimiento.SALIDA.value,
+                "cantidad": -1.0, "referencia": f"VENTA-{n}",
+                "creado_en": INICIO + timedelta(minutes=n // 3),
+            }
+            for n in range(1, 251)
+        ])
+        session.commit()
+    return test_engine
+
+
+@pytest.fixture
+def kardex(client, auth_headers):
+    def consultar(estado=200, **parametros):
+        parametros = {k: v for k, v in parametros.items() if v is not None}
+        respuesta = client.get("/reportes/movimientos_inventario", params=parametros, headers=auth_headers)
+        assert respuesta.status_code == estado, respuesta.text
+        return respuesta.json()
+
+    return consultar
+
+
+def test_top_recetas_en_una_consulta(datos, contar_sentencias):
+    with contar_sentencias(datos, maximo=1), Session(datos) as session:
+        respuesta = top_recetas_vendidas(
+            limit=5, fecha_desde=None, fecha_hasta=None, session=session, usuario_actual=None
+        )
+
+    top = respuesta["top_recetas"]
+    # Receta 1 = ventas 20 y 40; receta 20 = 19 y 39; receta 19 = 18 y 38; ...
+    assert [r["receta_nombre"] for r in top] == [f"Receta {n}" for n in (1, 20, 19, 18, 17)]
+    assert top[0] == {
+        "receta_id": 1, "receta_nombre": "Receta 1",
+        "cantidad_vendida": float(3 + 2), "monto_total": 600.0,
+    }
+
+
+def test_kardex_recorre_todas_las_paginas_sin_huecos(datos, kardex, contar_sentencias):
+    vistos, cursor, paginas = [], None, 0
+    while True:
+        with contar_sentencias(datos) as sentencias:
+            respuesta = kardex(limit=40, cursor=cursor)
+        assert len([s for s in sentencias if "movimiento" in s]) == 1
+        vistos += respuesta["movimientos"]
+        paginas += 1
+        cursor = respuesta["siguiente_cursor"]
+        if cursor is None:
+            break
+
+    assert paginas == 7
+    assert len({m["id"] for m in vistos}) == len(vistos) == 250
+    claves = [(m["fecha"], m["id"]) for m in vistos]
+    assert claves == sorted(claves, reverse=True)
+    assert vistos[0]["ingrediente_nombre"] == f"Insumo {vistos[0]['ingrediente_id']}"
+
+
+def test_kardex_filtra_por_ingrediente_y_fecha(datos, kardex):
+    hasta = INICIO + timedelta(minutes=40)
+    respuesta = kardex(ingrediente_id=3, fecha_hasta=hasta.isoformat())
+
+    assert respuesta["siguiente_cursor"] is None
+    assert {m["referencia"] for m in respuesta["movimientos"]} == {
+        f"VENTA-{n}" for n in range(1, 251) if n % 10 + 1 == 3 and n // 3 <= 40
+    }
+    assert all(m["ingrediente_nombre"] == "Insumo 3" for m in respuesta["movimientos"])
+
+
+def test_kardex_rechaza_cursor_de_otro_tipo(datos, kardex):
+    kardex(estado=400, cursor=codificar_cursor(INICIO, "sesion", 1))
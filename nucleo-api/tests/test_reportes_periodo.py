@@ -0,0 +1,126 @@
+"""Pruebas del reporte de ventas por período (agregación en SQL)."""
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from sistema.entidades import Venta
+from sistema.servicios.acumulados import reconstruir_acumulados
+from sistema.servicios.reportes import Periodo, resumen_ventas
+
+INICIO = datetime(2025, 1, 1)
+
+
+@pytest.fixture(scope="module")
+def datos():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    rnd = random.Random(7)
+    ventas = [
+        {
+            "sucursal": rnd.choice(["Centro", "Norte", None]),
+            "total": round(rnd.uniform(20, 200), 2),
+            "creado_en": INICIO + timedelta(minutes=rnd.randrange(60 * 24 * 75)),
+        }
+        for _ in range(3000)
+    ]
+    with Session(engine) as session:
+        session.execute(insert(Venta), ventas)
+        session.commit()
+        reconstruir_acumulados(session)
+    return engine, ventas
+
+
+def _esperado(ventas, desde, hasta, sucursal, clave):
+    grupos = defaultdict(lambda: [0.0, 0])
+    for venta in ventas:
+        if not desde <= venta["creado_en"] <= hasta:
+            continue
+        if sucursal and venta["sucursal"] != sucursal:
+            continue
+        grupo = grupos[clave(venta)]
+        grupo[0] += venta["total"]
+        grupo[1] += 1
+    return {k: (round(total, 2), n) for k, (total, n) in grupos.items()}
+
+
+RANGOS = [
+    (INICIO, INICIO + timedelta(days=75)),  # todo, días completos
+    (INICIO + timedelta(days=3, hours=5, minutes=17), INICIO + timedelta(days=40, hours=2)),
+    (INICIO + timedelta(days=10), INICIO + timedelta(days=11) - timedelta(microseconds=1)),
+    (INICIO + timedelta(days=5, hours=1), INICIO + timedelta(days=5, hours=20)),  # mismo día
+]
+
+
+@pytest.mark.parametrize("desde, hasta", RANGOS)
+@pytest.mark.parametrize("sucursal", [None, "Norte"])
+def test_totales_coinciden_con_calculo_en_python(datos, desde, hasta, sucursal):
+    engine, ventas = datos
+    esperado = _esperado(ventas, desde, hasta, sucursal, lambda v: None).get(None, (0.0, 0))
+
+    with Session(engine) as session:
+        total, serie = resumen_ventas(session, desde, hasta, sucursal=sucursal)
+
+    assert total.num_ventas == esperado[1]
+    assert total.total == pytest.approx(esperado[0], abs=0.011)
+    assert serie == []
+
+
+@pytest.mark.parametrize("periodo, etiqueta", [
+    (Periodo.HORA, lambda f: f.strftime("%Y-%m-%dT%H:00")),
+    (Periodo.DIA, lambda f: f.strftime("%Y-%m-%d")),
+    (Periodo.SEMANA, lambda f: (f - timedelta(days=f.weekday())).strftime("%Y-%m-%d")),
+    (Periodo.MES, lambda f: f.strftime("%Y-%m")),
+])
+def test_series_por_periodo_y_sucursal(datos, periodo, etiqueta):
+    engine, ventas = datos
+    desde, hasta = RANGOS[1]
+    esperado = _esperado(
+        ventas, desde, hasta, None, lambda v: (etiqueta(v["creado_en"]), v["sucursal"])
+    )
+
+    with Session(engine) as session:
+        _, serie = resumen_ventas(session, desde, hasta, periodo=periodo, por_sucursal=True)
+
+    obtenido = {
+        (p["periodo"], p["sucursal"]): (p["total_ventas"], p["num_ventas"]) for p in serie
+    }
+    assert obtenido.keys() == esperado.keys()
+    for clave, (total, n) in esperado.items():
+        assert obtenido[clave][1] == n
+        assert obtenido[clave][0] == pytest.approx(total, abs=0.011)
+    assert serie == sorted(serie, key=lambda p: (p["periodo"], p["sucursal"] or ""))
+
+
+def test_ruta_no_carga_ventas_en_memoria(client, auth_headers, test_engine, datos):
+    _, ventas = datos
+    with Session(test_engine) as session:
+        session.execute(insert(Venta), ventas)
+        session.commit()
+        reconstruir_acumulados(session)
+    desde, hasta = RANGOS[1]
+    sentencias = []
+    escuchar = lambda *args: sentencias.append(args[2])  # noqa: E731
+    event.listen(test_engine, "before_cursor_execute", escuchar)
+    try:
+        respuesta = client.get(
+            "/reportes/ventas_periodo",
+            params={"fecha_desde": desde.isoformat(), "fecha_hasta": hasta.isoformat(), "periodo": "mes"},
+            headers=auth_headers,
+        )
+    finally:
+        event.remove(test_engine, "before_cursor_execute", escuchar)
+
+    assert respuesta.status_code == 200
+    datos_respuesta = respuesta.json()
+    reporte = [s for s in sentencias if "venta" in s]
+    assert len(reporte) == 3  # extremo inicial + acumulados + extremo final
+    assert all("sum(" in s.lower() for s in reporte)
+    assert [p["periodo"] for p in datos_respuesta["serie"]] == ["2025-01", "2025-02"]
+    assert datos_respuesta["num_ventas"] == sum(p["num_ventas"] for p in datos_respuesta["serie"])
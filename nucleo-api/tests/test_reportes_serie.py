@@ -0,0 +1,118 @@
+"""Pruebas de /reportes/serie (patrones por hora y día de la semana)."""
+import random
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert
+from sqlmodel import Session, select
+
+from sistema.entidades import Receta, Venta, VentaHora, VentaItem
+from sistema.servicios.acumulados import reconstruir_acumulados
+
+INICIO = datetime(2025, 3, 3)  # lunes
+
+
+@pytest.fixture
+def datos(test_engine):
+    rnd = random.Random(11)
+    ventas = []
+    with Session(test_engine) as session:
+        session.add_all([Receta(nombre="Latte"), Receta(nombre="Mocha")])
+        session.commit()
+        for venta_id in range(1, 2001):
+            creado_en = INICIO + timedelta(minutes=rnd.randrange(60 * 24 * 28))
+            items = [(rnd.choice([1, 2]), rnd.randint(1, 3)) for _ in range(rnd.randint(1, 2))]
+            ventas.append({
+                "id": venta_id, "sucursal": rnd.choice(["Centro", "Norte"]),
+                "total": 10.0 * sum(c for _, c in items), "creado_en": creado_en, "items": items,
+            })
+        session.execute(insert(Venta), [
+            {k: v for k, v in venta.items() if k != "items"} for venta in ventas
+        ])
+        session.execute(insert(VentaItem), [
+            {"venta_id": v["id"], "receta_id": r, "cantidad": c, "subtotal": 10.0 * c}
+            for v in ventas for r, c in v["items"]
+        ])
+        session.commit()
+        reconstruir_acumulados(session)
+    return test_engine, ventas
+
+
+@pytest.fixture
+def serie(client, auth_headers):
+    def consultar(estado=200, **parametros):
+        argumentos = {"fecha_desde": date(2025, 3, 3), "fecha_hasta": date(2025, 3, 30)}
+        argumentos.update(parametros)
+        respuesta = client.get("/reportes/serie", params=argumentos, headers=auth_headers)
+        assert respuesta.status_code == estado, respuesta.text
+        return respuesta.json()
+
+    return consultar
+
+
+@pytest.mark.parametrize("desfase", [0, -6, 5])
+def test_mapa_de_calor_coincide_con_las_ventas(datos, serie, desfase):
+    _, ventas = datos
+    esperado = Counter()
+    for venta in ventas:
+        if venta["sucursal"] == "Norte":
+            local = venta["creado_en"] + timedelta(hours=desfase)
+            esperado[(local.weekday(), local.hour)] += 1
+
+    respuesta = serie(sucursal="Norte", desfase_horas=desfase)
+
+    valores = respuesta["mapa_calor"]["valores"]
+    assert len(valores) == 7 and all(len(fila) == 24 for fila in valores)
+    assert {
+        (dia, hora): n for dia, fila in enumerate(valores) for hora, n in enumerate(fila) if n
+    } == dict(esperado)
+    assert [h["num_ventas"] for h in respuesta["por_hora"]] == [
+        sum(n for (_, hora), n in esperado.items() if hora == h) for h in range(24)
+    ]
+    assert respuesta["por_dia_semana"][0]["nombre"] == "lunes"
+
+
+def test_filtro_por_receta_usa_unidades(datos, serie):
+    _, ventas = datos
+    unidades = Counter()
+    tickets = Counter()
+    for venta in ventas:
+        cantidades = [c for r, c in venta["items"] if r == 2]
+        if cantidades:
+            unidades[venta["creado_en"].weekday()] += sum(cantidades)
+            tickets[venta["creado_en"].weekday()] += 1
+
+    respuesta = serie(receta_id=2, metrica="unidades")
+
+    assert [d["unidades"] for d in respuesta["por_dia_semana"]] == [unidades[d] for d in range(7)]
+    assert [d["num_ventas"] for d in respuesta["por_dia_semana"]] == [tickets[d] for d in range(7)]
+    assert sum(map(sum, respuesta["mapa_calor"]["valores"])) == sum(unidades.values())
+
+    serie(estado=400, metrica="unidades")
+
+
+def test_se_responde_solo_con_acumulados(datos, serie):
+    engine, _ = datos
+    sentencias = []
+    escuchar = lambda *args: sentencias.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", escuchar)
+    try:
+        serie(receta_id=1)
+        serie()
+    finally:
+        event.remove(engine, "before_cursor_execute", escuchar)
+
+    sentencias = [s for s in sentencias if "venta" in s]
+    assert len(sentencias) == 2
+    assert "venta_hora_receta" in sentencias[0] and "venta_hora" in sentencias[1]
+    assert not any("venta_item" in s or "FROM venta " in s for s in sentencias)
+
+
+def test_rango_sin_ventas(datos, serie):
+    engine, _ = datos
+    with Session(engine) as session:
+        assert session.exec(select(VentaHora).limit(1)).first() is not None
+
+    respuesta = serie(fecha_desde=date(2024, 1, 1), fecha_hasta=date(2024, 1, 31))
+    assert all(h["num_ventas"] == 0 for h in respuesta["por_hora"])
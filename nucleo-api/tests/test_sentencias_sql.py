@@ -0,0 +1,94 @@
+"""
+Sentencias SQL por petición: headers de depuración, detección de N+1 y el
+fixture ``sentencias_por_peticion``.
+"""
+import logging
+import threading
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import Session
+
+from sistema.configuracion.sentencias_sql import MedidorSQL, forma_sentencia, medir_sql
+from sistema.entidades import Receta, Venta, VentaItem
+
+
+def _app_de_prueba(engine, debug):
+    app = FastAPI()
+    app.add_middleware(MedidorSQL, debug=debug, umbral=3)
+
+    def sesion():
+        with Session(engine) as session:
+            yield session
+
+    @app.get("/filas/{n}")
+    def filas(n: int, session: Session = Depends(sesion)):
+        # Una consulta por fila, como un session.get en un for
+        return [session.execute(text("SELECT :n"), {"n": i}).scalar() for i in range(n)]
+
+    return TestClient(app)
+
+
+def test_headers_de_depuracion_y_warning_por_n1(test_engine, caplog):
+    client = _app_de_prueba(test_engine, debug=True)
+
+    with caplog.at_level(logging.WARNING, logger="sistema.configuracion.sentencias_sql"):
+        respuesta = client.get("/filas/4")
+
+    assert respuesta.headers.get("X-SQL-Sentencias") == "4"
+    assert float(respuesta.headers.get("X-SQL-Tiempo-Ms")) >= 0
+    assert respuesta.headers.get("X-SQL-Repetidas") == "1"
+    assert "GET /filas/{n}: 4 × SELECT ?" in caplog.text
+
+    respuesta = client.get("/filas/2")
+    assert respuesta.headers.get("X-SQL-Repetidas") == "0"
+
+
+def test_sin_debug_no_hay_headers(test_engine):
+    respuesta = _app_de_prueba(test_engine, debug=False).get("/filas/2")
+    assert respuesta.headers.get("X-SQL-Sentencias") is None
+
+
+def test_solo_cuenta_lo_del_contexto_medido(test_engine):
+    def fondo():
+        with test_engine.connect() as conexion:
+            conexion.execute(text("SELECT 1"))
+
+    with medir_sql() as medicion:
+        hilo = threading.Thread(target=fondo)
+        hilo.start()
+        hilo.join()
+        with test_engine.connect() as conexion:
+            conexion.execute(text("SELECT 2"))
+
+    assert medicion.sentencias == 1
+
+
+def test_forma_colapsa_listas_de_parametros():
+    assert forma_sentencia("SELECT a\n  FROM t WHERE id IN (?, ?, ?)") == (
+        forma_sentencia("SELECT a FROM t WHERE id IN (?)")
+    )
+
+
+def test_detalle_de_venta_sin_consulta_por_item(
+    client, auth_headers, test_session, sentencias_por_peticion
+):
+    recetas = [Receta(nombre=f"Receta {n}") for n in range(8)]
+    venta = Venta(sucursal="Centro", total=80.0)
+    test_session.add_all([*recetas, venta])
+    test_session.flush()
+    test_session.add_all([
+        VentaItem(venta_id=venta.id, receta_id=receta.id, cantidad=1,
+                  precio_unitario=10.0, subtotal=10.0)
+        for receta in recetas
+    ])
+    test_session.commit()
+
+    client.get(f"/ventas/{venta.id}", headers=auth_headers)  # Caches de usuario y permisos
+    with sentencias_por_peticion(maximo=4, repetidas=False) as mediciones:
+        respuesta = client.get(f"/ventas/{venta.id}", headers=auth_headers)
+
+    assert respuesta.status_code == 200
+    assert [i["receta_nombre"] for i in respuesta.json()["items"]] == [r.nombre for r in recetas]
+    assert [m.ruta for m in mediciones] == ["GET /ventas/{venta_id}"]
@@ -0,0 +1,119 @@
+"""Pruebas de /recetas/simulacion (escenarios de precios sobre la matriz)."""
+import random
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from sistema.entidades import Ingrediente, Receta, RecetaItem
+from sistema.rutas import ingredientes_rutas
+from sistema.rutas.recetas_rutas import EscenarioPrecios, SimulacionPrecios, simular_precios
+from sistema.servicios.lista_precios import lista_precios
+
+
+@pytest.fixture
+def menu(test_engine):
+    rnd = random.Random(3)
+    precios = {n: round(rnd.uniform(5, 100), 2) for n in range(1, 13)}
+    items = [
+        (receta_id, ingrediente_id, round(rnd.uniform(0.05, 2), 3), rnd.choice([0.0, 0.05, 0.1]))
+        for receta_id in range(1, 41)
+        for ingrediente_id in rnd.sample(sorted(precios), rnd.randint(1, 4))
+    ]
+    with Session(test_engine) as session:
+        session.execute(insert(Ingrediente), [
+            {"id": n, "nombre": f"Insumo {n}", "costo_por_unidad": p} for n, p in precios.items()
+        ])
+        session.execute(insert(Receta), [
+            {"id": n, "nombre": f"Receta {n:02d}", "margen": 0.5 + n / 100} for n in range(1, 41)
+        ])
+        session.execute(insert(RecetaItem), [
+            {"receta_id": r, "ingrediente_id": i, "cantidad": c, "merma": m} for r, i, c, m in items
+        ])
+        session.commit()
+    return precios, items
+
+
+def _simular(engine, *escenarios):
+    with Session(engine) as session:
+        return simular_precios(
+            datos=SimulacionPrecios(escenarios=list(escenarios)), session=session, usuario_actual=None
+        )
+
+
+def _costos(items, precios):
+    costos = {receta_id: 0.0 for receta_id in range(1, 41)}
+    for receta_id, ingrediente_id, cantidad, merma in items:
+        costos[receta_id] += cantidad * (1 + merma) * precios[ingrediente_id]
+    return costos
+
+
+def test_escenarios_coinciden_con_recalculo_completo(test_engine, menu):
+    precios, items = menu
+    respuesta = _simular(
+        test_engine,
+        EscenarioPrecios(nombre="café +12, leche -5", variaciones={1: 12, 2: -5}),
+        EscenarioPrecios(variaciones={3: 50}, precios={3: 1.0, 4: 0.0}),
+        EscenarioPrecios(),
+    )
+
+    orden = [r["receta_id"] for r in respuesta["recetas"]]
+    assert orden == list(range(1, 41))  # "Receta 01" ... "Receta 40"
+    actuales = _costos(items, precios)
+    esperados = [
+        _costos(items, {**precios, 1: precios[1] * 1.12, 2: precios[2] * 0.95}),
+        _costos(items, {**precios, 3: 1.0, 4: 0.0}),
+        actuales,
+    ]
+    assert [e["nombre"] for e in respuesta["escenarios"]] == [
+        "café +12, leche -5", "Escenario 2", "Escenario 3"
+    ]
+    for escenario, esperado in zip(respuesta["escenarios"], esperados):
+        for n, receta_id in enumerate(orden):
+            margen = 0.5 + receta_id / 100
+            assert escenario["costo"][n] == pytest.approx(esperado[receta_id], abs=0.006)
+            assert escenario["precio_sugerido"][n] == pytest.approx(
+                esperado[receta_id] * (1 + margen), abs=0.006
+            )
+            real = actuales[receta_id] * (1 + margen) / esperado[receta_id] - 1
+            assert escenario["margen_delta"][n] == pytest.approx(real - margen, abs=1e-4)
+
+
+def test_matriz_en_cache_hasta_cambiar_un_precio(test_engine, menu, contar_sentencias):
+    precios, items = menu
+    _simular(test_engine, EscenarioPrecios(variaciones={1: 10}))
+    with contar_sentencias(test_engine, maximo=0):
+        _simular(test_engine, EscenarioPrecios(variaciones={1: 10}))
+
+    with Session(test_engine) as session:
+        ingredientes_rutas.actualizar_parcial_ingrediente(
+            ingrediente_id=1, datos={"costo_por_unidad": 200.0}, session=session, usuario_actual=None,
+        )
+
+    respuesta = _simular(test_engine, EscenarioPrecios())
+    esperado = _costos(items, {**precios, 1: 200.0})
+    assert respuesta["escenarios"][0]["costo"] == [round(esperado[n], 2) for n in range(1, 41)]
+
+
+def test_ingrediente_inexistente(test_engine, menu):
+    with pytest.raises(HTTPException) as error:
+        _simular(test_engine, EscenarioPrecios(variaciones={999: 10}))
+    assert error.value.status_code == 404
+
+
+def test_margen_cero_explicito(test_engine):
+    with Session(test_engine) as session:
+        session.add(Ingrediente(id=1, nombre="Insumo", costo_por_unidad=100.0))
+        session.add(Receta(id=1, nombre="Sin margen", margen=0.0))
+        session.add(RecetaItem(receta_id=1, ingrediente_id=1, cantidad=1.0, merma=0.0))
+        session.commit()
+
+    respuesta = _simular(test_engine, EscenarioPrecios(), EscenarioPrecios(variaciones={1: 25}))
+    actual, subida = respuesta["escenarios"]
+    assert actual["precio_sugerido"] == [100.0]
+    assert actual["margen_delta"] == [0.0]
+    assert subida["precio_sugerido"] == [125.0]
+    assert subida["margen_delta"] == [pytest.approx(-0.2)]
+    with Session(test_engine) as session:
+        assert lista_precios(session).precios == {1: 100.0}
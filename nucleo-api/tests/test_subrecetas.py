@@ -0,0 +1,168 @@
+"""Pruebas de subrecetas: costo por el DAG, ciclos, venta y migración."""
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, select
+
+from sistema.configuracion.migraciones import sincronizar_columnas
+from sistema.entidades import Ingrediente, Receta, RecetaItem
+from sistema.rutas import ingredientes_rutas, recetas_rutas
+from sistema.rutas.recetas_rutas import RecetaItemPayload, RecetaUpdate
+from sistema.servicios.costos_recetas import caches
+from sistema.servicios.lista_precios import lista_precios
+from sistema.servicios.motor_ventas import registrar_venta
+
+
+@pytest.fixture
+def barra(test_engine):
+    """Espresso y jarabe como preparaciones; el espresso lo comparten dos bebidas"""
+    with Session(test_engine) as session:
+        cafe = Ingrediente(nombre="Café", unidad="kg", costo_por_unidad=300.0, stock=1.0, min_stock=0.1)
+        leche = Ingrediente(nombre="Leche", unidad="l", costo_por_unidad=25.0, stock=10.0, min_stock=1.0)
+        azucar = Ingrediente(nombre="Azúcar", unidad="kg", costo_por_unidad=30.0, stock=5.0, min_stock=0.5)
+        espresso = Receta(nombre="Espresso", margen=1.0)
+        jarabe = Receta(nombre="Jarabe", margen=1.0)
+        latte = Receta(nombre="Latte", margen=1.0)
+        vainilla = Receta(nombre="Latte vainilla", margen=1.0)
+        americano = Receta(nombre="Americano", margen=1.0)
+        session.add_all([cafe, leche, azucar, espresso, jarabe, latte, vainilla, americano])
+        session.flush()
+        session.add_all([
+            RecetaItem(receta_id=espresso.id, ingrediente_id=cafe.id, cantidad=0.02, merma=0.1),
+            RecetaItem(receta_id=jarabe.id, ingrediente_id=azucar.id, cantidad=0.5),
+            RecetaItem(receta_id=latte.id, subreceta_id=espresso.id, cantidad=1.0),
+            RecetaItem(receta_id=latte.id, ingrediente_id=leche.id, cantidad=0.2),
+            RecetaItem(receta_id=vainilla.id, subreceta_id=latte.id, cantidad=1.0),
+            RecetaItem(receta_id=vainilla.id, subreceta_id=jarabe.id, cantidad=0.05),
+            RecetaItem(receta_id=americano.id, subreceta_id=espresso.id, cantidad=2.0),
+        ])
+        session.commit()
+        return SimpleNamespace(
+            cafe=cafe.id, leche=leche.id, azucar=azucar.id, espresso=espresso.id,
+            jarabe=jarabe.id, latte=latte.id, vainilla=vainilla.id, americano=americano.id,
+        )
+
+
+def _listar(engine):
+    with Session(engine) as session:
+        return {r.nombre: r for r in recetas_rutas.listar_recetas(session=session, usuario_actual=None)}
+
+
+def test_costo_explota_el_arbol(test_engine, barra):
+    recetas = _listar(test_engine)
+
+    # Espresso 0.022 kg × 300 = 6.6; latte 6.6 + 5; jarabe 15 por unidad
+    assert recetas["Espresso"].costo_total == 6.6
+    assert recetas["Americano"].costo_total == 13.2
+    assert recetas["Latte"].costo_total == 11.6
+    assert recetas["Latte vainilla"].costo_total == 12.35
+    assert recetas["Latte vainilla"].precio_sugerido == 24.7
+
+    latte, jarabe = recetas["Latte vainilla"].items
+    assert (latte.subreceta_id, latte.ingrediente_nombre, latte.costo_unitario) == (
+        barra.latte, "Latte", pytest.approx(11.6)
+    )
+    assert latte.ingrediente_id is None and latte.stock is None
+    assert jarabe.costo_unitario == 15.0
+
+
+def test_cambio_de_precio_invalida_las_recetas_que_lo_usan_por_subreceta(test_engine, barra):
+    _listar(test_engine)
+    with Session(test_engine) as session:
+        impacto = ingredientes_rutas.impacto_cambio_precio(
+            ingrediente_id=barra.cafe, costo_nuevo=400.0, session=session, usuario_actual=None,
+        )
+    assert {r["receta_nombre"]: r["costo_nuevo"] for r in impacto["recetas"]} == {
+        "Americano": 17.6, "Espresso": 8.8, "Latte": 13.8, "Latte vainilla": 14.55,
+    }
+
+    with Session(test_engine) as session:
+        ingredientes_rutas.actualizar_parcial_ingrediente(
+            ingrediente_id=barra.cafe, datos={"costo_por_unidad": 400.0}, session=session,
+            usuario_actual=None,
+        )
+
+    recetas = _listar(test_engine)
+    assert recetas["Latte vainilla"].costo_total == 14.55
+    assert recetas["Americano"].costo_total == 17.6
+    assert recetas["Jarabe"].costo_total == 15.0
+    assert caches.para(test_engine).estadisticas()["recetas"] == 5
+
+
+def test_ciclos_rechazados(test_engine, barra):
+    def editar(receta_id, nombre, subreceta_id):
+        with Session(test_engine) as session:
+            return recetas_rutas.actualizar_receta(
+                receta_id=receta_id,
+                datos=RecetaUpdate(
+                    nombre=nombre, items=[RecetaItemPayload(subreceta_id=subreceta_id, cantidad=1.0)]
+                ),
+                session=session, usuario_actual=None,
+            )
+
+    with pytest.raises(HTTPException) as error:
+        editar(barra.espresso, "Espresso", barra.vainilla)
+    assert error.value.status_code == 422
+    assert "'Espresso' ya forma parte de 'Latte vainilla'" in error.value.detail
+
+    with pytest.raises(HTTPException) as error:
+        editar(barra.latte, "Latte", barra.latte)
+    assert error.value.status_code == 422
+
+    with pytest.raises(HTTPException) as error:
+        editar(barra.espresso, "Espresso", 999)
+    assert error.value.status_code == 404
+
+    # Reemplazar el espresso del americano por el jarabe no es ciclo
+    assert editar(barra.americano, "Americano", barra.jarabe).costo_total == 15.0
+
+    with pytest.raises(ValidationError):
+        RecetaItemPayload(ingrediente_id=barra.cafe, subreceta_id=barra.jarabe, cantidad=1.0)
+
+
+def test_no_se_borra_una_subreceta_en_uso(test_engine, barra):
+    with Session(test_engine) as session, pytest.raises(HTTPException) as error:
+        recetas_rutas.eliminar_receta(receta_id=barra.espresso, session=session, usuario_actual=None)
+    assert error.value.status_code == 409
+    assert "Americano, Latte" in error.value.detail
+
+
+def test_venta_descuenta_ingredientes_hoja_en_una_consulta(test_engine, barra, contar_sentencias):
+    with Session(test_engine) as session:
+        lista_precios(session)
+        with contar_sentencias(test_engine) as sentencias:
+            venta = registrar_venta(session, [
+                SimpleNamespace(receta_id=barra.vainilla, cantidad=2),
+                SimpleNamespace(receta_id=barra.americano, cantidad=1),
+            ])
+        assert venta.total == pytest.approx(2 * 24.7 + 26.4)
+
+    assert sum("receta_item" in s for s in sentencias) == 1
+    with Session(test_engine) as session:
+        stock = dict(session.exec(select(Ingrediente.id, Ingrediente.stock)).all())
+    assert stock[barra.cafe] == pytest.approx(1.0 - 4 * 0.022)
+    assert stock[barra.leche] == pytest.approx(10.0 - 0.4)
+    assert stock[barra.azucar] == pytest.approx(5.0 - 2 * 0.05 * 0.5)
+
+
+def test_migracion_de_receta_item_sin_subrecetas():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as conexion:
+        conexion.exec_driver_sql(
+            "CREATE TABLE receta_item (id INTEGER PRIMARY KEY, receta_id INTEGER NOT NULL, "
+            "ingrediente_id INTEGER NOT NULL, cantidad FLOAT NOT NULL, merma FLOAT)"
+        )
+        conexion.exec_driver_sql("INSERT INTO receta_item VALUES (1, 1, 2, 0.5, 0.1)")
+        assert "receta_item" in sincronizar_columnas(conexion)
+
+    columnas = {c["name"]: c for c in inspect(engine).get_columns("receta_item")}
+    assert columnas["ingrediente_id"]["nullable"] and "subreceta_id" in columnas
+    with engine.begin() as conexion:
+        assert conexion.exec_driver_sql(
+            "SELECT id, receta_id, ingrediente_id, subreceta_id, cantidad, merma FROM receta_item"
+        ).one() == (1, 1, 2, None, 0.5, 0.1)
+        assert sincronizar_columnas(conexion) == []
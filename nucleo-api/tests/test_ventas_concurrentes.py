@@ -0,0 +1,118 @@
+"""Pruebas de concurrencia: las ventas en paralelo nunca dejan stock negativo."""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine, func, select
+
+from sistema.configuracion import crear_token, hash_password, obtener_sesion
+from sistema.entidades import (
+    Ingrediente, Movimiento, PermisoRol, Receta, RecetaItem, Rol, Usuario, Venta
+)
+from sistema.motor_principal import app
+from sistema.rutas.ventas_rutas import ItemVentaCreate
+from sistema.servicios import motor_ventas
+
+STOCK_INICIAL = 25.0
+VENTAS_EN_PARALELO = 300
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    # BD en archivo: cada hilo usa su propia conexión, como varios workers
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'concurrencia.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture()
+def escenario(engine):
+    with Session(engine) as session:
+        session.add(Usuario(
+            username="caja1",
+            password_hash=hash_password("caja123"),
+            rol=Rol.VENDEDOR,
+            activo=True,
+        ))
+        session.add(PermisoRol(rol="VENDEDOR", recurso="ventas", accion="crear"))
+        cafe = Ingrediente(nombre="Café", unidad="kg", costo_por_unidad=10.0, stock=STOCK_INICIAL)
+        session.add(cafe)
+        session.commit()
+
+        receta = Receta(nombre="Espresso doble", margen=0.5)
+        session.add(receta)
+        session.commit()
+        session.add(RecetaItem(receta_id=receta.id, ingrediente_id=cafe.id, cantidad=1.0, merma=0.0))
+        session.commit()
+        return {"ingrediente_id": cafe.id, "receta_id": receta.id}
+
+
+@pytest.fixture()
+def client(engine) -> Iterator[TestClient]:
+    def override_get_session():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[obtener_sesion] = override_get_session
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_ventas_paralelas_no_sobrevenden(client, engine, escenario):
+    headers = {"Authorization": f"Bearer {crear_token('caja1', extra_data={'rol': 'VENDEDOR'})}"}
+    payload = {"sucursal": "Centro", "items": [{"receta_id": escenario["receta_id"], "cantidad": 1}]}
+
+    def vender(_):
+        return client.post("/ventas", json=payload, headers=headers).status_code
+
+    with ThreadPoolExecutor(max_workers=24) as pool:
+        codigos = list(pool.map(vender, range(VENTAS_EN_PARALELO)))
+
+    exitosas = codigos.count(200)
+    assert set(codigos) <= {200, 400, 409}
+    assert exitosas == int(STOCK_INICIAL)
+
+    with Session(engine) as session:
+        stock = session.get(Ingrediente, escenario["ingrediente_id"]).stock
+        num_ventas = session.exec(select(func.count(Venta.id))).one()
+        descontado = session.exec(select(func.sum(Movimiento.cantidad))).one()
+
+    assert stock == 0.0
+    assert num_ventas == exitosas
+    assert descontado == -STOCK_INICIAL
+
+
+def test_reserva_condicionada_revierte_el_ticket(engine, escenario, monkeypatch):
+    """Si otra venta consume el stock tras la lectura, el UPDATE condicionado lo detecta."""
+    expandir_original = motor_ventas.expandir_recetas
+
+    def expandir_y_competir(session, receta_ids):
+        recetas = expandir_original(session, receta_ids)
+        # Otro worker vende casi todo el stock justo después de nuestra lectura
+        with Session(engine) as otra:
+            cafe = otra.get(Ingrediente, escenario["ingrediente_id"])
+            cafe.stock = 1.0
+            otra.add(cafe)
+            otra.commit()
+        return recetas
+
+    monkeypatch.setattr(motor_ventas, "expandir_recetas", expandir_y_competir)
+
+    with Session(engine) as session:
+        with pytest.raises(HTTPException) as error:
+            motor_ventas.registrar_venta(
+                session,
+                [ItemVentaCreate(receta_id=escenario["receta_id"], cantidad=3)],
+            )
+
+        assert error.value.status_code == 400
+        assert "Disponible: 1.0" in error.value.detail
+        assert session.exec(select(func.count(Venta.id))).one() == 0
+        assert session.exec(select(func.count(Movimiento.id))).one() == 0
+        assert session.get(Ingrediente, escenario["ingrediente_id"]).stock == 1.0
+
@@ -169,11 +169,9 @@ class APISmokeTests(unittest.TestCase):
         with Session(self.engine) as session:
             token_data = self._login(session, "admin", "admin123")
             payload = decodificar_token(token_data["access_token"])
-            usuario_actual = asyncio.run(
-                obtener_usuario_actual(
-                    token=token_data["access_token"],
-                    session=session,
-                )
+            usuario_actual = obtener_usuario_actual(
+                token=token_data["access_token"],
+                session=session,
             )
 
         self.assertEqual(payload["sub"], "admin")
@@ -237,7 +235,7 @@ class APISmokeTests(unittest.TestCase):
             )
             perm_guard = requiere_permiso("reportes", "ver")
             with self.assertRaises(HTTPException):
-                asyncio.run(perm_guard(usuario_actual=vendor, session=session))
+                perm_guard(usuario_actual=vendor, session=session)
 
         self.assertGreaterEqual(len(inventario), 1)
 
@@ -245,9 +243,9 @@ class APISmokeTests(unittest.TestCase):
         with Session(self.engine) as session:
             vendor = session.exec(select(Usuario).where(Usuario.username == "vendedor")).first()
             inventario_guard = requiere_permiso("inventario", "ver")
-            asyncio.run(inventario_guard(usuario_actual=vendor, session=session))
+            inventario_guard(usuario_actual=vendor, session=session)
             ventas_guard = requiere_permiso("ventas", "crear")
-            asyncio.run(ventas_guard(usuario_actual=vendor, session=session))
+            ventas_guard(usuario_actual=vendor, session=session)
 
             before = ingredientes_rutas.obtener_ingrediente(
                 ingrediente_id=self.ingredient_id,